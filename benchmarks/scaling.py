@@ -0,0 +1,220 @@
+"""
+Benchmarks how the learning algorithm scales, on synthetic hybrid systems generated in-process (see
+benchmarks/systems.py). The suite has two parts:
+    (1) micro-benchmarks of the hot kernels: the derivatives (diff_method_backandfor), the scan of the relative
+        difference between the backward and forward derivatives done by the segmentation (rel_diff), one DTW comparison
+        of two segments (dtw_similarity) and the learning of one guard (getGuard_inequality);
+    (2) scaling curves: the learning (Learner.infer_model) for increasing values of one size of the workload, the number
+        of trajectories, their length, the dimension or the number of modes. Each stage is timed using the trace of
+        utils/trace.py, which also records the counters, e.g., the number of DTW comparisons.
+The results are printed as tables and written as a JSON file:
+    {"environment": {...}, "micro": [{"kernel": "dtw", "points": 200, "seconds": 0.01}, ...],
+     "scaling": [{"system": "linear", "trajectories": 4, "length": 500, "dimension": 2, "modes": 2, "wall_time": 1.2,
+                  "stages": {"segmentation": 0.1, ...}, "counters": {...}, "modes_learned": 2, "error": null}, ...]}
+
+Usage (from the project folder):
+    python -m benchmarks.scaling --systems oscillator,linear --scale trajectories --values 2,4,8
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import time
+import warnings
+warnings.filterwarnings('ignore')   # disables FutureWarning in the use of clf.fit()
+
+import numpy as np
+
+from benchmarks.systems import SYSTEMS, generate_trajectories
+from utils.commandline_parser import read_commandline_arguments
+from utils.trace import start_trace, stop_trace
+from utils.trajectories_parser import preprocess_trajectories
+
+SCALES = ['trajectories', 'length', 'dimension', 'modes']
+FIXED_DIMENSION = {'oscillator': 2, 'bouncing_ball': 2}    # the systems whose dimension is not configurable
+
+
+def learning_parameters(system_dimension, modes, stepsize, arguments=()):
+    """
+    :param system_dimension: the dimension of the synthetic system, all the variables are output variables.
+    :param modes: the number of modes.
+    :param stepsize: the sampling time period of the trajectories.
+    :param arguments: other command line arguments of run.py, e.g., ['--guard-degree', '2'].
+    :return: the dictionary of the learning parameters, with the default values of run.py for the other parameters.
+    """
+    parameters = read_commandline_arguments(['--input-filename', 'synthetic', '--modes', str(modes),
+                                             '--size-input-variable', '0', '--size-output-variable',
+                                             str(system_dimension)] + list(arguments))
+    parameters['stepsize'] = stepsize
+    parameters['variableType_datastruct'] = []
+    return parameters
+
+
+def median_seconds(function, repeats, *args):
+    """
+    :return: the median wall-clock time in seconds of repeats calls of function(*args).
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def rel_diff_scan(b1, b2):
+    """
+    The scan of the segmentation (see two_fold_segmentation()): the relative difference between the backward and the
+    forward derivatives at each point.
+    """
+    from infer_ha.utils.util_functions import rel_diff
+    return [rel_diff(b1[i], b2[i]) for i in range(len(b1))]
+
+
+def run_micro_benchmarks(system, dimension, modes, trajectories, length, repeats):
+    """
+    Times the hot kernels of the learning algorithm on the trajectories of a synthetic system.
+
+    :return: the list of results {"kernel": name, "points": size of the input, "seconds": median time}.
+    """
+    from infer_ha.clustering.cluster_by_dtw import dtw_similarity
+    from infer_ha.infer_transitions.guards import getGuard_inequality
+    from infer_ha.segmentation.compute_derivatives import diff_method_backandfor
+
+    list_of_trajectories = generate_trajectories(system, dimension, modes, trajectories, length)
+    t_list, y_list, position = preprocess_trajectories(list_of_trajectories)
+    L_y = y_list[0].shape[1]
+    A, b1, b2, Y, ytuple = diff_method_backandfor(y_list, 1, 0.01, 5)
+    segment = min(200, len(Y) // 2)
+    src_data = list(range(segment))     # the guard separates the first and the second segment of points
+    dest_data = list(range(segment, 2 * segment))
+
+    results = []
+    kernels = [('derivatives', len(y_list[0]), diff_method_backandfor, (y_list, 1, 0.01, 5)),
+               ('rel_diff_scan', len(b1), rel_diff_scan, (b1, b2)),
+               ('dtw', 2 * segment, dtw_similarity, (Y[:segment], Y[segment:2 * segment])),
+               ('guard', 2 * segment, getGuard_inequality, (src_data, dest_data, L_y, 1, Y))]
+    for kernel, points, function, args in kernels:
+        results.append({'kernel': kernel, 'system': system, 'dimension': L_y, 'points': points,
+                        'seconds': median_seconds(function, repeats, *args)})
+    return results
+
+
+def run_learning(system, dimension, modes, trajectories, length, arguments=()):
+    """
+    Learns an HA model from the trajectories of a synthetic system, tracing the stages.
+
+    :return: the result of the point of a scaling curve, see the description of this module.
+    """
+    from infer_ha.learner import Learner
+
+    dimension = FIXED_DIMENSION.get(system, dimension)
+    result = {'system': system, 'trajectories': trajectories, 'length': length, 'dimension': dimension,
+              'modes': modes, 'wall_time': None, 'stages': {}, 'counters': {}, 'modes_learned': None, 'error': None}
+    list_of_trajectories = generate_trajectories(system, dimension, modes, trajectories, length)
+    parameters = learning_parameters(dimension, modes, 0.01, arguments)
+    start_trace()
+    try:
+        P_modes, G, mode_inv, transitions, position = Learner(list_of_trajectories, parameters).infer_model()
+        result['modes_learned'] = len(P_modes)
+    except Exception as error:  # a workload out of the reach of the algorithm is reported, not fatal for the suite
+        result['error'] = type(error).__name__ + ": " + str(error)
+    finally:
+        trace = stop_trace()
+    result['wall_time'] = trace['wall_time']
+    result['counters'] = trace['counters']
+    for stage in trace['stages']:
+        if stage['depth'] == 0:
+            result['stages'][stage['stage']] = stage['wall_time']
+    return result
+
+
+def run_scaling_curve(system, scale, values, sizes, arguments=()):
+    """
+    :param scale: the size of the workload to increase, one of SCALES.
+    :param values: the values of the size.
+    :param sizes: the dictionary of the other sizes {"trajectories": 4, "length": 500, "dimension": 2, "modes": 2}.
+    :return: the list of the results, one per value.
+    """
+    results = []
+    for value in values:
+        point = dict(sizes)
+        point[scale] = value
+        results.append(run_learning(system, point['dimension'], point['modes'], point['trajectories'],
+                                    point['length'], arguments))
+    return results
+
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+            'cpu_count': os.cpu_count()}
+
+
+def print_micro_results(results):
+    print("{0:<16}{1:<16}{2:>10}{3:>10}{4:>14}".format("kernel", "system", "dimension", "points", "seconds"))
+    for result in results:
+        print("{0:<16}{1:<16}{2:>10}{3:>10}{4:>14.6f}".format(result['kernel'], result['system'], result['dimension'],
+                                                             result['points'], result['seconds']))
+
+
+def print_scaling_results(results, scale):
+    stages = ['derivatives', 'segmentation', 'filtering', 'clustering', 'invariants', 'transitions']
+    print("{0:<16}{1:>14}{2:>10}".format("system", scale, "total") + "".join("{0:>14}".format(s) for s in stages))
+    for result in results:
+        line = "{0:<16}{1:>14}".format(result['system'], result[scale])
+        if result['error'] is not None:
+            print(line + "  failed: " + result['error'])
+            continue
+        line += "{0:>10.3f}".format(result['wall_time'])
+        print(line + "".join("{0:>14.3f}".format(result['stages'].get(s, 0.0)) for s in stages))
+
+
+def runScalingBenchmark():
+    parser = argparse.ArgumentParser(description='Benchmarks the learning algorithm on synthetic hybrid systems')
+    parser.add_argument('--systems', help='Comma separated systems among ' + "/".join(SYSTEMS) + '. Set to all by '
+                        'default', type=str, default=",".join(SYSTEMS), required=False)
+    parser.add_argument('--scale', help='The size increased along the scaling curves. Options are: ' + "/".join(SCALES) +
+                        '. trajectories is set default', type=str, choices=SCALES, default='trajectories', required=False)
+    parser.add_argument('--values', help='Comma separated values of the scaled size. Set to "2,4,8" by default', type=str,
+                        default='2,4,8', required=False)
+    parser.add_argument('--trajectories', help='Number of trajectories. Set to 4 by default', type=int, default=4,
+                        required=False)
+    parser.add_argument('--length', help='Number of points of each trajectory. Set to 500 by default', type=int,
+                        default=500, required=False)
+    parser.add_argument('--dimension', help='Dimension of the thermostat and of the linear system. Set to 2 by default',
+                        type=int, default=2, required=False)
+    parser.add_argument('--modes', help='Number of modes of the linear system (and number of modes to learn for all '
+                        'the systems). Set to 2 by default', type=int, default=2, required=False)
+    parser.add_argument('--repeats', help='Number of runs of each micro-benchmark, the median is reported. Set to 5 by '
+                        'default', type=int, default=5, required=False)
+    parser.add_argument('--part', help='Options are: micro/scaling/all. all is set default', type=str,
+                        choices=['micro', 'scaling', 'all'], default='all', required=False)
+    parser.add_argument('--output', help='JSON file of the results. Set to benchmark_results.json by default', type=str,
+                        default='benchmark_results.json', required=False)
+    args, learning_arguments = parser.parse_known_args()    # the other arguments are passed to the learning, see run.py
+    args = vars(args)
+
+    systems = [system.strip() for system in args['systems'].split(",") if system.strip()]
+    sizes = {scale: args[scale] for scale in SCALES}
+    values = [int(value) for value in args['values'].split(",")]
+    results = {'environment': environment(), 'micro': [], 'scaling': []}
+    if args['part'] in ['micro', 'all']:
+        for system in systems:
+            results['micro'] += run_micro_benchmarks(system, FIXED_DIMENSION.get(system, args['dimension']),
+                                                     args['modes'], args['trajectories'], args['length'],
+                                                     args['repeats'])
+        print_micro_results(results['micro'])
+    if args['part'] in ['scaling', 'all']:
+        for system in systems:
+            results['scaling'] += run_scaling_curve(system, args['scale'], values, sizes, learning_arguments)
+        print_scaling_results(results['scaling'], args['scale'])
+
+    with open(args['output'], "w") as f_out:
+        json.dump(results, f_out, indent=2)
+    print("Results written to", args['output'])
+
+
+if __name__ == '__main__':
+    runScalingBenchmark()
@@ -0,0 +1,86 @@
+"""
+Benchmarks the startup time of the learning tool.
+
+The heavy dependencies (matplotlib for the debug plots, sklearn, fastdtw, scipy.spatial and the libsvm library) are
+imported by the functions using them, so that `run.py --help` and small runs do not pay for the modules they do not
+need. This benchmark reports, each measured in a new Python process:
+    (1) the import time of each heavy dependency and whether importing run.py loads it, and
+    (2) the wall-clock time of `run.py --help` and of a small learning run.
+
+Usage (from the project folder):
+    python -m benchmarks.startup --repeats 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules imported only when a code path needs them. Importing svmutil loads the libsvm library.
+HEAVY_MODULES = ['matplotlib.pyplot', 'sklearn.linear_model', 'sklearn.cluster', 'sklearn.svm', 'fastdtw',
+                 'scipy.spatial', 'infer_ha.libsvm.svmutil']
+
+
+def run_python(arguments):
+    """
+    :param arguments: the list of arguments of the Python interpreter.
+    :return: the pair (wall-clock time in seconds, standard output) of running the arguments in a new process.
+    """
+    start = time.time()
+    completed = subprocess.run([sys.executable] + arguments, cwd=PROJECT_FOLDER, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, universal_newlines=True, check=True)
+    return time.time() - start, completed.stdout
+
+
+def median_time(arguments, repeats):
+    return statistics.median(run_python(arguments)[0] for _ in range(repeats))
+
+
+def heavy_modules_loaded(module="run"):
+    """
+    :param module: the module to import.
+    :return: the list of the modules in HEAVY_MODULES that are loaded by importing module.
+    """
+    script = "import json, sys; import " + module + "; print(json.dumps([name for name in " + repr(HEAVY_MODULES) + \
+             " if name in sys.modules]))"
+    return json.loads(run_python(["-c", script])[1])
+
+
+def import_time(module, repeats):
+    """
+    :return: the median time in seconds of importing the module in a new process, less the time of starting Python.
+    """
+    return median_time(["-c", "import " + module], repeats) - median_time(["-c", "pass"], repeats)
+
+
+def runStartupBenchmark():
+    parser = argparse.ArgumentParser(description='Benchmarks the startup time of the learning tool')
+    parser.add_argument('--repeats', help='Number of runs of each measure, the median is reported. Set to 5 by default',
+                        type=int, default=5, required=False)
+    parser.add_argument('--input-filename', help='Input of the small learning run',
+                        default='data/test_data/simu_oscillator_2.txt', required=False)
+    args = vars(parser.parse_args())
+    repeats = args['repeats']
+
+    loaded = heavy_modules_loaded()
+    print("{0:<26}{1:>14}{2:>24}".format("module", "import (s)", "loaded by run.py"))
+    for module in HEAVY_MODULES:
+        print("{0:<26}{1:>14.3f}{2:>24}".format(module, import_time(module, repeats), str(module in loaded)))
+
+    help_time = median_time(["run.py", "--help"], repeats)
+    with tempfile.TemporaryDirectory() as output_dir:
+        output_filename = os.path.join(output_dir, "startup_benchmark.txt")
+        run_time = median_time(["run.py", "--input-filename", args['input_filename'], "--output-filename",
+                                output_filename, "--size-input-variable", "0", "--size-output-variable", "2"], repeats)
+    print("run.py --help :", "{0:.3f}".format(help_time), "seconds")
+    print("small run     :", "{0:.3f}".format(run_time), "seconds  (input", args['input_filename'] + ")")
+
+
+if __name__ == '__main__':
+    runStartupBenchmark()
@@ -0,0 +1,140 @@
+"""
+Generates the trajectories of synthetic hybrid systems for the benchmarks, in the structure returned by
+parse_trajectories() in utils/parse_parameters.py, so that no input file is needed.
+
+The systems are:
+    oscillator: a damped 2-dimensional oscillator x' = (-x0 + x1, -x0 - x1) + offset, whose offset changes with the
+        quadrant of the state space (4 modes, the dimension and the number of modes are fixed).
+    thermostat: the temperatures of `dimension` rooms heated by one heater, switched on (mode 1) when the mean
+        temperature falls below 18 and off (mode 0) above 22 (2 modes).
+    bouncing_ball: the height and the velocity of a ball (dimension 2, 1 mode with the reset v := -0.75 v on the
+        ground).
+    linear: a multi-mode linear system of the given dimension and number of modes. Mode i has the stable flow
+        x' = A_i (x - c_i) on the variables x1, x2, ..., while x0 is a clock (x0' = 1). Mode i switches to the mode
+        i + 1 when x0 reaches i + 1, and the last mode switches to the mode 0 resetting the clock x0 := 0.
+The initial states are drawn at random with the seed, so that a workload is reproducible.
+"""
+
+import numpy as np
+
+SYSTEMS = ['oscillator', 'thermostat', 'bouncing_ball', 'linear']
+
+
+def simulate(flow, switch, x_init, mode, length, stepsize):
+    """
+    Simulates a hybrid system using the Runge-Kutta method (RK4).
+
+    :param flow: function flow(mode, x) returning the derivative of the state x in the mode.
+    :param switch: function switch(mode, x) returning the pair (mode, x) after the possible jump.
+    :param x_init: the initial state, a numpy array.
+    :param mode: the initial mode.
+    :param length: number of points of the trajectory.
+    :param stepsize: the sampling time period between two points.
+    :return: a trajectory as the 2-tuple (time, vector), see parse_trajectories().
+    """
+    y_points = np.zeros((length, len(x_init)))
+    x = np.array(x_init, dtype=np.double)
+    for i in range(length):
+        y_points[i] = x
+        k1 = flow(mode, x)
+        k2 = flow(mode, x + stepsize / 2 * k1)
+        k3 = flow(mode, x + stepsize / 2 * k2)
+        k4 = flow(mode, x + stepsize * k3)
+        x = x + stepsize / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        mode, x = switch(mode, x)
+    t_points = np.arange(length) * stepsize
+    return [t_points], [y_points]
+
+
+def oscillator_system(rng, dimension, modes):
+    offsets = {0: [1, -1], 1: [1, 1], 2: [-1, 1], 3: [-1, -1]}    # mode: the offset of the flow in the quadrant
+
+    def quadrant(x):
+        return (0 if x[0] >= 0 else 2) + (1 if (x[0] >= 0) != (x[1] >= 0) else 0)
+
+    def flow(mode, x):
+        return np.array([-x[0] + x[1], -x[0] - x[1]]) + np.array(offsets[mode]) * 0.5
+
+    def switch(mode, x):
+        return quadrant(x), x
+
+    x_init = rng.uniform(-1, 1, size=2)
+    return flow, switch, x_init, quadrant(x_init)
+
+
+def thermostat_system(rng, dimension, modes):
+    loss = rng.uniform(0.05, 0.15, size=dimension)     # heat loss rate of each room
+
+    def flow(mode, x):
+        return -loss * x + mode * 4.0
+
+    def switch(mode, x):
+        if mode == 1 and x.mean() >= 22:
+            return 0, x
+        if mode == 0 and x.mean() <= 18:
+            return 1, x
+        return mode, x
+
+    x_init = rng.uniform(18, 22, size=dimension)
+    return flow, switch, x_init, int(rng.randint(2))
+
+
+def bouncing_ball_system(rng, dimension, modes):
+    def flow(mode, x):
+        return np.array([x[1], -9.8])
+
+    def switch(mode, x):
+        if x[0] <= 0 and x[1] < 0:
+            return mode, np.array([0.0, -0.75 * x[1]])
+        return mode, x
+
+    return flow, switch, np.array([rng.uniform(5, 15), 0.0]), 0
+
+
+def linear_system(rng, dimension, modes):
+    system_rng = np.random.RandomState(0)   # the same system for all the trajectories, only the initial state varies
+    flows = []
+    centres = []
+    for i in range(modes):
+        flows.append(-np.eye(dimension) + 0.3 * system_rng.uniform(-1, 1, size=(dimension, dimension)))
+        centres.append(system_rng.uniform(-1, 1, size=dimension))
+
+    def flow(mode, x):
+        dx = flows[mode].dot(x - centres[mode])
+        dx[0] = 1.0
+        return dx
+
+    def switch(mode, x):
+        if x[0] >= mode + 1:
+            mode = (mode + 1) % modes
+            if mode == 0:
+                x = x.copy()
+                x[0] = 0.0
+        return mode, x
+
+    x_init = rng.uniform(-1, 1, size=dimension)
+    x_init[0] = rng.uniform(0, 1)
+    return flow, switch, x_init, 0
+
+
+SYSTEM_BUILDERS = {'oscillator': oscillator_system, 'thermostat': thermostat_system,
+                   'bouncing_ball': bouncing_ball_system, 'linear': linear_system}
+
+
+def generate_trajectories(system, dimension=2, modes=2, trajectories=4, length=500, stepsize=0.01, seed=0):
+    """
+    :param system: one of SYSTEMS.
+    :param dimension: the dimension of the thermostat and of the linear system.
+    :param modes: the number of modes of the linear system.
+    :param trajectories: the number of trajectories.
+    :param length: the number of points of each trajectory.
+    :param stepsize: the sampling time period.
+    :param seed: the seed of the initial states.
+    :return: the list of trajectories, see parse_trajectories() in utils/parse_parameters.py.
+    """
+    rng = np.random.RandomState(seed)
+    list_of_trajectories = []
+    for _ in range(trajectories):
+        flow, switch, x_init, mode = SYSTEM_BUILDERS[system](rng, dimension, modes)
+        list_of_trajectories.append(simulate(flow, switch, x_init, mode, length, stepsize))
+    return list_of_trajectories
@@ -6,20 +6,19 @@ This module contains our approach to clustering using the DTW algorithm.
 import csv
 
 import numpy as np
-from scipy.spatial.distance import euclidean
-from fastdtw import fastdtw         # https://pypi.org/project/fastdtw/
-from sklearn import metrics
-from sklearn import linear_model
 
 from infer_ha.clustering.utils import get_signal_data, compute_correlation, \
     create_simple_modes_positions_for_ODE_with_pruned_segments
 # from infer_ha.clustering.utils import create_simple_modes_positions_for_ODE
-from infer_ha.utils.util_functions import matrowex
+from infer_ha.distributed import active_coordinator, distributed_dtw
+from infer_ha.scheduler import TaskGraph
+from infer_ha.utils.util_functions import matrowex, least_squares_in_chunks
+from utils.trace import count
 from ..helpers.plotDebug import print_segmented_trajectories, print_P_modes
 from ..helpers import plotDebug as plotdebug
 
 
-def get_desired_ODE_coefficients(P_modes, A, b1, maximum_ode_prune_factor):
+def get_desired_ODE_coefficients(P_modes, A, b1, maximum_ode_prune_factor, chunk_rows=0, jobs=1):
     """
     ODE inference.
     This function computes the coefficients of the polynomial ODE for each cluster/mode. Note during ODE coefficient
@@ -33,6 +32,9 @@ def get_desired_ODE_coefficients(P_modes, A, b1, maximum_ode_prune_factor):
          function (or the mapping function) as mention in Jin et al. paper.
     :param b1: the derivatives of each point computed using the backward version of BDF.
     :param maximum_ode_prune_factor: integer value supplied by the user to decide the prune factor for ODE inference.
+    :param chunk_rows: when positive, the regression of a mode having more points is computed in chunks of chunk_rows
+        points (see least_squares_in_chunks()) to bound the memory.
+    :param jobs: the maximum number of threads computing the ODEs of the modes concurrently (see infer_ha/scheduler.py).
     :return: The computed cluster and the coefficients of the polynomial ODE.
         # P: holds a list of modes. Each mode is a list of structures; we call it a segment.
         # Thus, P = [mode-1, mode-2, ... , mode-n] where mode-1 = [ segment-1, ... , segment-n] and segments are
@@ -71,27 +73,104 @@ def get_desired_ODE_coefficients(P_modes, A, b1, maximum_ode_prune_factor):
         # print("i = ", i, "data size =", datasize)
         mode_pts.append(mode_ptsi)
     # Fit each cluster again
-    clfs = []
     # print("Computing Linear Regression(ODE) for the combined Cluster")
+    graph = TaskGraph()     # the ODEs of the modes are independent
     for i in range(num_mode):  # For this considered outputs coefficients are computed again
-        clf = linear_model.LinearRegression(fit_intercept=False)
-        # print("x = ", matrowex(A, mode_pts[i]), "  y = ", matrowex(b1, mode_pts[i]))
-        # print("mode_pts = ", mode_pts[i])
-        # print("i =", i)
-        clf.fit(matrowex(A, mode_pts[i]), matrowex(b1, mode_pts[i]))
-        clfs.append(clf)
+        graph.add_task('ode ' + str(i), mode_ODE_coefficients, A, b1, mode_pts[i], chunk_rows)
+    outputs = graph.run(jobs)
+    G = [outputs['ode ' + str(i)] for i in range(num_mode)]
 
     # P = mode_pts    # we do not want to return simple-segmented-modes
-    G = []
-    for i in range(len(clfs)):
-        G.append(clfs[i].coef_)
 
     # return P, G
     # return P_modes, G
     return G
 
+
+def mode_ODE_coefficients(A, b1, mode_pts, chunk_rows=0):
+    """
+    :param mode_pts: the positions of the points of the mode used for the regression.
+    :return: the coefficients of the polynomial ODE of the mode, see get_desired_ODE_coefficients().
+    """
+    from sklearn import linear_model
+    count('regressions')
+    if 0 < chunk_rows < len(mode_pts):   # the points of the mode do not fit in the memory budget
+        return least_squares_in_chunks(A, b1, mode_pts, chunk_rows)
+    clf = linear_model.LinearRegression(fit_intercept=False)
+    # print("x = ", matrowex(A, mode_pts), "  y = ", matrowex(b1, mode_pts))
+    # the regression is computed in double precision, also for single precision derivatives (option --precision)
+    clf.fit(matrowex(A, mode_pts).astype(np.double, copy=False), matrowex(b1, mode_pts).astype(np.double, copy=False))
+    return clf.coef_
+
+
+def dtw_similarity(signal1, signal2):
+    """
+    Compares two segmented signals using DTW.
+
+    :param signal1: the signal of the first segment, as returned by get_signal_data().
+    :param signal2: the signal of the second segment.
+    :return: the pair (distance, correlation). The DTW distance is normalized by the total length of both signals and
+        the correlation is the minimum correlation of the variables along the DTW path (see compute_correlation()).
+    """
+    from fastdtw import fastdtw         # https://pypi.org/project/fastdtw/
+    from scipy.spatial.distance import euclidean
+    dataSize = len(signal1)
+    if len(signal1) > 5:
+        dataSize = 5    # setting a small datasize for performance, tradeoff with accuracy
+    # half_dataSize = math.ceil(len(f_ode[i])/2)
+    # dataSize = half_dataSize     #len(f_ode[i])
+    distance1, path = fastdtw(signal1, signal2, radius=dataSize, dist=euclidean)
+    count('dtw_calls')
+    distance = distance1 / (len(signal1) + len(signal2))
+    correlValue = compute_correlation(path, signal1, signal2)
+    return distance, correlValue
+
+
+def is_similar(distance, correlValue, correl_threshold, distance_threshold):
+    """
+    :return: True if two segments having the given DTW distance and correlation belong to the same mode. The value 0 of
+        distance_threshold disables the comparison of the distance.
+    """
+    if correlValue >= correl_threshold and distance_threshold == 0:  # distance_threshold is disabled or ignored
+        return True
+    # distance is also compared. distance_threshold is threshold value to be supplied wisely
+    return correlValue >= correl_threshold and (distance_threshold > 0 and distance < distance_threshold)
+
+
+def compute_dtw_table(segmented_traj, b1, Y, t_list, L_y, size_of_input_variables, stepM):
+    """
+    Compares all the pairs of segments using DTW. The table does not depend on the thresholds, hence it is computed once
+    and shared by the clusterings for different threshold values (see cluster_by_dtw()).
+
+    :param segmented_traj: the segmented trajectories, see cluster_by_dtw().
+    :param b1: the derivatives of each point computed using the backward version of BDF.
+    :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :param t_list: a single-item list whose item is a numpy.ndarray containing time-values as a concatenated list.
+    :param L_y: is the dimension (input + output variables) of the system whose trajectory is being parsed.
+    :param size_of_input_variables: total number of input variables in the given trajectories.
+    :param stepM: the step size of Linear Multi-step Method.
+    :return: the pair (distance, correlation) of numpy.ndarray of shape (segments, segments), where the item [i, j] for
+        i < j holds the value returned by dtw_similarity() for the segments i and j. The other items are NaN.
+    """
+    f_ode, t_ode = get_signal_data(segmented_traj, Y, b1, L_y, t_list, size_of_input_variables, stepM)
+    count = len(f_ode)
+    distance = np.full((count, count), np.nan)
+    correlation = np.full((count, count), np.nan)
+    pairs = [(i, j) for i in range(count) for j in range(i + 1, count)]
+    coordinator = active_coordinator()
+    if coordinator is not None:     # the comparisons are distributed to the workers, see infer_ha/distributed.py
+        similarities = distributed_dtw(coordinator, f_ode, pairs)
+    else:
+        similarities = (dtw_similarity(f_ode[i], f_ode[j]) for i, j in pairs)
+    for (i, j), similarity in zip(pairs, similarities):
+        distance[i, j], correlation[i, j] = similarity
+
+    return distance, correlation
+
+
 def cluster_by_dtw(segmented_traj, A, b1, Y, t_list, L_y, correl_threshold, distance_threshold,
-                   size_of_input_variables, stepM, maximum_ode_prune_factor=50):
+                   size_of_input_variables, stepM, maximum_ode_prune_factor=50, dtw_table=None, chunk_rows=0,
+                   jobs=1):
     """
     This function contains our approach to clustering using the DTW algorithm.
 
@@ -112,6 +191,11 @@ def cluster_by_dtw(segmented_traj, A, b1, Y, t_list, L_y, correl_threshold, dist
     :param distance_threshold: threshold value for distance for DTW comparison of two segmented trajectories.
     :param size_of_input_variables: total number of input variables in the given trajectories.
     :param maximum_ode_prune_factor: maximum number of segments to be used for ODE computation per cluster/mode.
+    :param dtw_table: the comparisons of all the pairs of segments as returned by compute_dtw_table(). When None, the
+        segments are compared when needed.
+    :param chunk_rows: number of points of a chunk for the regression of the ODE of large modes, 0 for no chunking (see
+        get_desired_ODE_coefficients()).
+    :param jobs: the maximum number of threads computing the ODEs of the modes concurrently (see infer_ha/scheduler.py).
     :return: The computed cluster and the coefficients of the polynomial ODE.
         P: holds a list of modes. Each mode is a list of structures; we call it a segment.
         Thus, P = [mode-1, mode-2, ... , mode-n] where mode-1 = [ segment-1, ... , segment-n] and segments are
@@ -125,115 +209,50 @@ def cluster_by_dtw(segmented_traj, A, b1, Y, t_list, L_y, correl_threshold, dist
             # and segment-1 = ([start_ode, end_ode], [start_exact, end_exact], [p1, ..., p_n])
     # *******************************************************************************************
     # f_ode, t_ode = get_signal_data(segmented_traj, Y, L_y, t_list, size_of_input_variables, stepM)  # get the segmented signal from trajectory.
-    f_ode, t_ode = get_signal_data(segmented_traj, Y, b1, L_y, t_list, size_of_input_variables,
-                                   stepM)  # get the segmented signal from trajectory.
+    if dtw_table is None:
+        f_ode, t_ode = get_signal_data(segmented_traj, Y, b1, L_y, t_list, size_of_input_variables,
+                                       stepM)  # get the segmented signal from trajectory.
     # print("f_ode is ", f_ode)
     # *******************************************************************************************
 
-    # ******** To estimate the maximum and minimum values during clustering DTW ********
-    min_distance = 1e10
-    max_distance = 0
-    min_correl = 1
-    max_correl = -1
-    # *********************************************************************************
-
-    # ******************************************************************
-    res = segmented_traj  # to keep the OLD implementation's variable
     # ******************************************************************
-    count = len(res)
-
-    # P.append(res[0]) # stores the first segment
-    #  ********* Debugging ***********
-    # file_csv = open('clusterProcessFile.csv','w')
-    # writer = csv.writer(file_csv)   # file pointer created
-    # rowValue = ["i", "j", "Seg_i-time-start", "time-end", "Seg_j-time-start", "time-end", "distance", "correlation", "Cluster-ID"]
-    # writer.writerow(rowValue)
-    # ***************************************
-    f_ode1 = f_ode
-    t_ode1 = t_ode  # t_ode is used only for plotting for debugging
-    res1 = res    # makes a copy of the segmented_traj for working
-    res2 = res1
-    i = 0    # j = 0
-    myClusterCount = 0
-    while (i < count):
-        j = i + 1
-        mode = [res1[i]]  # to hold list of segments per mode; initialize the first segmented_traj
-        delete_position = []
-        while (j < count):  #  runs once for each f_ode_[i]
-            # print("i=", i, " :f_ode[i] is ", f_ode[i])
-            # print(" and j=", j, "  :f_ode[j] is ", f_ode[j])
-            dataSize = len(f_ode[i])
-            if len(f_ode[i]) > 5:
-                dataSize = 5    # setting a small datasize for performance, tradeoff with accuracy
-            # half_dataSize = math.ceil(len(f_ode[i])/2)
-            # dataSize = half_dataSize     #len(f_ode[i])
-            distance1, path = fastdtw(f_ode[i], f_ode[j], radius=dataSize, dist=euclidean)
-            distance = distance1 / (len(f_ode[i]) + len(f_ode[j]))
-            correlValue = compute_correlation(path, f_ode[i], f_ode[j])
-            if distance < min_distance:
-                min_distance = distance
-            if distance > max_distance:
-                max_distance = distance
-            if correlValue < min_correl:
-                min_correl = correlValue
-            if correlValue > max_correl:
-                max_correl = correlValue
-            length_seg_i = len(t_ode[i]) - 1
-            length_seg_j = len(t_ode[j]) - 1
+    # The segments are clustered greedily: the first unclustered segment starts a new mode and all the remaining
+    # unclustered segments similar to it are added to the mode.
+    # With a coordinator (see infer_ha/distributed.py), the comparisons of each mode are done by the workers.
+    coordinator = active_coordinator() if dtw_table is None else None
+    remaining = list(range(len(segmented_traj)))    # positions of the segments not yet clustered
+    while len(remaining) > 0:
+        i = remaining[0]
+        mode_positions = [i]  # to hold list of segments per mode; initialize the first segmented_traj
+        unclustered = []
+        if coordinator is not None:
+            similarities = distributed_dtw(coordinator, f_ode, [(i, j) for j in remaining[1:]])
+        for position, j in enumerate(remaining[1:]):
+            if coordinator is not None:
+                distance, correlValue = similarities[position]
+            elif dtw_table is None:
+                distance, correlValue = dtw_similarity(f_ode[i], f_ode[j])
+            else:
+                distance, correlValue = dtw_table[0][i, j], dtw_table[1][i, j]
 
             # Debugging ******************
-            # rowValue = [i, j, t_ode[i][0], t_ode[i][length_seg_i], t_ode[j][0], t_ode[j][length_seg_j], distance, correlValue, myClusterCount]
-            # writer.writerow(rowValue)
-            # if (correlValue > correl_threshold):
-            # print("i=", i, " and j=", j, " :  distance1 = ", distance1, " :  distance = ", distance, "   and   correlation = ", correlValue)
-
+            # print("i=", i, " and j=", j, " :  distance = ", distance, "   and   correlation = ", correlValue)
             # if (i==0 and j>=7 and j<=8):
             # plotdebug.plot_signals(t_ode[i], f_ode[i], t_ode[j], f_ode[j])
             # Debugging ******************
 
-            # This feature can also be used, when distance-threshold is not considered as parameter
-            if correlValue >= correl_threshold and distance_threshold == 0:  # distance_threshold is disabled or ignored
-                # print("******************************************** Found *******************************")
-                # print("i=", i, " and j=", j, " : Ignored distance = ", distance, "   and   correlation = ", correlValue)
-
-                mode.append(res1[j])
-                delete_position.append(j)
-
-
-            if correlValue >= correl_threshold and (distance_threshold > 0 and distance < distance_threshold):  # distance is also compared. distance_threshold is threshold value to be supplied wisely
-                # print("i=", i, " and j=", j, " :  distance1 = ", distance1, " :  distance = ", distance,
-                #       "   and   correlation = ", correlValue)
-                # print("******************************************** Found *******************************")
-                # print("i=", i, " and j=", j, " :  Distance = ", distance, "   and   correlation = ", correlValue)
-
-                mode.append(res1[j])
-                delete_position.append(j)
-
-
-            j = j + 1
-
-        P.append(mode)  # creating the list of modes, with each mode as a list of segments
-
-        # for all delete_position now delete list and update for next iterations
-        for val in reversed(delete_position):
-            f_ode1.pop(val)
-            t_ode1.pop(val)
-            res2.pop(val)
-        count = len(f_ode1)   # //update the new length of the segments
-        f_ode = f_ode1        # //update the new list of ODE data after clustering above
-        t_ode = t_ode1
-        res1 = res2
-        i = i + 1  # reset for next cluster
-        myClusterCount += 1
-
-    # print("CLUSTERING: Distance[min,max] = [", min_distance," , ", max_distance,"]")
-    # print("CLUSTERING: Correlation[min,max] = [", min_correl, " , ", max_correl, "]")
+            if is_similar(distance, correlValue, correl_threshold, distance_threshold):
+                mode_positions.append(j)
+            else:
+                unclustered.append(j)
 
+        P.append([segmented_traj[pos] for pos in mode_positions])  # creating the list of modes, with each mode as a list of segments
+        remaining = unclustered
 
     # Pruning using maximum_ode_prune_factor is applied only for ODE inference. However, we will still have all the
     # segments in the P data structure, since for inferring guards and assignments the more segments (and so more data)
     # we have the more accurate guard and assignments can be inferred.
-    G = get_desired_ODE_coefficients(P, A, b1, maximum_ode_prune_factor)
+    G = get_desired_ODE_coefficients(P, A, b1, maximum_ode_prune_factor, chunk_rows, jobs)
 
     return P, G
 
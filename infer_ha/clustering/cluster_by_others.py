@@ -5,8 +5,6 @@ This module contains the clustering algorithm
 
 '''
 import numpy as np
-import sklearn.cluster as skc
-from sklearn import linear_model
 
 import itertools
 
@@ -69,6 +67,8 @@ def convert_clfs_to_coeffArray(clfs):
 
 
 def dbscan_cluster(clfs, segmented_traj, A, b1, num_mode, dbscan_eps_dist, dbscan_min_samples, size_of_input_variables):
+    import sklearn.cluster as skc
+    from sklearn import linear_model
     # Clustering
 
     res = create_simple_per_segmented_positions(segmented_traj)  # for ODE inference we use segment excluding boundary points
@@ -159,6 +159,7 @@ def balls_in_boxes3(n, m, badcom, res, A, b1, ep):
     Every tuple contains some numbers from 1 to n representing different balls.
     This function implements the PruningSearch algorithm in the paper Jin et al.
     """
+    from sklearn import linear_model
     # print("badcom = ", badcom)
     # base case
     if n == m:
@@ -220,6 +221,7 @@ def balls_in_boxes3(n, m, badcom, res, A, b1, ep):
 
 
 def merge_cluster_tol2(res, A, b1, num_mode, ep):
+    from sklearn import linear_model
     print("Before Clustering starts, lets see the segments ordering")
     print(res)
 
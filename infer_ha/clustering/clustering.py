@@ -9,10 +9,16 @@ Below we have three approaches:
 The learning algorithm is currently designed by focusing on the DTW algorithm.
 """
 
+import logging
+
 from infer_ha.clustering.cluster_by_dtw import cluster_by_dtw
 from infer_ha.clustering.cluster_by_others import dbscan_cluster, merge_cluster_tol2
+from utils.cost_estimator import chunk_rows
+from utils.trace import count
+
+logger = logging.getLogger(__name__)
 
-def select_clustering(segmented_traj, A, b1, clfs, Y, t_list, L_y, learning_parameters, stepM):
+def select_clustering(segmented_traj, A, b1, clfs, Y, t_list, L_y, learning_parameters, stepM, dtw_table=None):
     """
     A wrapper module that enables the selection of different approaches to the clustering algorithm.
 
@@ -33,6 +39,9 @@ def select_clustering(segmented_traj, A, b1, clfs, Y, t_list, L_y, learning_para
     :param L_y: is the dimension (input + output variables) of the system whose trajectory is being parsed.
     :param learning_parameters: is a dictionary data structure having the list of commandline arguments passed by the
         user for the learning algorithm.
+    :param stepM: the step size of Linear Multi-step Method.
+    :param dtw_table: the DTW comparisons of all the pairs of segments as returned by compute_dtw_table(), used only by
+        the DTW clustering. When None, the segments are compared during the clustering.
     :return: The computed cluster and the coefficients of the polynomial ODE.
         P_modes: holds a list of modes. Each mode is a list of structures; we call it a segment.
         Thus, P = [mode-1, mode-2, ... , mode-n] where mode-1 = [ segment-1, ... , segment-n] and segments are
@@ -51,28 +60,31 @@ def select_clustering(segmented_traj, A, b1, clfs, Y, t_list, L_y, learning_para
     distance_threshold = learning_parameters['threshold_distance']
     dbscan_eps_dist = learning_parameters['dbscan_eps_dist']
     dbscan_min_samples = learning_parameters['dbscan_min_samples']
+    regression_chunk_rows = chunk_rows(learning_parameters.get('memory_budget', 0), 2 * (A.shape[1] + b1.shape[1]) * 8)
 
     P_modes = []
     G = []
     # Choice of Clustering Algorithm
     if len(segmented_traj) > num_mode:  # clustering is required only if segmentation finds more segments than required modes
         if method == "piecelinear":
-            print("We do not support this clustering algorithm!!")
+            logger.error("We do not support this clustering algorithm!!")
             exit(1)
             P_modes, G = merge_cluster_tol2(res, A, b1, num_mode, ep)  # This is Algo-2:InferByMerge function in Jin et al.
             # Todo: note this approach does not scale well in clustering high number of segments into low modes.
 
     if method == "dbscan":
-        print("Running DBSCAN clustering algorithm!!")
-        print("We do not support this clustering algorithm anymore. We have now modifed the number of data structure, it requires some modification to support it again!!")
+        logger.info("Running DBSCAN clustering algorithm!!")
+        logger.error("We do not support this clustering algorithm anymore. We have now modifed the number of data structure, it requires some modification to support it again!!")
         exit(1)
         P_modes, G = dbscan_cluster(clfs, segmented_traj, A, b1, num_mode, dbscan_eps_dist, dbscan_min_samples, size_of_input_variables)
-        print("Total Clusters after DBSCAN algorithm = ", len(P_modes))
+        logger.info("Total Clusters after DBSCAN algorithm = %d", len(P_modes))
 
     if method == "dtw":
         # print("Running clustering using  DTW algorithm!!")
         P_modes, G = cluster_by_dtw(segmented_traj, A, b1, Y, t_list, L_y, correl_threshold,
-                              distance_threshold, size_of_input_variables, stepM, maximum_ode_prune_factor) # t_list only used for debugging using plot
-        print("Total Clusters after DTW algorithm = ", len(P_modes))
+                              distance_threshold, size_of_input_variables, stepM, maximum_ode_prune_factor,
+                              dtw_table, regression_chunk_rows, learning_parameters.get('jobs', 1)) # t_list only used for debugging using plot
+        logger.info("Total Clusters after DTW algorithm = %d", len(P_modes))
 
+    count('modes', len(P_modes))
     return P_modes, G
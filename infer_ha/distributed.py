@@ -0,0 +1,359 @@
+"""
+This module distributes the DTW comparisons of the clustering and the learning of the guards to worker processes,
+possibly running on other hosts, through a work queue served over TCP (see the options --coordinator and
+--coordinator-authkey in utils/commandline_parser.py and the script learn_worker.py).
+
+The learning process runs a Coordinator listening on a TCP address. Each worker connects to it (learn_worker.py
+--connect host:port) and repeatedly receives a task, runs it and sends back its result. A task is the name of a function
+of TASK_FUNCTIONS and its arguments, holding only the data needed, so that a worker needs no input file:
+    dtw_block: the DTW comparisons of a segment with a block of other segments, see cluster_by_dtw(),
+    guard: the guard of a transition, learned from the connecting points, see compute_transitions().
+The messages are pickled by multiprocessing.connection, which authenticates both ends with the shared key (authkey)
+before any message is exchanged. As unpickling a message can run code, anyone knowing the key can run code in the
+learning process: there is no default key, the coordinator generates a random key (see generate_authkey()) when none is
+given, and it listens on 127.0.0.1 unless another address is given explicitly. Listen on other interfaces only on a
+trusted network.
+
+Coordinator.map() queues a list of tasks and waits for their results, returned in the order of the tasks, so that the
+learned P_modes and transitions are the same as without workers. A task is dispatched again:
+    when its worker disconnects (e.g., the worker or its host crashed), or when it fails in the worker, up to
+        max_attempts attempts. The error of the last attempt is raised by map() as RemoteTaskError;
+    when it runs for more than straggler_timeout seconds while a worker is idle. The first result is kept and the
+        result of the other copy is discarded.
+Without a connected worker, the tasks wait in the queue.
+
+A single coordinator is active in the learning process (see start_coordinator()); the clustering and the transitions
+use it when it is active and otherwise compute the tasks locally.
+"""
+
+import collections
+import itertools
+import logging
+import os
+import secrets
+import threading
+import time
+from multiprocessing.connection import Listener, Client, AuthenticationError
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = ('127.0.0.1', 0)    # the local host only, on a free port
+DTW_BLOCK_SIZE = 50     # number of DTW comparisons of a task
+IDLE_CHECK_INTERVAL = 0.5   # seconds between the checks for straggling tasks while a worker is idle
+
+_coordinator = None     # the active coordinator, see start_coordinator()
+
+
+class RemoteTaskError(RuntimeError):
+    """
+    Raised when a task failed in all its attempts.
+    """
+
+
+def dtw_block(signal, others):
+    """
+    :param signal: the signal of a segment, as returned by get_signal_data().
+    :param others: the signals of the segments compared to it.
+    :return: the list of the pairs (distance, correlation), see dtw_similarity().
+    """
+    from infer_ha.clustering.cluster_by_dtw import dtw_similarity
+    return [dtw_similarity(signal, other) for other in others]
+
+
+def connecting_points_guard(src_points, dest_points, L_y, boundary_order, guard_backend, guard_max_points):
+    """
+    :param src_points: numpy.ndarray of the points (rows of Y) of the source mode, see getGuard_inequality().
+    :param dest_points: numpy.ndarray of the points of the destination mode.
+    :return: the coefficients of the guard learned from the points, see getGuard_inequality().
+    """
+    from infer_ha.infer_transitions.guards import getGuard_inequality
+    Y = np.vstack([src_points, dest_points])
+    total = len(src_points)
+    return getGuard_inequality(list(range(total)), list(range(total, 2 * total)), L_y, boundary_order, Y,
+                               guard_backend, guard_max_points)
+
+
+TASK_FUNCTIONS = {'dtw_block': dtw_block, 'guard': connecting_points_guard}
+
+
+def generate_authkey():
+    """
+    :return: a random key to share with the workers, as a hexadecimal string.
+    """
+    return secrets.token_hex(16)
+
+
+def distributed_dtw(coordinator, signals, pairs):
+    """
+    Compares pairs of segments using DTW on the workers, in blocks of at most DTW_BLOCK_SIZE comparisons of a segment.
+
+    :param coordinator: the active Coordinator.
+    :param signals: the signals of the segments, as returned by get_signal_data().
+    :param pairs: the list of the pairs (i, j) of positions of the segments to compare.
+    :return: the list of the pairs (distance, correlation) in the order of pairs, see dtw_similarity().
+    """
+    from utils.trace import count
+    blocks = []     # [i, [j, ...]]
+    for i, j in pairs:
+        if not blocks or blocks[-1][0] != i or len(blocks[-1][1]) >= DTW_BLOCK_SIZE:
+            blocks.append([i, []])
+        blocks[-1][1].append(j)
+    results = coordinator.map('dtw_block', [(signals[i], [signals[j] for j in others]) for i, others in blocks])
+    count('dtw_calls', len(pairs))
+    count('remote_tasks', len(blocks))
+    return [similarity for block in results for similarity in block]
+
+
+def distributed_guards(coordinator, connecting_points, L_y, boundary_order, Y, guard_backend, guard_max_points):
+    """
+    Learns guards on the workers.
+
+    :param coordinator: the active Coordinator.
+    :param connecting_points: the list of the pairs (srcData, destData) of each guard, see getGuard_inequality().
+    :return: the list of the coefficients of each guard.
+    """
+    from utils.trace import count
+    count('remote_tasks', len(connecting_points))
+    return coordinator.map('guard', [(Y[srcData], Y[destData], L_y, boundary_order, guard_backend, guard_max_points)
+                                     for srcData, destData in connecting_points])
+
+
+class Task:
+    def __init__(self, function, args):
+        self.function = function
+        self.args = args
+        self.attempts = 0
+        self.running = {}   # worker-id: time.time() of the dispatch
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class Coordinator:
+    """
+    Serves the tasks to the connected workers, see the description of this module.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=None, straggler_timeout=60.0, max_attempts=3):
+        """
+        :param address: the pair (host, port) to listen on. The port 0 selects a free port, see the attribute address.
+        :param authkey: the key shared with the workers. When None or empty, a random key is generated, see the
+            attribute authkey.
+        :param straggler_timeout: seconds after which a running task is also dispatched to an idle worker.
+        :param max_attempts: maximum number of attempts of a task failing or losing its worker.
+        """
+        self.authkey = authkey or generate_authkey()
+        self.listener = Listener(address, authkey=self.authkey.encode())
+        self.address = self.listener.address
+        self.straggler_timeout = straggler_timeout
+        self.max_attempts = max_attempts
+        self.condition = threading.Condition()
+        self.tasks = {}     # task-id: Task
+        self.pending = collections.deque()  # task-ids not dispatched
+        self.task_ids = itertools.count()
+        self.worker_ids = itertools.count()
+        self.workers = 0    # number of connected workers
+        self.closed = False
+        self.pid = os.getpid()
+        threading.Thread(target=self.accept, daemon=True).start()
+
+    def accept(self):
+        while not self.closed:
+            try:
+                connection = self.listener.accept()
+            except (AuthenticationError, EOFError, ConnectionError) as e:
+                logger.warning("Worker connection refused: %s", e)
+                continue
+            except OSError:     # the listener is closed
+                return
+            if self.closed:
+                connection.close()
+                return
+            threading.Thread(target=self.serve, args=(connection, next(self.worker_ids)), daemon=True).start()
+
+    def serve(self, connection, worker):
+        """
+        Sends the tasks to a worker until the coordinator is closed or the worker disconnects.
+        """
+        with self.condition:
+            self.workers += 1
+        task_id = None
+        try:
+            while True:
+                task_id = self.next_task(worker)
+                if task_id is None:
+                    connection.send(('stop',))
+                    return
+                task = self.tasks[task_id]
+                connection.send(('task', task.function, task.args))
+                status, value = connection.recv()
+                self.finish(task_id, worker, status, value)
+                task_id = None
+        except (EOFError, OSError) as e:
+            if task_id is not None:
+                self.finish(task_id, worker, 'lost', "worker " + str(worker) + " disconnected: " + str(e))
+        finally:
+            with self.condition:
+                self.workers -= 1
+            connection.close()
+
+    def next_task(self, worker):
+        """
+        :return: the id of the next task for the worker (a pending task, otherwise a straggling task not running on the
+            worker), or None when the coordinator is closed.
+        """
+        with self.condition:
+            while not self.closed:
+                now = time.time()
+                if self.pending:
+                    task_id = self.pending.popleft()
+                    self.tasks[task_id].running[worker] = now
+                    return task_id
+                for task_id, task in self.tasks.items():
+                    if not task.done and task.running and worker not in task.running and \
+                            now - min(task.running.values()) > self.straggler_timeout:
+                        logger.info("Task %d is straggling, dispatched again to worker %d", task_id, worker)
+                        task.running[worker] = now
+                        return task_id
+                self.condition.wait(IDLE_CHECK_INTERVAL)
+            return None
+
+    def finish(self, task_id, worker, status, value):
+        """
+        Records the result of an attempt of the task: 'done' with its result, 'failed' with the error in the worker or
+        'lost' when the worker disconnected.
+        """
+        with self.condition:
+            task = self.tasks.get(task_id)
+            if task is None or task.done:   # the result of the other copy of a straggling task is already recorded
+                return
+            task.running.pop(worker, None)
+            if status == 'done':
+                task.done, task.result = True, value
+            elif not task.running:  # no other copy of the task is running
+                task.attempts += 1
+                logger.warning("Task %d (%s) %s: %s", task_id, task.function, status, value)
+                if task.attempts >= self.max_attempts:
+                    task.done, task.error = True, value
+                else:
+                    self.pending.appendleft(task_id)
+            self.condition.notify_all()
+
+    def map(self, function, args_list):
+        """
+        Runs the tasks on the workers.
+
+        :param function: the name of a function of TASK_FUNCTIONS.
+        :param args_list: the arguments of each task.
+        :return: the list of the results, in the order of args_list.
+        :raise RemoteTaskError: if a task failed in all its attempts.
+        """
+        with self.condition:
+            task_ids = []
+            for args in args_list:
+                task_id = next(self.task_ids)
+                self.tasks[task_id] = Task(function, tuple(args))
+                self.pending.append(task_id)
+                task_ids.append(task_id)
+            self.condition.notify_all()
+            while not all(self.tasks[task_id].done for task_id in task_ids):
+                self.condition.wait()
+            tasks = [self.tasks.pop(task_id) for task_id in task_ids]
+        errors = [task.error for task in tasks if task.error is not None]
+        if errors:
+            raise RemoteTaskError(function + " failed in " + str(len(errors)) + " tasks: " + errors[0])
+        return [task.result for task in tasks]
+
+    def close(self):
+        """
+        Stops serving: the idle workers are sent a stop message and the listener is closed.
+        """
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        try:    # wakes the accepting thread up
+            Client(self.address, authkey=self.authkey.encode()).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+        self.listener.close()
+
+
+def start_coordinator(address=DEFAULT_ADDRESS, authkey=None, straggler_timeout=60.0, max_attempts=3):
+    """
+    Starts the coordinator used by the learning in this process, see Coordinator().
+
+    :return: the coordinator.
+    """
+    global _coordinator
+    stop_coordinator()
+    _coordinator = Coordinator(address, authkey, straggler_timeout, max_attempts)
+    return _coordinator
+
+
+def stop_coordinator():
+    global _coordinator
+    coordinator, _coordinator = _coordinator, None
+    if coordinator is not None:
+        coordinator.close()
+
+
+def active_coordinator():
+    """
+    :return: the coordinator started in this process, or None. A process forked from the learning process (e.g., a
+        worker of the sweep) has no coordinator.
+    """
+    coordinator = _coordinator
+    if coordinator is None or coordinator.pid != os.getpid():
+        return None
+    return coordinator
+
+
+def parse_address(address):
+    """
+    :param address: "host:port", Eg.: "127.0.0.1:8766".
+    :return: the pair (host, port).
+    """
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def run_worker(address, authkey, connect_timeout=0):
+    """
+    Connects to a coordinator and runs its tasks until it stops or disconnects.
+
+    :param address: the pair (host, port) of the coordinator.
+    :param authkey: the key of the coordinator, see the attribute Coordinator.authkey.
+    :param connect_timeout: seconds during which the connection is retried, e.g., while the coordinator starts.
+    :return: the number of tasks run.
+    """
+    deadline = time.time() + connect_timeout
+    while True:
+        try:
+            connection = Client(address, authkey=authkey.encode())
+            break
+        except ConnectionRefusedError:
+            if time.time() >= deadline:
+                raise
+            time.sleep(IDLE_CHECK_INTERVAL)
+
+    tasks = 0
+    with connection:
+        while True:
+            try:
+                message = connection.recv()
+            except (EOFError, OSError):     # the coordinator exited
+                break
+            if message[0] == 'stop':
+                break
+            function, args = message[1], message[2]
+            try:
+                reply = ('done', TASK_FUNCTIONS[function](*args))
+            except Exception as e:
+                reply = ('failed', type(e).__name__ + ": " + str(e))
+            connection.send(reply)
+            tasks += 1
+    return tasks
@@ -1,6 +1,6 @@
 import os
 import csv
-import matplotlib.pyplot as plt
+# matplotlib is imported by the plot functions only, so that the print functions are available without it
 
 from operator import itemgetter
 import itertools
@@ -10,6 +10,7 @@ from infer_ha.utils.util_functions import rel_diff
 
 
 def plot_signals(timeSignal1, Signal1, timeSignal2, Signal2):
+    import matplotlib.pyplot as plt
     # Note Signal1 and Signal2 only has output variables
     # print("len(t) is ", len(timeSignal1))
     # print("len(Signal1) is ", len(Signal1))
@@ -48,6 +49,7 @@ def plot_guard_points(segmentedTrajectories_modified, L_y, t_list, Y, stepM):
     @param stepM:
     @return:
     '''
+    import matplotlib.pyplot as plt
 
     x_pts = []
     x_p1 = []
@@ -119,6 +121,7 @@ def plot_guard_points(segmentedTrajectories_modified, L_y, t_list, Y, stepM):
     plt.show()
 
 def plot_reset_points(segmentedTrajectories_modified, L_y, t_list, Y, stepM):
+    import matplotlib.pyplot as plt
     x_pts = []
     x_p1 = []
     x_p2 = []
@@ -153,6 +156,7 @@ def plot_reset_points(segmentedTrajectories_modified, L_y, t_list, Y, stepM):
     plt.ylim([-80, 60])  # Excitable Cell Model
 
 def plot_segmentation(res, L_y, t_list, Y, stepM):
+    import matplotlib.pyplot as plt
     for imode in range(0, len(res)):
         x_pts = []
         x_p1 = []
@@ -228,6 +232,7 @@ def plot_segmentation_new(segmented_traj, L_y, t_list, Y, stepM):
     @param Y: is the list of values of the system. Y can be n-dimensional
     @return:
     """
+    import matplotlib.pyplot as plt
 
     fig, axs = plt.subplots(L_y, figsize=(10, 20))
 
@@ -317,6 +322,16 @@ def print_segmented_trajectories(segmented_traj):
         print("Segment: ODE data point = ", seg_ode_range, "    Transition data point = ", seg_transition_range)
 
 
+def print_mode_statistics(mode_statistics):
+
+    for imode in range(0, len(mode_statistics['count'])):
+        # mode_statistics as returned by compute_mode_statistics()
+        print("Mode", imode, ": points = ", mode_statistics['count'][imode])
+        print("    min = ", mode_statistics['min'][imode], "    max = ", mode_statistics['max'][imode])
+        print("    mean = ", mode_statistics['mean'][imode])
+        print("    variance = ", mode_statistics['covariance'][imode].diagonal())
+
+
 def print_P_modes(P_modes):
 
     for mode in P_modes:
@@ -330,6 +345,7 @@ def print_P_modes(P_modes):
 
 def plot_dropped_points(t_list, L_y, Y, Drop, stepM):
 
+    import matplotlib.pyplot as plt
     x_pts = []
     x_p1 = []
     x_p2 = []
@@ -377,7 +393,7 @@ def plot_after_clustering(t_list, L_y, P_modes, Y, stepM):
     mode_inv.append([2, invariant])
     print ("Mode invariant = ", mode_inv)
     '''
-
+    import matplotlib.pyplot as plt
 
     P = create_simple_modes_positions_for_ODE(P_modes)
 
@@ -3,19 +3,17 @@ This is the main module for inferring an HA model.
 """
 
 
+import logging
 import sys  # This is used for command line arguments
 
 from infer_ha.helpers.plotDebug import plot_data_values, output_derivatives, plot_segmentation_new, \
-    plot_after_clustering, print_segmented_trajectories, analyse_output, plot_guard_points
+    plot_after_clustering, print_segmented_trajectories, analyse_output, plot_guard_points, print_mode_statistics
 # from infer_ha.segmentation.segmentation import two_fold_segmentation_new, segmented_trajectories
 from infer_ha.segmentation.segmentation import two_fold_segmentation, segmented_trajectories
 
-from infer_ha.clustering.clustering import select_clustering
-from infer_ha.infer_invariants.invariants import compute_mode_invariant
-from infer_ha.libsvm.svmutil import *
-from infer_ha.segmentation.compute_derivatives import diff_method_backandfor
-from utils.trajectories_parser import preprocess_trajectories
-from infer_ha.infer_transitions.compute_transitions import compute_transitions
+from infer_ha.learner import Learner
+
+logger = logging.getLogger(__name__)
 
 sys.setrecursionlimit(1000000)  # this is the limit
 
@@ -58,27 +56,11 @@ def infer_model(list_of_trajectories, learning_parameters):
 
     """
 
-    stepsize = learning_parameters['stepsize']
-    maxorder = learning_parameters['ode_degree']
-    boundary_order = learning_parameters['guard_degree']
-    ep = learning_parameters['segmentation_error_tol']
-    ep_backward = learning_parameters['segmentation_fine_error_tol']
-    size_of_input_variables = learning_parameters['size_input_variable']
-    size_of_output_variables = learning_parameters['size_output_variable']
-    variableType_datastruct =  learning_parameters['variableType_datastruct'] # processed and stored in data-struct
-    isInvariant = learning_parameters['is_invariant']
-
-    methods = learning_parameters['methods']
-    stepM = learning_parameters['lmm_step_size'] # 2 for engine-timing  #  the step size of Linear Multi-step Method (step M)
-    # print("stepM =", stepM)
-    mode_inv = []
-    transitions = []
-    print("stepsize =", stepsize)
-    t_list, y_list, position = preprocess_trajectories(list_of_trajectories)
-    # print("position = ", position)
+    logger.info("stepsize = %s", learning_parameters['stepsize'])
+    # the stages are computed by the Learner, which holds t_list, L_y and position (used by the debugging code below)
+    learner = Learner(list_of_trajectories, learning_parameters)
     # Apply Linear Multistep Method
-    A, b1, b2, Y, ytuple = diff_method_backandfor(y_list, maxorder, stepsize, stepM)   # compute forward and backward version of BDF
-    num_pt = Y.shape[0]
+    A, b1, b2, Y, ytuple = learner.derivatives()   # compute forward and backward version of BDF
     # print("Initial computation done!")
 
     # ********* Debugging ***********************
@@ -91,9 +73,9 @@ def infer_model(list_of_trajectories, learning_parameters):
     # res, drop, clfs = segment_and_fit(A, b1, b2, ytuple,ep) #Amit: uses the simple relative-difference between forward and backward BDF presented in the paper, Algorithm-1.
     # res, drop, clfs, res_modified = segment_and_fit_Modified_two(A, b1, b2, ytuple,ep)
     # res, drop, clfs, res_modified = two_fold_segmentation_new(A, b1, b2, ytuple, size_of_input_variables, methods, ep)
-    segmented_traj, clfs, drop = two_fold_segmentation(A, b1, b2, ytuple, Y, size_of_input_variables, methods, stepM, ep, ep_backward)
-    print("Number of segments =", len(segmented_traj))
-    L_y = len(y_list[0][0])  # Number of dimensions
+    segmented_traj, clfs, drop = learner.segmentation()
+    logger.info("Number of segments = %d", len(segmented_traj))
+    del A, b1, b2   # the learner releases the buffers no longer needed when the memory budget is enabled
 
     # analyse_variable_index = 2  # zero-based indexing. 0 for refrigeration-cycle. and 2 for engine-timing-system. 3 for AFC
     # analyse_output(segmented_traj, b1, b2, Y, t_list, L_y, size_of_input_variables, stepM, analyse_variable_index)
@@ -104,14 +86,12 @@ def infer_model(list_of_trajectories, learning_parameters):
     # print("position = ", position)
 
     # print("Y = ", Y)
-    print("len of drop = ", len(drop))
+    logger.info("len of drop = %d", len(drop))
     # print("segmented_traj = ", segmented_traj)
     # print("clfs size = ", len(clfs))
 
     # Instead of deleting the last segment for all models. It is better to ask user's options for deleting
-    filter_last_segment = learning_parameters['filter_last_segment']  # 1 for delete last segment and 0 NOT to delete
-    # print("filter_last_segment", filter_last_segment)
-    segmentedTrajectories, segmented_traj, clfs = segmented_trajectories(clfs, segmented_traj, position, methods, filter_last_segment) # deleted the last segment in each trajectory
+    segmentedTrajectories, segmented_traj, clfs = learner.segmented_trajectories() # deleted the last segment in each trajectory
     # print("Segmentation done!")
     # print("segmentedTrajectories = ", segmentedTrajectories)
     # plot_data_values(segmentedTrajectories, Y, L_y)
@@ -123,18 +103,15 @@ def infer_model(list_of_trajectories, learning_parameters):
 
     # plot_segmentation_new(segmented_traj, L_y, t_list, Y, stepM) # Trying to verify the segmentation for each segmented points
 
-    number_of_segments_before_cluster = len(segmented_traj)
-    P_modes, G = select_clustering(segmented_traj, A, b1, clfs, Y, t_list, L_y, learning_parameters, stepM) # when len(res) < 2 compute P and G for the single mode
+    P_modes, G = learner.clustering() # when len(res) < 2 compute P and G for the single mode
     # print("Fixing Dropped points ...") # I dont need to fix
     # P, Drop = dropclass(P, G, drop, A, b1, Y, ep, stepsize)  # appends the dropped point to a cluster that fits well
     # print("Total dropped points (after fixing) are: ", len(Drop))
-    number_of_segments_after_cluster = len(P_modes)
     # print("P_modes = ", P_modes)
 
     # *************** Trying to plot points ***********************************
     # plotdebug.plot_dropped_points(t_list, L_y, Y, Drop)
     # plot_after_clustering(t_list, L_y, P_modes, Y, stepM)
-    mode_inv = compute_mode_invariant(L_y, P_modes, Y, isInvariant)
     # *************** Trying to plot the clustered points ***********************************
     # print("Number of num_mode= ", num_mode)
     # print("Number of Clusters, len(P)=", len(P))
@@ -148,10 +125,5 @@ def infer_model(list_of_trajectories, learning_parameters):
     '''
     # num_mode = len(P)
 
-    transitions = compute_transitions(P_modes, position, segmentedTrajectories, L_y, boundary_order, Y,
-                                      variableType_datastruct, number_of_segments_before_cluster,
-                                      number_of_segments_after_cluster)
-
-    return P_modes, G, mode_inv, transitions, position
-
-
+    # the invariants and the transitions are computed concurrently with --jobs, see Learner.infer_model()
+    return learner.infer_model()
@@ -0,0 +1,60 @@
+"""
+This module computes the statistics of the data points of each mode (cluster) in a single vectorized pass.
+
+The positions of all the modes are concatenated into a single index array, so that the points are gathered from Y once
+and the per-mode reductions (count, min, max and mean) are computed over the contiguous mode ranges with the numpy ufunc
+reduceat, without visiting the individual points in Python. The scatter matrix of each mode is a single matrix product
+over its range, so that no temporary array larger than the points is created. The statistics are used for computing the
+mode-invariants and for debugging the clustering (see helpers/plotDebug.py).
+"""
+
+import numpy as np
+
+
+def compute_mode_statistics(P_modes, Y):
+    """
+    :param P_modes: holds a list of modes. Each mode is a list of structures; we call it a segment.
+          Thus, P = [mode-1, mode-2, ... , mode-n] where mode-1 = [ segment-1, ... , segment-n] and segments are
+          of type ([start_ode, end_ode], [start_exact, end_exact], [p1, ..., p_n]).
+    :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :return: A dictionary of numpy.ndarray, where n is the number of modes and L_y the dimension of Y, with keys
+        'count': shape (n, ), the number of points in each mode,
+        'min' and 'max': shape (n, L_y), the bounds of each variable in each mode,
+        'mean': shape (n, L_y), the mean value of each variable in each mode,
+        'covariance': shape (n, L_y, L_y), the sample covariance matrix of the variables in each mode.
+        As in create_simple_modes_positions(), all the positions [p1, ..., p_n] of the segments are considered. The
+        statistics of a mode without any point are NaN, and its covariance is NaN when it has a single point.
+
+    """
+    L_y = Y.shape[1]
+    mode_positions = [np.concatenate([np.asarray(segs[2], dtype=int) for segs in mode]) if len(mode) > 0
+                      else np.zeros(0, dtype=int) for mode in P_modes]
+    count = np.array([len(positions) for positions in mode_positions], dtype=int)
+    total_modes = len(P_modes)
+
+    statistics = {'count': count,
+                  'min': np.full((total_modes, L_y), np.nan),
+                  'max': np.full((total_modes, L_y), np.nan),
+                  'mean': np.full((total_modes, L_y), np.nan),
+                  'covariance': np.full((total_modes, L_y, L_y), np.nan)}
+    non_empty = np.flatnonzero(count > 0)
+    if len(non_empty) == 0:
+        return statistics
+
+    # reduceat requires non-empty ranges, hence the empty modes are excluded from the reductions
+    points = Y[np.concatenate([mode_positions[imode] for imode in non_empty])]
+    starts = np.concatenate(([0], np.cumsum(count[non_empty])[:-1]))
+    mode_count = count[non_empty]
+
+    statistics['min'][non_empty] = np.minimum.reduceat(points, starts, axis=0)
+    statistics['max'][non_empty] = np.maximum.reduceat(points, starts, axis=0)
+    mean = np.add.reduceat(points, starts, axis=0) / mode_count[:, np.newaxis]
+    statistics['mean'][non_empty] = mean
+
+    centred = points - np.repeat(mean, mode_count, axis=0)
+    scatter = np.array([centred[start:start + n].T @ centred[start:start + n] for start, n in zip(starts, mode_count)])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        statistics['covariance'][non_empty] = scatter / (mode_count - 1)[:, np.newaxis, np.newaxis]
+    statistics['covariance'][count == 1] = np.nan
+
+    return statistics
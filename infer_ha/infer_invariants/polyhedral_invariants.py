@@ -0,0 +1,163 @@
+"""
+This module computes polyhedral mode-invariants, tighter than the (Min, Max) bounds of each variable.
+
+Two domains are supported:
+    (1) octagon: the constraints +/-x_i +/-x_j <= c for every pair of variables i < j, and
+    (2) convex hull: the facets of the convex hull of the points of the mode computed using scipy's qhull.
+Both are computed incrementally per segment and merged per mode. An octagon is described by the maximum of the points
+along fixed directions (support values), which is merged by taking the maximum over the segments. For the convex hull,
+only the vertices of the hull of each segment are kept and the hull of the mode is the hull of the union of these
+vertices. Before calling qhull on a segment, the points inside the polytope formed by the extreme points along the
+octagon directions are filtered out (Akl-Toussaint heuristic), so that qhull runs on a small set of candidate points.
+The number of facets of a hull grows exponentially with its dimension, hence the convex hull is only computed for the
+modes with at most MAXIMUM_HULL_DIMENSION varying variables; the other modes get the octagon invariant.
+
+A linear constraint is represented as [coefficients, bound] meaning coefficients[0] * x0 + ... + coefficients[n] * xn
+<= bound, where n is the dimension of the system.
+"""
+
+import logging
+
+import numpy as np
+
+FILTER_TOLERANCE = 1e-9  # points closer than this to the boundary of the filtering polytope are kept
+MAXIMUM_HULL_DIMENSION = 6  # maximum number of varying variables of a mode for the convex hull invariant
+
+logger = logging.getLogger(__name__)
+
+
+def octagon_directions(L_y):
+    """
+    :param L_y: is the dimension (input + output variables) of the system.
+    :return: numpy.ndarray of shape (2 * L_y * (L_y - 1), L_y). The rows are the directions x_i + x_j, -x_i - x_j,
+        x_i - x_j and -x_i + x_j of the octagon constraints for all the pairs of variables i < j.
+    """
+    directions = []
+    for i in range(L_y):
+        for j in range(i + 1, L_y):
+            for sign_i, sign_j in [(1, 1), (-1, -1), (1, -1), (-1, 1)]:
+                direction = np.zeros(L_y)
+                direction[i] = sign_i
+                direction[j] = sign_j
+                directions.append(direction)
+    return np.array(directions).reshape(-1, L_y)
+
+
+def filter_extreme_points(points, directions):
+    """
+    Discards the points lying strictly inside the convex hull of the extreme points along the given directions. The
+    discarded points can not be a vertex of the convex hull of points.
+
+    :param points: numpy.ndarray of shape (rows, dim).
+    :param directions: numpy.ndarray of shape (k, dim).
+    :return: numpy.ndarray of the remaining points. All the points are returned if the extreme points do not form a
+        full-dimensional polytope.
+    """
+    from scipy.spatial import ConvexHull
+    extreme = np.unique(np.argmax(points.dot(directions.T), axis=0))
+    if len(extreme) <= points.shape[1]:
+        return points
+    try:
+        polytope = ConvexHull(points[extreme])
+    except RuntimeError:    # QhullError: the extreme points are degenerate (e.g., lie on a line)
+        return points
+    inside = np.all(points.dot(polytope.equations[:, :-1].T) + polytope.equations[:, -1] < -FILTER_TOLERANCE, axis=1)
+    return points[~inside]
+
+
+def compute_octagon_constraints(L_y, mode, Y):
+    """
+    :param L_y: is the dimension (input + output variables) of the system.
+    :param mode: a list of segments of type ([start_ode, end_ode], [start_exact, end_exact], [p1, ..., p_n]).
+    :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :return: the list of the octagon constraints [coefficients, bound] of the mode.
+    """
+    directions = octagon_directions(L_y)
+    if len(directions) == 0:
+        return []
+    bounds = np.full(len(directions), -np.inf)
+    for segs in mode:   # support values of each segment, merged by taking the maximum
+        points = Y[np.asarray(segs[2], dtype=int), :L_y]
+        bounds = np.maximum(bounds, np.max(points.dot(directions.T), axis=0))
+
+    return [[direction, bound] for direction, bound in zip(directions.tolist(), bounds.tolist())]
+
+
+def compute_convex_hull_constraints(L_y, mode, Y, lower_bounds, upper_bounds):
+    """
+    :param L_y: is the dimension (input + output variables) of the system.
+    :param mode: a list of segments of type ([start_ode, end_ode], [start_exact, end_exact], [p1, ..., p_n]).
+    :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :param lower_bounds: the minimum of each variable in the mode.
+    :param upper_bounds: the maximum of each variable in the mode.
+    :return: the list of the facets [coefficients, bound] of the convex hull of the mode, or None if the hull can not be
+        computed (the points lie on a lower dimensional subspace). The hull is computed on the variables that are not
+        constant in the mode, the constant variables are already constrained by the bounds of the variables.
+    """
+    from scipy.spatial import ConvexHull
+    varying = np.flatnonzero(np.asarray(upper_bounds) > np.asarray(lower_bounds))
+    if len(varying) < 2:    # a single varying variable is fully described by its bounds
+        return []
+    directions = np.vstack([np.eye(len(varying)), -np.eye(len(varying)), octagon_directions(len(varying))])
+
+    candidates = []
+    for segs in mode:   # only the vertices of the hull of each segment can be the vertices of the hull of the mode
+        points = filter_extreme_points(Y[np.asarray(segs[2], dtype=int)][:, varying], directions)
+        if len(points) > len(varying) + 1:
+            try:
+                points = points[ConvexHull(points).vertices]
+            except RuntimeError:    # QhullError: the segment is degenerate, keep all its points
+                pass
+        candidates.append(points)
+    candidates = np.concatenate(candidates)
+
+    try:
+        hull = ConvexHull(candidates)
+    except RuntimeError:    # QhullError
+        return None
+    # qhull triangulates the facets, hence coplanar facets give the same constraint
+    normals = np.unique(np.round(hull.equations[:, :-1], 12), axis=0)
+    bounds = np.max(candidates.dot(normals.T), axis=0)  # tight for all the points of the mode
+
+    constraints = []
+    for normal, bound in zip(normals, bounds.tolist()):
+        coefficients = np.zeros(L_y)
+        coefficients[varying] = normal
+        constraints.append([coefficients.tolist(), bound])
+    return constraints
+
+
+def compute_polyhedral_invariant(L_y, P_modes, Y, invariant_enabled, mode_invariant):
+    """
+    This function adds the polyhedral constraints to the (Min, Max) bounds of each variable in each mode.
+
+    :param L_y: is the dimension (input + output variables) of the system whose trajectory is being parsed.
+    :param P_modes: holds a list of modes. Each mode is a list of structures; we call it a segment.
+          Thus, P = [mode-1, mode-2, ... , mode-n] where mode-1 = [ segment-1, ... , segment-n] and segments are
+          of type ([start_ode, end_ode], [start_exact, end_exact], [p1, ..., p_n]).
+    :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :param invariant_enabled: 3 for the octagon and 4 for the convex hull domain.
+    :param mode_invariant: A list of values of type [mode-id, invariant-constraints] as returned by compute_invariant().
+    :return: A list of values of type [mode-id, invariant-constraints, linear-constraints]. mode-id is the location ID,
+        invariants-constraints is the list of (min,max) bounds of each variable and linear-constraints is the list of
+        constraints [coefficients, bound] of the polyhedral domain.
+
+    """
+    mode_inv = []
+    for imode in range(0, len(P_modes)):
+        bounds = mode_invariant[imode][1]
+        constraints = None
+        varying = sum(1 for bound in bounds if bound[1] > bound[0])
+        if invariant_enabled == 4 and varying > MAXIMUM_HULL_DIMENSION:
+            logger.warning("Mode %d has %d varying variables, more than %d for the convex hull, using the octagon "
+                           "invariant instead", imode, varying, MAXIMUM_HULL_DIMENSION)
+        elif invariant_enabled == 4:
+            constraints = compute_convex_hull_constraints(L_y, P_modes[imode], Y, [bound[0] for bound in bounds],
+                                                          [bound[1] for bound in bounds])
+            if constraints is None:
+                logger.warning("Convex hull of mode %d is degenerate, using the octagon invariant instead", imode)
+        if constraints is None:
+            constraints = compute_octagon_constraints(L_y, P_modes[imode], Y)
+        mode_inv.append([imode, bounds, constraints])
+
+    return mode_inv
@@ -1,3 +1,8 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
 
 
 def apply_annotation(Y, variableType_datastruct, list_connection_pt, assignment_coeff, assignment_intercept):
@@ -31,6 +36,8 @@ def apply_annotation(Y, variableType_datastruct, list_connection_pt, assignment_
     """
 
     # print(variableType_datastruct)
+    assignment_coeff = np.asarray(assignment_coeff)
+    assignment_intercept = np.asarray(assignment_intercept)
 
     # if no annotation information is provided then below for-loop will not run
     for var_type_detail in variableType_datastruct:  # accessing each variable details
@@ -38,45 +45,49 @@ def apply_annotation(Y, variableType_datastruct, list_connection_pt, assignment_
         var_type = var_type_detail[2]
         # print("Annotation Section: var_index=", var_index, "   var_type=", var_type)
         if var_type == "t1":
-            for coeff_index in range(len(assignment_coeff[var_index])):
-                # print(" yes inside t1, var_index=", var_index, "   coeff_index=", coeff_index)
-                if var_index == coeff_index:
-                    assignment_coeff[var_index][coeff_index] = 1
-                else:
-                    assignment_coeff[var_index][coeff_index] = 0
+            assignment_coeff[var_index, :] = 0
+            assignment_coeff[var_index, var_index] = 1
             assignment_intercept[var_index] = 0
 
         elif var_type == "t2":
             # Take the connecting points and do frequency count of the value
             pool_values = var_type_detail[3]
-            frequency_count = [0] * len(pool_values)  # List of zero values of size=number of pool values
-            for connection_pt in list_connection_pt:
-                dest_loc_position = connection_pt[2]  # Now the start-point of the destination is index [2]
-                pv = Y[dest_loc_position, var_index]
-                # print("pv=",pv)
-                for pool_val_index in range(0, len(pool_values)):
-                    if pv == pool_values[pool_val_index]:
-                        frequency_count[pool_val_index] += 1
-                        break
-            # Now check the highest frequency_count value
-            max_count_value = max(frequency_count)
-            max_count_index = frequency_count.index(max_count_value)
+            frequency_count = pool_frequency_count(Y, var_index, list_connection_pt, pool_values)
+            # Now take the highest frequency_count value (the first one when equal)
+            max_count_index = int(np.argmax(frequency_count))
             # print("Majority poll value = ", pool_values[max_count_index])
-            for coeff_index in range(0, len(assignment_coeff[var_index])):
-                assignment_coeff[var_index][coeff_index] = 0
+            assignment_coeff[var_index, :] = 0
             assignment_intercept[var_index] = pool_values[max_count_index]
 
         elif var_type == "t3":
             constant_value = var_type_detail[4]
-            for coeff_index in range(len(assignment_coeff[var_index])):
-                # print(" yes inside t3, var_index=", var_index, "   coeff_index=", coeff_index)
-                assignment_coeff[var_index][coeff_index] = 0
+            assignment_coeff[var_index, :] = 0
             assignment_intercept[var_index] = constant_value
 
         elif var_type == "t4":
-            print("Suggest to consider type t4 as t2 if values are known. Otherwise linear regression is performed")
+            logger.info("Suggest to consider type t4 as t2 if values are known. Otherwise linear regression is performed")
 
         elif var_type == "t5":
-            print("we have to use Linear Regression for type t5 variables")
+            logger.info("we have to use Linear Regression for type t5 variables")
 
     return assignment_coeff, assignment_intercept
+
+
+def pool_frequency_count(Y, var_index, list_connection_pt, pool_values):
+    """
+    Counts the number of connecting points whose value of the variable at the start-point of the destination is equal
+    to each of the pool values.
+
+    :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :param var_index: index of the variable of type 't2'.
+    :param list_connection_pt: is the connection triplet having (pre-end, end, start) point/position for a connection.
+    :param pool_values: the list of the pool values of the variable, supplied by the user.
+    :return: numpy.ndarray holding the frequency count of each pool value.
+
+    """
+    dest_loc_positions = [connection_pt[2] for connection_pt in list_connection_pt]  # start-point of the destination
+    values, counts = np.unique(Y[dest_loc_positions, var_index], return_counts=True)
+    pool_values = np.asarray(pool_values, dtype=float)
+    found = np.minimum(np.searchsorted(values, pool_values), len(values) - 1)
+
+    return np.where(values[found] == pool_values, counts[found], 0)
@@ -1,4 +1,5 @@
-from sklearn import linear_model
+
+import numpy as np
 
 
 def compute_assignments(list_connection_pt, L_y, Y):
@@ -11,28 +12,65 @@ def compute_assignments(list_connection_pt, L_y, Y):
     :return: the coefficients and intercept values of the assignment equations.
 
     """
-    x_pts = []
-    y_pts = []
-    for connection_pt in list_connection_pt:
-        # for id0 in connection_pt:  # Note: connection_pt now contains [pre_end, end, and start positions]
-        # SOURCE-POINT: end-pt-position
-        id0 = connection_pt[1]  # now index is [1] for end-posi
-        x_pts.append([Y[id0, dim] for dim in range(L_y)])
-
-        # DESTINATION-POINT: start-pt-position
-        id0 = connection_pt[2]  # Now index is [2] for start_posi
-        y_pts.append([Y[id0, dim] for dim in range(L_y)])
-
-    # print("x_pts =", x_pts)
-    # print()
-    # print("y_pts =", y_pts)
-
-    # lin_reg = linear_model.LinearRegression(fit_intercept=False)  # without intercepts
-    lin_reg = linear_model.LinearRegression()  # with intercepts
-    lin_reg = lin_reg.fit(x_pts, y_pts)
-    # print("Linear Regression Score = ", lin_reg.score(x_pts, y_pts))
-    assign_coeff = lin_reg.coef_
-    assign_intercept = lin_reg.intercept_
-    # print("Now reg.intercept_")
-    # print(lin_reg.intercept_)
-    return assign_coeff, assign_intercept
+    assign_coeffs, assign_intercepts = compute_all_assignments([list_connection_pt], L_y, Y)
+
+    return assign_coeffs[0], assign_intercepts[0]
+
+
+def compute_all_assignments(list_of_connection_pts, L_y, Y):
+    """
+    Computes the assignment equations of all the transitions at once. For each transition, the values at the
+    start-points (destination) are obtained by linear regression (with intercepts) of the values at the end-points
+    (source). The result is the same as fitting sklearn's linear_model.LinearRegression() for each transition, i.e., the
+    minimum norm least squares solution of the centered data.
+
+    :param list_of_connection_pts: list of the list_connection_pt of each transition. Each list_connection_pt is the list of
+        connection triplets having (pre-end, end, start) point/position for a connection.
+    :param L_y: is the dimension (input + output variables) of the system whose trajectory is being parsed.
+    :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :return: the lists of the coefficients, numpy.ndarray of shape (L_y, L_y), and of the intercepts, numpy.ndarray of
+        shape (L_y, ), of the assignment equations of each transition.
+
+    """
+    total_transitions = len(list_of_connection_pts)
+    if total_transitions == 0:
+        return [], []
+
+    counts = np.array([len(list_connection_pt) for list_connection_pt in list_of_connection_pts])
+    offsets = np.r_[0, np.cumsum(counts)[:-1]]
+    connections = np.array([connection_pt for list_connection_pt in list_of_connection_pts
+                            for connection_pt in list_connection_pt], dtype=int).reshape(-1, 3)
+    # the regression is computed in double precision, also when Y is in single precision (see the option --precision)
+    x_pts = np.asarray(Y[connections[:, 1], :L_y], dtype=np.double)  # SOURCE-POINT: end-pt-position is index [1]
+    y_pts = np.asarray(Y[connections[:, 2], :L_y], dtype=np.double)  # DESTINATION-POINT: start-pt-position is index [2]
+
+    # Centering the data of each transition, as done by LinearRegression for computing the intercepts
+    transition_of_row = np.repeat(np.arange(total_transitions), counts)
+    x_mean = np.add.reduceat(x_pts, offsets, axis=0) / counts[:, np.newaxis]
+    y_mean = np.add.reduceat(y_pts, offsets, axis=0) / counts[:, np.newaxis]
+    x_centered = x_pts - x_mean[transition_of_row]
+    y_centered = y_pts - y_mean[transition_of_row]
+
+    # Transitions of similar size (within a power of 2) are solved together as a stack of zero-padded problems.
+    # Zero rows do not change the least squares solution pinv(X) y, and padding at most doubles the data.
+    row_in_transition = np.arange(len(connections)) - offsets[transition_of_row]
+    size_class = np.ceil(np.log2(counts)).astype(int)
+    assign_coeffs = [None] * total_transitions
+    assign_intercepts = [None] * total_transitions
+    for size in np.unique(size_class):
+        transitions = np.flatnonzero(size_class == size)
+        stack_index = np.full(total_transitions, -1)
+        stack_index[transitions] = np.arange(len(transitions))
+        rows = np.flatnonzero(stack_index[transition_of_row] >= 0)
+
+        x_stack = np.zeros((len(transitions), counts[transitions].max(), L_y))
+        y_stack = np.zeros((len(transitions), counts[transitions].max(), L_y))
+        x_stack[stack_index[transition_of_row[rows]], row_in_transition[rows]] = x_centered[rows]
+        y_stack[stack_index[transition_of_row[rows]], row_in_transition[rows]] = y_centered[rows]
+
+        coef_stack = np.linalg.pinv(x_stack) @ y_stack  # (transitions, L_y, L_y): x . coef = y
+        for k, trans in enumerate(transitions):
+            assign_coeffs[trans] = coef_stack[k].T    # same layout as LinearRegression.coef_ (targets, features)
+            assign_intercepts[trans] = y_mean[trans] - x_mean[trans].dot(coef_stack[k])
+
+    return assign_coeffs, assign_intercepts
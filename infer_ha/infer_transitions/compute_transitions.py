@@ -4,12 +4,18 @@ This module is used for computing transitions of an HA.
 """
 from infer_ha.infer_transitions.apply_annotation import apply_annotation
 from infer_ha.infer_transitions.connecting_points import create_connecting_points
-from infer_ha.infer_transitions.compute_assignments import compute_assignments
+from infer_ha.infer_transitions.compute_assignments import compute_all_assignments
 from infer_ha.infer_transitions.guards import getGuard_inequality
+from infer_ha.distributed import active_coordinator, distributed_guards
+from infer_ha.scheduler import TaskGraph, TaskOutput
+from utils.stage_cache import OPTIONAL_PARAMETERS
+from utils.trace import trace_stage, count
 
 
 def compute_transitions(P_modes, position, segmentedTrajectories, L_y, boundary_order, Y, variableType_datastruct,
-                        number_of_segments_before_cluster, number_of_segments_after_cluster):
+                        number_of_segments_before_cluster, number_of_segments_after_cluster,
+                        guard_backend=OPTIONAL_PARAMETERS['guard_backend'],
+                        guard_max_points=OPTIONAL_PARAMETERS['guard_max_points'], jobs=1):
     """
     This function decides to compute or ignore mode-invariant computation based on the user's choice.
 
@@ -29,6 +35,11 @@ def compute_transitions(P_modes, position, segmentedTrajectories, L_y, boundary_
     :param number_of_segments_before_cluster: total number of segments obtained using the segmentation process and
         before applying the clustering algorithm.
     :param number_of_segments_after_cluster: total number of segments obtained after applying the clustering algorithm.
+    :param guard_backend: the SVM used to learn the guards. See the function select_guard_backend() in guards.py.
+    :param guard_max_points: maximum number of connecting points of each class used for training the SVM of a guard.
+        The value 0 disables the reduction. See the module guard_coreset.py.
+    :param jobs: the maximum number of threads learning the guards and the assignments concurrently (see
+        infer_ha/scheduler.py).
     :return: A list of transitions of type [src_mode, dest_mode, guard_coeff, assignment_coeff, assignment_intercept].
         Where src_mode, and dest_mode store the source and destination location ID. The guard_coeff structure holds the
         coefficients of the guard polynomial. Whereas assignment_coeff and assignment_intercept contain the
@@ -57,6 +68,13 @@ def compute_transitions(P_modes, position, segmentedTrajectories, L_y, boundary_
             return transitions  # transitions here is empty for a single mode system without transition.
 
 
+    # The assignments of all the transitions are computed at once (see compute_all_assignments), the guards are learned
+    # independently of them and of each other
+    graph = TaskGraph()
+    graph.add_task('assignments', all_assignments, data_points, L_y, Y)
+    coordinator = active_coordinator()  # with a coordinator, the guards are learned by the workers (see distributed.py)
+    remote_guards = []  # (srcData, destData) of each transition
+
     # transitions = []
     # data_points contains list of connecting points for each Transition
     # Note we are considering possible transition only based on the given trajectory-data.
@@ -79,24 +97,71 @@ def compute_transitions(P_modes, position, segmentedTrajectories, L_y, boundary_
             # srcData.append(connect_pt[1])  # index [1] is the end_pt_position
             # destData.append(connect_pt[2])  # index [2] is the start_pt_position
 
-        guard_coeff = getGuard_inequality(srcData, destData, L_y, boundary_order, Y)
-
+        if coordinator is None:
+            graph.add_task('guard ' + str(imode), transition_guard, src_mode, dest_mode, srcData, destData, L_y,
+                           boundary_order, Y, guard_backend, guard_max_points)
+        else:
+            remote_guards.append((srcData, destData))
+        graph.add_task('assignment ' + str(imode), transition_assignment, src_mode, dest_mode, Y, variableType_datastruct,
+                       list_connection_pt, imode, TaskOutput('assignments'))
+
+    if coordinator is not None:
+        graph.add_task('guards', remote_guards_of_transitions, coordinator, remote_guards, L_y, boundary_order, Y,
+                       guard_backend, guard_max_points)
+    outputs = graph.run(jobs)
+    for imode in range(0, len(data_points)):
+        src_mode = data_points[imode][0]  # src mode
+        dest_mode = data_points[imode][1]  # dest mode
+        guard_coeff = outputs['guard ' + str(imode)] if coordinator is None else outputs['guards'][imode]
         # print("Check guard=", guard_coeff)
+        assignment_coeff, assignment_intercept = outputs['assignment ' + str(imode)]
+        transitions.append([src_mode, dest_mode, guard_coeff, assignment_coeff, assignment_intercept])
+        # print("All Transitions are: ",transitions)
 
-        '''
-        We will not check any complex condition. We simply apply linear regression to first learn the assignments.
-        Then, we check the condition for annotations and whenever annotation information is available we replace
-         the computed (learned using linear regression) values using our approach of annotations.
-        '''
+    count('transitions', len(transitions))
+    return transitions
 
-        # print("list_connection_pt = ", list_connection_pt)
-        assign_coeff, assign_intercept = compute_assignments(list_connection_pt, L_y, Y)
-        assignment_coeff = assign_coeff
-        assignment_intercept = assign_intercept
 
-        assignment_coeff, assignment_intercept = apply_annotation(Y, variableType_datastruct, list_connection_pt, assignment_coeff, assignment_intercept)
+def all_assignments(data_points, L_y, Y):
+    """
+    :return: the coefficients and the intercepts of the assignments of all the transitions, see compute_all_assignments().
+    """
+    with trace_stage('assignments', transitions=len(data_points)):
+        assign_coeffs, assign_intercepts = compute_all_assignments([trans[2] for trans in data_points], L_y, Y)
+        count('regressions', len(data_points))
+    return assign_coeffs, assign_intercepts
 
-        transitions.append([src_mode, dest_mode, guard_coeff, assignment_coeff, assignment_intercept])
-        # print("All Transitions are: ",transitions)
 
-    return transitions
\ No newline at end of file
+def transition_guard(src_mode, dest_mode, srcData, destData, L_y, boundary_order, Y, guard_backend, guard_max_points):
+    """
+    :return: the coefficients of the guard of the transition from src_mode to dest_mode, see getGuard_inequality().
+    """
+    with trace_stage('guard', source=int(src_mode), destination=int(dest_mode), connecting_points=len(srcData)):
+        return getGuard_inequality(srcData, destData, L_y, boundary_order, Y, guard_backend, guard_max_points)
+
+
+def remote_guards_of_transitions(coordinator, remote_guards, L_y, boundary_order, Y, guard_backend, guard_max_points):
+    """
+    :return: the coefficients of the guards of all the transitions, learned by the workers of the coordinator.
+    """
+    with trace_stage('guards', transitions=len(remote_guards)):
+        return distributed_guards(coordinator, remote_guards, L_y, boundary_order, Y, guard_backend, guard_max_points)
+
+
+def transition_assignment(src_mode, dest_mode, Y, variableType_datastruct, list_connection_pt, imode, assignments):
+    """
+    :param imode: the position of the transition in the list of the connecting points.
+    :param assignments: the pair (coefficients, intercepts) of the assignments of all the transitions, as returned by
+        all_assignments().
+    :return: the pair (assignment_coeff, assignment_intercept) of the transition, updated by the type annotations.
+    """
+    '''
+    We will not check any complex condition. We simply apply linear regression to first learn the assignments.
+    Then, we check the condition for annotations and whenever annotation information is available we replace
+     the computed (learned using linear regression) values using our approach of annotations.
+    '''
+    assign_coeffs, assign_intercepts = assignments
+    assignment_coeff = assign_coeffs[imode]
+    assignment_intercept = assign_intercepts[imode]
+    with trace_stage('assignment', source=int(src_mode), destination=int(dest_mode)):
+        return apply_annotation(Y, variableType_datastruct, list_connection_pt, assignment_coeff, assignment_intercept)
\ No newline at end of file
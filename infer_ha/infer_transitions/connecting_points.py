@@ -1,7 +1,7 @@
 """
 Connecting points for inferring transitions
 """
-from infer_ha.clustering.utils import create_simple_modes_positions
+import numpy as np
 
 
 def create_connecting_points(P_modes, position, segmentedTrajectories):
@@ -29,58 +29,70 @@ def create_connecting_points(P_modes, position, segmentedTrajectories):
 
     """
 
-    P = create_simple_modes_positions(P_modes)
-
-    cluster_len = len(P)
-    traj_size = len(position)
-    # print("len(position)/traj_size = ", traj_size)
-    # Below computes connecting points when the number of clusters > 1. But not for single mode system
-    data_points = []  # Structure containing [src, dest, list of connecting-points]
-    for i in range(0, cluster_len):
-        for j in range(i, cluster_len):  # modified j in range(i, cluster_len) from i+1
-            # Code for Forward-Transitions
-            data_points_per_trans = []
-            for t in range(0, traj_size):  # Loop for all trajectories
-                segment_size = len(segmentedTrajectories[t])  # total number of segments in each trajectory
-                for g in range(0, segment_size - 1):
-                    # last start-point is compared with previous end-point
-                    # Now we have pre_end_posi therefore, end_post is index [2] end_posi=segmentedTrajectories[t][g][1]
-                    # [1] is the end-pt of the trajectory t and segment g
-                    end_posi = segmentedTrajectories[t][g][2]  # [2] is the end-pt of the trajectory t and segment g
-                    pre_end_posi = segmentedTrajectories[t][g][1]  # [1] is the pre-end-pt of the trajectory t and segment g
-                    if end_posi in P[i]:  # TRUE
-                        start_posi = segmentedTrajectories[t][g + 1][
-                            0]  # [0] is the start-pt of the trajectory t and segment g+1
-                        if start_posi in P[j]:  # if this also returns TRUE
-                            # print ("Store. (end,start)=(", end_posi,",",start_posi,") in transition(i,j)=(", i, ",",j,") \n")
-                            # data_points.append([i, j, [end_posi, start_posi]])
-                            # Now we apppend 3 points, data_points_per_trans.append([end_posi, start_posi])
-                            data_points_per_trans.append([pre_end_posi, end_posi, start_posi])
-            if len(data_points_per_trans) > 0:
-                data_points.append([i, j, data_points_per_trans])
-                # print("[src, dest, total-points] = [", i, " , ", j, " , ", len(data_points_per_trans), "]")
-
-            # Code for Backward-Transitions
-            if i != j:  # loop is to be done only one
-                data_points_per_trans = []
-                for t in range(0, traj_size):  # Loop for all trajectories
-                    segment_size = len(segmentedTrajectories[t])  # Length of each segmented trajectory
-                    for g in range(0, segment_size - 1):  # last start-point is compared with previous end-point
-                        # Now index of end_posi shifted to [2]: end_posi = segmentedTrajectories[t][g][1]  # [1] is the end-pt of the trajectory t and segment g
-                        end_posi = segmentedTrajectories[t][g][2]  # [2] is the end-pt of the trajectory t and segment g
-                        pre_end_posi = segmentedTrajectories[t][g][1]  # [1] is the pre-end-pt of the trajectory t and segment g
-                        if end_posi in P[j]:  # TRUE
-                            start_posi = segmentedTrajectories[t][g + 1][
-                                0]  # [1] is the end-pt of the trajectory t and segment g
-                            if start_posi in P[i]:  # if this also returns TRUE
-                                # print("Store. (end,start)=(", end_posi, ",", start_posi,") in transition(j,i)=(", j, ",", i, ") \n")
-                                # data_points.append([j, i, [end_posi, start_posi]])
-                                # now we have 3points: data_points_per_trans.append([end_posi, start_posi])
-                                data_points_per_trans.append([pre_end_posi, end_posi, start_posi])
-                if len(data_points_per_trans) > 0:
-                    data_points.append([j, i, data_points_per_trans])
-                    # print("[src, dest, total-points] = [", j, " , ", i, " , ", len(data_points_per_trans), "]")
-    # print("\nLength of data points = ", len(data_points))
+    mode_positions, mode_ids = create_position_mode_lookup(P_modes)
+
+    # A single pass over the consecutive segments of each trajectory: the connection between the segments g and g + 1
+    # goes from the mode(s) containing the end-point of g to the mode(s) containing the start-point of g + 1.
+    connections = []  # triplets [pre_end_posi, end_posi, start_posi] in the order of trajectories and segments
+    for t in range(0, len(position)):  # Loop for all trajectories
+        segments = segmentedTrajectories[t]
+        for g in range(0, len(segments) - 1):
+            # [1] is the pre-end-pt and [2] is the end-pt of the segment g and [0] is the start-pt of the segment g+1
+            connections.append([segments[g][1], segments[g][2], segments[g + 1][0]])
+    if len(connections) == 0:
+        return []
+
+    connections_array = np.array(connections)
+    end_first, end_last = find_modes_range(mode_positions, connections_array[:, 1])
+    start_first, start_last = find_modes_range(mode_positions, connections_array[:, 2])
+
+    data_points_per_trans = {}  # (src, dest) -> list of connecting-points
+    for k in range(0, len(connections)):
+        for src in mode_ids[end_first[k]:end_last[k]]:
+            for dest in mode_ids[start_first[k]:start_last[k]]:
+                data_points_per_trans.setdefault((src, dest), []).append(connections[k])
+
+    # Structure containing [src, dest, list of connecting-points]. Ordered as the transitions (i, j) followed by the
+    # backward transitions (j, i) for all i <= j
+    transition_order = sorted(data_points_per_trans, key=lambda trans: (min(trans), max(trans), trans[0] > trans[1]))
+    data_points = [[src, dest, data_points_per_trans[(src, dest)]] for (src, dest) in transition_order]
     # print("data points are ", data_points)
     return data_points
 
+
+def create_position_mode_lookup(P_modes):
+    """
+    Creates a lookup structure from the positions of the points to the modes containing them.
+
+    :param P_modes: holds a list of modes. Each mode is a list of structures; we call it a segment.
+          Thus, P = [mode-1, mode-2, ... , mode-n] where mode-1 = [ segment-1, ... , segment-n] and segments are
+          of type ([start_ode, end_ode], [start_exact, end_exact], [p1, ..., p_n]).
+    :return: the pair (mode_positions, mode_ids) of numpy.ndarray sorted by position. A position p belongs to the modes
+        mode_ids[k] for all k such that mode_positions[k] == p (each mode appears at most once for a position).
+
+    """
+    mode_positions = [np.empty(0, dtype=int)]    # the lookup is empty when there are no modes
+    mode_ids = [np.empty(0, dtype=int)]
+    for mode_id in range(0, len(P_modes)):
+        positions = np.unique(np.concatenate([np.empty(0, dtype=int)] +
+                                             [np.asarray(segs[2], dtype=int) for segs in P_modes[mode_id]]))
+        mode_positions.append(positions)
+        mode_ids.append(np.full(len(positions), mode_id))
+    mode_positions = np.concatenate(mode_positions)
+    mode_ids = np.concatenate(mode_ids)
+
+    order = np.lexsort((mode_ids, mode_positions))  # by position and then by mode
+    return mode_positions[order], mode_ids[order].tolist()
+
+
+def find_modes_range(mode_positions, positions):
+    """
+    :param mode_positions: sorted positions as returned by create_position_mode_lookup().
+    :param positions: numpy.ndarray of the positions to be searched.
+    :return: the pair (first, last) such that the modes of positions[k] are mode_ids[first[k]:last[k]].
+
+    """
+    first = np.searchsorted(mode_positions, positions, side='left')
+    last = np.searchsorted(mode_positions, positions, side='right')
+
+    return first, last
@@ -1,6 +1,6 @@
 import numpy as np
 import os
-from utils import misc_math_functions as myUtil
+from utils.polynomial_basis import multinomial_expansion, evaluate_monomials
 
 
 def create_data(output_filename, srcData, destData, L_y, Y):
@@ -71,32 +71,13 @@ def makeCompatibleCoefficient(p_coeff, boundary_degree):
     @return: newCoeff: the new computed coefficient to be used for inverse scaling, which will be compatible for inverse
                 scale operation.
     """
-    # newCoeff = []
     dim_p_coeff = len(p_coeff)
-    coeff_expansion = myUtil.multinomial(dim_p_coeff + 1, boundary_degree)  # this coeff_expansion include multinomial coefficients
-    # print("coeff_expansion is ", coeff_expansion)
-
-    newCoeff = [0] * int(len(coeff_expansion))
-    term_index = 0
-    for term in coeff_expansion:
-        prod = 1
-        for index in range(0, len(term)):
-            if index == 0:  # this is for coefficient
-                prod = term[index]
-            elif index <= len(p_coeff):   # for the rest of the values in term but upto index of p_coeff. <= because we do -1
-                if term[index] != 0:
-                    # print("term[index] =", term[index])
-                    # print("index-1 =", index-1)
-                    # print("p_coeff[index-1] =", p_coeff[index-1])
-                    prod = prod * pow(p_coeff[index-1], term[index])  # term[index] here is either 1 or 2. Length of p_coeff is one less
-                    # print("prod =", prod)
-        # print("prod =", prod)
-        newCoeff[term_index] = prod
-        term_index += 1
-    # print("newCoeff =", newCoeff)
-    l = len(newCoeff) - 1
-    newCoeff = newCoeff[:l] # discarding the last term which is 1 in the kernel expression (gamma.U.V + 1)^2
-    # print("newCoeff without last term =", newCoeff)
+    coefficients, exponents = multinomial_expansion(dim_p_coeff + 1, boundary_degree)  # includes multinomial coefficients
+
+    # coefficient * p_coeff^powers for every term at once. The last column of exponents is the power of the term 1
+    p_coeff = np.asarray(p_coeff, dtype=float)
+    newCoeff = coefficients * evaluate_monomials(p_coeff[np.newaxis, :], exponents[:, :dim_p_coeff])[0]
+    newCoeff = newCoeff[:-1].tolist()  # discarding the last term which is 1 in the kernel expression (gamma.U.V + 1)^2
     return newCoeff
 
 def inverse_scale(guard_coeff, scale_param, L_y, boundary_degree):
@@ -0,0 +1,65 @@
+"""
+This module reduces the connecting points used for learning a guard to a bounded subset (coreset).
+
+The training time of the SVM grows superlinearly with the number of data. For a transition having a large number of
+connecting points, we train the SVM on a subset of at most max_points points per class, selected as follows:
+    (1) near-identical points (identical after rounding the scaled data to DEDUPLICATION_RESOLUTION) are kept once,
+    (2) half of the subset are the points closest to the other class, i.e., near the guard, which decide the SVM,
+    (3) the other half is a random selection of the remaining points of the class, so that the whole class is covered.
+The selection is done separately for each class as in the stratified selection of the libsvm tool 'tools/subset.py'.
+"""
+
+import numpy as np
+
+DEDUPLICATION_RESOLUTION = 1e-4  # on the scaled data, i.e., within [0, 1]
+
+
+def select_guard_coreset(x, y, max_points, seed=0):
+    """
+    :param x: the scaled data as csr_matrix or numpy.ndarray.
+    :param y: numpy.ndarray containing the label +1 or -1 of each data.
+    :param max_points: maximum number of data of each class. The value 0 disables the reduction.
+    :param seed: seed of the random selection, so that the learned guards are reproducible.
+    :return: sorted numpy.ndarray of the positions (rows of x) of the selected data. All the data of a class having at
+        most max_points data are selected.
+
+    """
+    from scipy.spatial import cKDTree
+    total_data = x.shape[0]
+    y = np.asarray(y)
+    if max_points <= 0 or max(np.sum(y == 1), np.sum(y == -1)) <= max_points:
+        return np.arange(total_data)
+
+    points = x.toarray() if hasattr(x, "toarray") else np.asarray(x)
+    rng = np.random.RandomState(seed)
+    selected = []
+    for label in [1, -1]:
+        class_index = np.flatnonzero(y == label)
+        if len(class_index) > max_points:
+            class_index = deduplicate(points, class_index)
+        if len(class_index) > max_points:
+            other_class = cKDTree(points[y != label])
+            distance, _ = other_class.query(points[class_index])
+            order = np.argsort(distance, kind="stable")  # closest to the other class first
+            total_boundary = max_points // 2
+            boundary_index = class_index[order[:total_boundary]]
+            coverage_index = rng.choice(class_index[order[total_boundary:]], max_points - total_boundary,
+                                        replace=False)
+            class_index = np.concatenate([boundary_index, coverage_index])
+        selected.append(class_index)
+
+    return np.sort(np.concatenate(selected))
+
+
+def deduplicate(points, index):
+    """
+    :param points: numpy.ndarray of the scaled data.
+    :param index: positions of the data to be deduplicated.
+    :return: the positions in index, in the same order, excluding the data identical to an earlier data after rounding
+        to DEDUPLICATION_RESOLUTION.
+
+    """
+    keys = np.round(points[index] / DEDUPLICATION_RESOLUTION)
+    _, first_occurrence = np.unique(keys, axis=0, return_index=True)
+
+    return index[np.sort(first_occurrence)]
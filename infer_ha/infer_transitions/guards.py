@@ -1,24 +1,30 @@
 """
-This module computes guard equations using Support Vector Machine (SVM) with polynomial kernel.
+This module computes guard equations using Support Vector Machine (SVM) with polynomial kernel. For guards of low
+degree or having only a few monomials, the guard is learned using a linear SVM on the (explicit) monomials instead.
 
 """
-from sklearn import preprocessing
+import logging
 import numpy as np
 
 import time
 import os
+import threading
 
 from infer_ha.infer_transitions.data_scaling import create_data, inverse_scale
-from infer_ha.infer_transitions.svm_operations import svm_model_training
-from infer_ha.libsvm.commonutil import svm_read_problem, csr_find_scale_param, csr_scale
-from infer_ha.libsvm.svmutil import svm_save_model, svm_predict
+from infer_ha.infer_transitions.guard_coreset import select_guard_coreset
+from infer_ha.infer_transitions.svm_operations import svm_model_training, linear_svm_training
 # from infer_ha.libsvm.svmutil import *
 from infer_ha.utils.util_functions import rel_diff
-from infer_ha.clustering.gridSearch_fromSKLearn import gridSearchStart
-from utils import misc_math_functions as myUtil
+from utils.polynomial_basis import multinomial_expansion, evaluate_monomials, complete_polynomial_size
+from utils.stage_cache import OPTIONAL_PARAMETERS
 
+logger = logging.getLogger(__name__)
 
-def getGuard_inequality(srcData, destData, L_y, boundary_order, Y):
+EXPLICIT_FEATURES_LIMIT = 200   # maximum number of monomials for which the guard is learned on explicit features
+
+
+def getGuard_inequality(srcData, destData, L_y, boundary_order, Y, guard_backend=OPTIONAL_PARAMETERS['guard_backend'],
+                        max_points=OPTIONAL_PARAMETERS['guard_max_points']):
     """
     Implementation of an equal number of positive and negative data and the size of these data are not very high. It is
     equal to the number of connecting points.
@@ -28,6 +34,9 @@ def getGuard_inequality(srcData, destData, L_y, boundary_order, Y):
     :param L_y: system dimension
     :param boundary_order: polynomial degree
     :param Y: contains the y_list values for all the points except the first and last M points (M is the order in BDF).
+    :param guard_backend: the SVM used to learn the guard, see the function select_guard_backend().
+    :param max_points: maximum number of data of each class used for training the SVM, see the module guard_coreset.
+        The value 0 disables the reduction. The accuracy is always reported on all the data.
     :return: guard coefficients
 
     Note: when we have only single data for each class and if the two data differ by a very small fraction than SVM with
@@ -49,14 +58,19 @@ def getGuard_inequality(srcData, destData, L_y, boundary_order, Y):
     x_p = []
     x_n = []
 
-    output_filename = "outputs/data_scale"    # This file is also used for SVM scaling
-    x, y, x_gs = create_data(output_filename, srcData, destData, L_y, Y) # outputs/data_scale file gets created
+    from infer_ha.libsvm.commonutil import svm_read_problem, csr_find_scale_param, csr_scale
+
+    # a file per process and thread, so that guards can be learned by concurrent processes (see the module sweep) and
+    # threads (see the module scheduler)
+    output_filename = "outputs/data_scale_" + str(os.getpid()) + "_" + str(threading.get_ident())    # This file is also used for SVM scaling
+    x, y, x_gs = create_data(output_filename, srcData, destData, L_y, Y) # outputs/data_scale_<pid>_<thread> file gets created
     data_length = len(srcData)  # or len(destData)
     # print("data size for SVM =", data_length)
     # ******* scaling data ************
     # print('Before Storing data in file for conversion to csr_matrix')
     # print(x)
-    y, x = svm_read_problem('outputs/data_scale', return_scipy = True)  # y: ndarray, x: csr_matrix
+    y, x = svm_read_problem(output_filename, return_scipy = True)  # y: ndarray, x: csr_matrix
+    os.remove(output_filename)
     # print('After scaling data')
     # print(x)
     # print('label y is ', y)
@@ -105,6 +119,32 @@ def getGuard_inequality(srcData, destData, L_y, boundary_order, Y):
 
     # ******** Checking Data size and Data similarity ********
 
+    train_index = select_guard_coreset(x, y, max_points)
+    x_train = x[train_index]
+    y_train = y[train_index]
+    if len(train_index) < len(y):
+        logger.info("Guard is trained on %d of %d data", len(train_index), len(y))
+
+    backend = select_guard_backend(guard_backend, boundary_order, L_y)
+    if backend != "kernel":
+        if backend == "linear":
+            features = x
+            total_features = L_y    # x may have fewer columns, see get_linear_coeffs()
+        else:
+            features = explicit_guard_features(x, L_y, boundary_order)
+            total_features = features.shape[1]
+        clf = linear_svm_training(features[train_index], y_train, c_value)
+        guard_coeff = get_linear_coeffs(total_features, clf)  # no kernel expansion is needed
+        logger.info('Guard Accuracy is %s', clf.score(features, y) * 100)
+
+        guard_coeff = inverse_scale(guard_coeff, scale_param, L_y, boundary_order)
+        return guard_coeff
+
+    # the libsvm library and the grid search are loaded only for the guards learned by the kernel SVM
+    from sklearn import preprocessing
+    from infer_ha.clustering.gridSearch_fromSKLearn import gridSearchStart
+    from infer_ha.libsvm.svmutil import svm_predict
+
     # #********* Grid Search for hyperparameter tuning *************
     # For skiping small relative difference has higher priority than length of data. Therefore, that code appears first
 
@@ -129,10 +169,11 @@ def getGuard_inequality(srcData, destData, L_y, boundary_order, Y):
                       'coef0': [0, 1, 0.1],
                       'kernel': ['poly']}
         # print("x_gs=", x_gs)
+        x_gs = np.array(x_gs)[train_index]
         scaler = preprocessing.StandardScaler().fit(x_gs)
         # https://scikit-learn.org/stable/modules/preprocessing.html#standardization-or-mean-removal-and-variance-scaling
         x_gs_scaled = scaler.transform(x_gs)
-        c_value_optimal, gamma_value_optimal, coef_optimal = gridSearchStart(x_gs_scaled, y, param_grid)  # libsvm as backend
+        c_value_optimal, gamma_value_optimal, coef_optimal = gridSearchStart(x_gs_scaled, y_train, param_grid)  # libsvm as backend
         # print("x_gs=", x_gs_scaled)
         # c_value_optimal, gamma_value_optimal, coef_optimal = gridSearchStart(x_gs, y, param_grid)   # using sklean here which take libsvm as backend
 
@@ -142,14 +183,14 @@ def getGuard_inequality(srcData, destData, L_y, boundary_order, Y):
         # print ("Search Time (secs): ", searchTime)
     #  ********** End of Grid Search for hyperparameter tuning ************
 
-    m = svm_model_training(x, y, boundary_order, c_value_optimal, coef_optimal, gamma_value_optimal)
+    m = svm_model_training(x_train, y_train, boundary_order, c_value_optimal, coef_optimal, gamma_value_optimal)
 
-    svm_save_model('outputs/svm_model_file', m)
+    # the model is not dumped to outputs/svm_model_file: the guards of concurrent threads would overwrite it
     guard_coeff = get_coeffs(L_y, m, gamma_value_optimal, order=boundary_order)  # this gives the hyperplane coefficients
 
     # print("guard_coeff is ", guard_coeff)
-    p_label, p_acc, p_val = svm_predict(y, x, m, '-q')
-    print('Guard Accuracy is ', p_acc[0])
+    p_label, p_acc, p_val = svm_predict(y, x, m, '-q')  # accuracy on all the data
+    logger.info('Guard Accuracy is %s', p_acc[0])
 
     guard_coeff = inverse_scale(guard_coeff, scale_param, L_y, boundary_order)
 
@@ -158,6 +199,66 @@ def getGuard_inequality(srcData, destData, L_y, boundary_order, Y):
 
 
 
+def select_guard_backend(guard_backend, boundary_order, L_y):
+    """
+    Decides the SVM used to learn the guard.
+
+    :param guard_backend: the user's choice. The options are
+        "kernel": SVM with polynomial kernel (libsvm) and grid search for the hyperparameters.
+        "linear": linear SVM solving the primal problem (liblinear). Only for guards of degree 1.
+        "explicit": linear SVM solving the primal problem on the explicitly expanded monomials of the guard polynomial.
+        "auto": "linear" for guards of degree 1, otherwise "explicit" when the number of monomials is at most
+            EXPLICIT_FEATURES_LIMIT and "kernel" for larger expansions.
+    :param boundary_order: polynomial degree of the guard.
+    :param L_y: dimension of the system.
+    :return: the backend to be used, one of "linear", "explicit" or "kernel".
+
+    """
+    if guard_backend == "linear" and boundary_order != 1:
+        logger.warning("Linear guard backend supports only guard degree 1. Using the explicit backend")
+        return "explicit"
+    if guard_backend == "auto":
+        if boundary_order == 1:
+            return "linear"
+        total_features = complete_polynomial_size(L_y, boundary_order) - 1  # the constant term is the intercept
+        return "explicit" if total_features <= EXPLICIT_FEATURES_LIMIT else "kernel"
+
+    return guard_backend
+
+
+def explicit_guard_features(x, L_y, boundary_order):
+    """
+    Expands the data into the monomials of the guard polynomial.
+
+    :param x: the scaled data as csr_matrix.
+    :param L_y: dimension of the system.
+    :param boundary_order: polynomial degree of the guard.
+    :return: numpy.ndarray of shape (rows, terms - 1). The columns are the monomials in the same order of the terms
+        returned by get_coeffs() excluding the last term 1, which is learned as the intercept.
+
+    """
+    points = np.zeros((x.shape[0], L_y))
+    points[:, :x.shape[1]] = x.toarray()    # x may have fewer columns, see get_linear_coeffs()
+    coefficients, exponents = multinomial_expansion(L_y + 1, boundary_order)
+
+    return evaluate_monomials(points, exponents[:-1, :L_y])
+
+
+def get_linear_coeffs(total_features, clf):
+    """
+    :param total_features: number of coefficients of the guard polynomial excluding the constant term.
+    :param clf: the trained linear SVM classifier.
+    :return: the list of coefficient values for the guard-equation a'x + b = 0, in the same format as the function
+        get_coeffs(), i.e., [a_0, ..., a_(total_features - 1), b].
+
+    """
+    # csr_matrix data read by svm_read_problem() drops the last columns having only zeros, so is the size of coef_
+    a = [0.0] * total_features
+    a[:clf.coef_.shape[1]] = clf.coef_[0].tolist()
+
+    return a + [clf.intercept_[0]]
+
+
 def get_coeffs(L_y, svm_model, gamma_value_optimal, order=1):
     """
     Implementation of an equal number of positive and negative data and the size of these data are not very high. It is
@@ -172,78 +273,44 @@ def get_coeffs(L_y, svm_model, gamma_value_optimal, order=1):
     """
 
     # https://stackoverflow.com/questions/51836870/calculate-equation-of-hyperplane-using-libsvm-support-vectors-and-coefficients-i
-    nsv = svm_model.get_nr_sv()
     svc = svm_model.get_sv_coef()
     sv = svm_model.get_SV()
 
-    g = -svm_model.rho[0]  # Constant term
-    # print("svm_model.rho[0] for rho = ", svm_model.rho[0])
-    # print("g after rho = ", g)
-    # print ('sv is ', sv)
-    # print("svc is ", svc)
-    # print("nsv is ", nsv)
-    # print (sv[0])
-    # L_y = len(sv[0])  # Now I can not use this to get the Number of dimensions
-    # print ('Dimension: len(sv[0]) is ', len(sv[0]))
-    # print ('sv[0] is ', sv[0])
-    # print("svc is ", svc)
-    # print("sv is ", sv)
-    # print("nsv is ", nsv)
-    # gamma = 0.5  # this was used in the original code
-    # gamma = float(1/L_y)  # default 1/number_of_features. Observation does not help much but improve the separation line.
-    # best way is use grid search to find the optimal value for gamma and other hyperparameter(s)
-
     gamma = gamma_value_optimal # computing using grid search which usually is 1/L_y
-    # print("gamma optimal=",gamma)
 
     # Due to the Poly kernel, SVM has formula: (gamma.U'.V + 1)^degree. So, in addition to the dimension of V we
     # have + 1 an extra term so the last term is considered as 1 for Eg. in (a+b+c)^degree, the last term c==1.
     # Similarly, this is done in the calling module run.py to construct/print the guard equation.
-    coeff_expansion = myUtil.multinomial(L_y + 1, order)  # this coeff_expansion include multinomial coefficients
-    # print("coeff_expansion is ", coeff_expansion)
-    list_a = [0] * int(len(coeff_expansion))
-    # print("list_a is ", list_a)
-    # print("svc[i][0] is ", svc[0][0])
-    for i in range(nsv):
-        # print("i here is ", i)
-        g += svc[i][0]
-        # print("g is ", g)
-        coef_index = 0
-        for term in coeff_expansion:
-            term_index = 0
-            sv_product = 1
-            g_power = 0
-            for each_var_power in term:
-                flag = term_index in sv[i]
-                # print("sv[i]:", sv[i])
-                if flag == False:
-                    aa = 0.0
-                else:
-                    aa = sv[i][term_index]
-                    # print("aa=",aa)
-
-                # if term_index != (len(term) - 1):  # ignoring the last term since gamma is not associated with it
-                if (term_index != (len(term) - 1) and term_index != 0): # ignore 1st term which is coefficient term and last term
-                    g_power += each_var_power
-                # else: # for the last term, which is 1
-                #     aa = 1  # so that ^each_var_power will also be 1
-
-                if (term_index == len(term) - 1):
-                    aa = 1 # so that ^each_var_power will also be 1
-
-                if term_index == 0:
-                    coef_val = each_var_power # only the 1st term is the computed coefficient value
-                else:
-                    sv_product *= (aa ** each_var_power)  # so now term_index is starting from 1 which is required for SV, as it starts indexing from 1
-
-                term_index += 1
-
-            list_a[coef_index] += svc[i][0] * (gamma ** g_power) * coef_val * sv_product
-            coef_index += 1
-    # print("g is ", g)
-    # print("Before list_a is ", list_a)
-    list_a[len(coeff_expansion) - 1] = g  # replacing the last computed value of list_a by this g
-    # print("After list_a is ", list_a)
-    return list_a
+    coefficients, exponents = multinomial_expansion(L_y + 1, order)
+    var_exponents = exponents[:, :L_y]  # ignoring the last column, which is the power of the constant term 1
+    g_power = var_exponents.sum(axis=1)  # gamma is associated with every variable of the term
+
+    sv_matrix = support_vectors_to_matrix(sv, L_y)  # (nsv, L_y)
+    sv_coef = np.array([coef[0] for coef in svc])  # (nsv, )
 
+    # All the monomials of all the support vectors at once: (nsv, terms)
+    sv_product = evaluate_monomials(sv_matrix, var_exponents)
+    list_a = (sv_coef[:, np.newaxis] * (gamma ** g_power) * coefficients * sv_product).sum(axis=0)
+
+    g = -svm_model.rho[0] + sv_coef.sum()  # Constant term
+    list_a[len(coefficients) - 1] = g  # replacing the last computed value of list_a by this g
+    return list_a.tolist()
+
+
+def support_vectors_to_matrix(sv, L_y):
+    """
+    Converts the sparse support vectors returned by libsvm into a dense matrix.
+
+    :param sv: list of support vectors. Each support vector is a dictionary {index: value} with index starting from 1;
+        an index missing from the dictionary indicates the value 0.
+    :param L_y: dimension of the system.
+    :return: numpy.ndarray of shape (nsv, L_y) holding the support vectors.
+
+    """
+    sv_matrix = np.zeros((len(sv), L_y))
+    for i, sparse_sv in enumerate(sv):
+        for index, value in sparse_sv.items():
+            if 1 <= index <= L_y:
+                sv_matrix[i, index - 1] = value
 
+    return sv_matrix
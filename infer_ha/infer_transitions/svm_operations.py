@@ -2,9 +2,16 @@
 This module performs operations related to SVM and HA's guard creation.
 
 """
+import logging
+
+from utils.trace import count
+
 # from infer_ha.libsvm.svm import svm_problem, svm_parameter  # direct calling created wrong object on svm_problem()
 # from infer_ha.libsvm.svmutil import svm_train
-from infer_ha.libsvm.svmutil import *
+# libsvm (loading its shared library) and sklearn.svm are imported by the functions using them
+
+logger = logging.getLogger(__name__)
+
 
 def svm_model_training(x, y, boundary_order, c_value_optimal, coef_optimal, gamma_value_optimal):
     """
@@ -19,6 +26,7 @@ def svm_model_training(x, y, boundary_order, c_value_optimal, coef_optimal, gamm
     :return: the trained SVM model.
 
     """
+    from infer_ha.libsvm.svmutil import svm_problem, svm_parameter, svm_train
     prob = svm_problem(y, x)
     c_value = c_value_optimal
     # param = svm_parameter('-t 1 -d %d -c %d -r 1 -b 0 -q' % (boundary_order, c_value))  # -t 1 for Poly and 2 for RBF
@@ -30,15 +38,38 @@ def svm_model_training(x, y, boundary_order, c_value_optimal, coef_optimal, gamm
     # print ("SVM param is ", param)
     # Graphic Interface Observation show that -c 100 gives better hyperplane separation (https://www.csie.ntu.edu.tw/~cjlin/libsvm/#download)
     m = svm_train(prob, param)  # This is the time taking operation. recursion limit exceeded here for large data size
+    count('svm_trainings')
 
     sv = m.get_SV()
     if (len(sv) == 0):  # if error in svm-train with c_value=100 or even with 1. Re-run it with c_value=1 for the second time
-        print("SV is empty")
+        logger.warning("SV is empty")
         c_value = 1
         # param = svm_parameter('-t 1 -d %d -c %d -r %d -b 0 -q' % (boundary_order, c_value, coef_optimal))  # -t 1 for Poly and 2 for RBF
         param = svm_parameter(
             '-t 1 -d %d -c %g -r %d -g %g -b 0 -q' % (boundary_order, c_value, coef_optimal, gamma_value_optimal))  #
         # param = svm_parameter('-t 1 -d %d -c %d -r 0 -b 0 -q' % (boundary_order, c_value))  # Try coef0 or r to be 0
         m = svm_train(prob, param)  # running for the 2nd time due to error. Assuming no further error will occur
+        count('svm_trainings')
 
     return m
+
+
+def linear_svm_training(x, y, c_value):
+    """
+    Implementation of the linear SVM training operation. Unlike svm_model_training() with a polynomial kernel of degree 1,
+    the primal problem is solved directly (liblinear), so the training time grows linearly with the size of the data
+    and the hyperplane is available without any kernel expansion.
+
+    :param x: the actual data
+    :param y: the label on data x
+    :param c_value: the c value one of the SVM hyperparameter.
+    :return: the trained linear SVM classifier. The hyperplane is clf.coef_[0] . x + clf.intercept_[0] = 0
+
+    """
+    from sklearn.svm import LinearSVC
+    # intercept_scaling: the data are scaled within [0, 1] so a larger scaling reduces the regularization of the intercept
+    clf = LinearSVC(C=c_value, dual=False, intercept_scaling=10, max_iter=10000)
+    clf.fit(x, y)
+    count('svm_trainings')
+
+    return clf
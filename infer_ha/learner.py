@@ -0,0 +1,207 @@
+"""
+This module contains the class Learner, a reusable form of the function infer_model() in infer_HA.py for interactive
+use. A Learner holds the input trajectories and computes each stage of the learning algorithm lazily, when its output
+is first needed, keeping the outputs in memory. Changing a parameter only invalidates the stages depending on it, e.g.,
+after changing threshold_correlation the derivatives and the segmentation are reused and only the clustering and the
+following stages are recomputed.
+
+Example:
+    learner = Learner(list_of_trajectories, learning_parameters)
+    P_modes, G, mode_inv, transitions, position = learner.infer_model()
+    learner.set_parameters(threshold_correlation=0.92)
+    P_modes, G = learner.clustering()     # re-clustering without recomputing the segmentation
+
+The stages and the parameters affecting them are described in utils/stage_cache.py. When learning_parameters has a
+non-empty 'cache_dir', the outputs are also stored on the disk, so that they are reused across runs.
+
+When learning_parameters has a positive 'memory_budget' (in megabytes), the buffers of the derivatives are released as
+soon as their last consumer finishes: b2 after the segmentation, A and b1 after the clustering (only Y is needed by the
+invariants and the transitions). A released buffer is recomputed if a stage needing it runs again, e.g., after changing
+threshold_correlation. The monomials of A and the regressions of the modes are also computed in chunks sized to the
+budget (see chunk_rows() in utils/cost_estimator.py).
+
+With 'precision' set to 'float32', the matrices of the derivatives (and so the signals compared by DTW) are stored in
+single precision, halving their memory. The regressions convert their data to double precision.
+
+After the clustering, the invariants and the transitions are computed concurrently by up to 'jobs' threads, as are the
+ODEs of the modes and the guards of the transitions (see infer_ha/scheduler.py).
+"""
+
+import numpy as np
+
+from infer_ha.clustering.clustering import select_clustering
+from infer_ha.infer_invariants.invariants import compute_mode_invariant
+from infer_ha.infer_transitions.compute_transitions import compute_transitions
+from infer_ha.scheduler import TaskGraph
+from infer_ha.segmentation.compute_derivatives import diff_method_backandfor
+from infer_ha.segmentation.segmentation import two_fold_segmentation, segmented_trajectories
+from utils.cost_estimator import chunk_rows
+from utils.polynomial_basis import complete_polynomial_size
+from utils.stage_cache import data_key, stage_key, cached_stage, optional_parameter, STAGE_DEPENDENCIES
+from utils.trace import trace_stage
+from utils.trajectories_parser import preprocess_trajectories
+
+
+DERIVATIVES = ['A', 'b1', 'b2', 'Y', 'ytuple']    # the outputs of the stage 'derivatives', see derivatives()
+PRECISIONS = {'float64': np.double, 'float32': np.single}   # the numeric types of the option --precision
+
+
+class Learner:
+    """
+    Learns an HA model from the input trajectories, see infer_model() in infer_HA.py for the description of the
+    arguments and of the outputs.
+    """
+
+    def __init__(self, list_of_trajectories, learning_parameters):
+        self.learning_parameters = dict(learning_parameters)
+        self.t_list, self.y_list, self.position = preprocess_trajectories(list_of_trajectories)
+        self.L_y = len(self.y_list[0][0])  # Number of dimensions
+        self.data_key = data_key(self.t_list, self.y_list, self.position)
+        self.stage_outputs = {}   # stage name: (key, output)
+
+    def set_parameters(self, **parameters):
+        """
+        Updates the learning parameters. The outputs of the stages affected by the parameters are recomputed when
+        they are needed next time.
+        """
+        self.learning_parameters.update(parameters)
+        return self
+
+    def stage_key(self, stage):
+        previous_stage = STAGE_DEPENDENCIES[stage]
+        previous_key = self.data_key if previous_stage is None else self.stage_key(previous_stage)
+        return stage_key(previous_key, stage, self.learning_parameters)
+
+    def memoized(self, stage):
+        """
+        :return: the memoized output of the stage if it is up to date with the learning parameters, otherwise None.
+        """
+        if stage in self.stage_outputs and self.stage_outputs[stage][0] == self.stage_key(stage):
+            return self.stage_outputs[stage][1]
+        return None
+
+    def run_stage(self, stage, compute, *args):
+        """
+        Returns the output of compute(*args), memoized for the current key of the stage.
+        """
+        key = self.stage_key(stage)
+        if stage in self.stage_outputs and self.stage_outputs[stage][0] == key:
+            return self.stage_outputs[stage][1]
+        with trace_stage(stage):
+            output = cached_stage(self.learning_parameters.get('cache_dir', ''), stage, key, compute, *args)
+        self.stage_outputs[stage] = (key, output)
+        return output
+
+    def derivatives(self, *needed):
+        """
+        :param needed: the names (see DERIVATIVES) of the outputs needed by the caller. By default, all the outputs.
+        :return: (A, b1, b2, Y, ytuple) as returned by diff_method_backandfor(). The outputs released by
+            release_derivatives() and not needed are None.
+        """
+        if 'derivatives' in self.stage_outputs:
+            output = self.stage_outputs['derivatives'][1]
+            if any(output[DERIVATIVES.index(name)] is None for name in needed or DERIVATIVES):
+                del self.stage_outputs['derivatives']   # recomputes the released outputs
+        maxorder = self.learning_parameters['ode_degree']
+        stepsize = self.learning_parameters['stepsize']
+        stepM = self.learning_parameters['lmm_step_size']  # the step size of Linear Multi-step Method (step M)
+        monomials_chunk_rows = chunk_rows(self.learning_parameters.get('memory_budget', 0),
+                                          complete_polynomial_size(self.L_y, maxorder) * (self.L_y + 1) * 8)
+        dtype = PRECISIONS[optional_parameter(self.learning_parameters, 'precision')]
+        return self.run_stage('derivatives', diff_method_backandfor, self.y_list, maxorder, stepsize,
+                              stepM, monomials_chunk_rows, dtype)    # compute forward and backward version of BDF
+
+    def release_derivatives(self, *names):
+        """
+        Releases the memory of the outputs of the derivatives (see DERIVATIVES) no longer needed by the next stages, when
+        the memory budget is enabled. The released outputs are replaced by None.
+        """
+        if self.learning_parameters.get('memory_budget', 0) <= 0 or 'derivatives' not in self.stage_outputs:
+            return
+        key, output = self.stage_outputs['derivatives']
+        output = tuple(None if name in names else value for name, value in zip(DERIVATIVES, output))
+        self.stage_outputs['derivatives'] = (key, output)
+
+    def segmentation(self):
+        """
+        :return: (segmented_traj, clfs, drop) as returned by two_fold_segmentation().
+        """
+        output = self.memoized('segmentation')
+        if output is not None:
+            return output
+        A, b1, b2, Y, ytuple = self.derivatives('A', 'b1', 'b2', 'Y', 'ytuple')
+        size_of_input_variables = self.learning_parameters['size_input_variable']
+        methods = self.learning_parameters['methods']
+        stepM = self.learning_parameters['lmm_step_size']
+        ep = self.learning_parameters['segmentation_error_tol']
+        ep_backward = self.learning_parameters['segmentation_fine_error_tol']
+        output = self.run_stage('segmentation', two_fold_segmentation, A, b1, b2, ytuple, Y, size_of_input_variables,
+                                methods, stepM, ep, ep_backward)
+        self.release_derivatives('b2')    # b2 is only used by the segmentation
+        return output
+
+    def segmented_trajectories(self):
+        """
+        :return: (segmentedTrajectories, segmented_traj, clfs) as returned by segmented_trajectories().
+        """
+        segmented_traj, clfs, drop = self.segmentation()
+        methods = self.learning_parameters['methods']
+        filter_last_segment = self.learning_parameters['filter_last_segment']  # 1 for delete last segment
+        # segmented_trajectories() deletes from the lists, hence copies are passed to keep the memoized segmentation
+        return self.run_stage('filtering', segmented_trajectories, list(clfs), list(segmented_traj), self.position,
+                              methods, filter_last_segment)
+
+    def clustering(self):
+        """
+        :return: (P_modes, G) as returned by select_clustering().
+        """
+        output = self.memoized('clustering')
+        if output is not None:
+            return output
+        segmentedTrajectories, segmented_traj, clfs = self.segmented_trajectories()
+        A, b1, b2, Y, ytuple = self.derivatives('A', 'b1', 'Y')
+        stepM = self.learning_parameters['lmm_step_size']
+        output = self.run_stage('clustering', select_clustering, segmented_traj, A, b1, clfs, Y, self.t_list, self.L_y,
+                                self.learning_parameters, stepM)
+        self.release_derivatives('A', 'b1', 'b2')     # the invariants and the transitions only use Y
+        return output
+
+    def mode_invariants(self):
+        """
+        :return: mode_inv as returned by compute_mode_invariant().
+        """
+        P_modes, G = self.clustering()
+        Y = self.derivatives('Y')[3]
+        isInvariant = self.learning_parameters['is_invariant']
+        # the statistics of the modes are computed in the stage, only when it is not memoized and the invariants enabled
+        return self.run_stage('invariants', compute_mode_invariant, self.L_y, P_modes, Y, isInvariant)
+
+    def transitions(self):
+        """
+        :return: transitions as returned by compute_transitions().
+        """
+        segmentedTrajectories, segmented_traj, clfs = self.segmented_trajectories()
+        P_modes, G = self.clustering()
+        Y = self.derivatives('Y')[3]
+        boundary_order = self.learning_parameters['guard_degree']
+        variableType_datastruct = self.learning_parameters['variableType_datastruct']
+        guard_backend = optional_parameter(self.learning_parameters, 'guard_backend')
+        guard_max_points = optional_parameter(self.learning_parameters, 'guard_max_points')
+        number_of_segments_before_cluster = len(segmented_traj)
+        number_of_segments_after_cluster = len(P_modes)
+        return self.run_stage('transitions', compute_transitions, P_modes, self.position, segmentedTrajectories,
+                              self.L_y, boundary_order, Y, variableType_datastruct, number_of_segments_before_cluster,
+                              number_of_segments_after_cluster, guard_backend, guard_max_points,
+                              self.learning_parameters.get('jobs', 1))
+
+    def infer_model(self):
+        """
+        :return: (P_modes, G, mode_inv, transitions, position) as returned by infer_model() in infer_HA.py.
+        """
+        P_modes, G = self.clustering()
+        self.derivatives('Y')    # computed before the invariants and the transitions run concurrently
+        graph = TaskGraph()
+        graph.add_task('invariants', self.mode_invariants)
+        graph.add_task('transitions', self.transitions)
+        outputs = graph.run(self.learning_parameters.get('jobs', 1))
+        return P_modes, G, outputs['invariants'], outputs['transitions'], self.position
@@ -4,13 +4,13 @@ This module prints an HA model into a plain .txt file
 
 import os
 
-from utils import generator as generate
+from utils.polynomial_basis import complete_polynomial_exponents
 from infer_ha.model_printer.print_header import *
 from infer_ha.model_printer.print_location import *
 from infer_ha.model_printer.print_transition import *
 
 
-def print_HA(P_modes, G, mode_inv, transitions, position, learning_parameters, outputfilename):
+def print_HA(P_modes, G, mode_inv, transitions, position, learning_parameters, outputfilename, trace=None):
     """
 
     :param P_modes: holds a list of modes. Each mode is a list of structures; we call it a segment.
@@ -35,6 +35,7 @@ def print_HA(P_modes, G, mode_inv, transitions, position, learning_parameters, o
             command-line usages can be obtained using the --help command. To find the details of the arguments see the
             file/module "utils/commandline_parser.py"
     :param outputfilename: name of the file where the HA model is printed as an output.
+    :param trace: the trace of the learning (see utils/trace.py) to be printed after the header, or None.
     :return:
 
     """
@@ -47,7 +48,7 @@ def print_HA(P_modes, G, mode_inv, transitions, position, learning_parameters, o
     total_ode_rows = G[0].shape[0]  # total row of 1st location's ODE. Size is dimension
     system_dim = total_ode_rows
     # system_dim = total_ode_coeff - 1 # minus the intercept term
-    gene = generate.generate_complete_polynomial(system_dim, maxorder)
+    gene = complete_polynomial_exponents(system_dim, maxorder)
     # print ("Gene matrix here ", gene)
     expression = ""  # list of terms as string
     # for i in range(0, gene.shape[0]):
@@ -97,6 +98,8 @@ def print_HA(P_modes, G, mode_inv, transitions, position, learning_parameters, o
 
     f_out = open(outputfilename, "a")  # Opening file-id for writing output
     print_header(f_out, num_mode, system_dim, transitions)
+    if trace is not None:
+        print_trace(f_out, trace)
     print_location(f_out, P_modes, G, mode_inv, Exp, position)
     print_transition(f_out, transitions, system_dim, boundary_order)
     f_out.close()
@@ -33,3 +33,22 @@ def print_header(f_out, num_mode, system_dim, transitions):
     modes_dim_transitions = str(num_mode) + " " + str(system_dim) + " " + str(total_trans) + "\n"
     f_out.write(modes_dim_transitions)
     #    print("\n")
+
+
+def print_trace(f_out, trace):
+    """
+    Prints the summary of the trace of the learning as comment lines starting with '#': the wall and CPU time of each
+    top-level stage and the total of each counter.
+
+    :param f_out: file pointer where the output is printed.
+    :param trace: the dictionary of the trace, see utils/trace.py.
+    :return:
+
+    """
+    f_out.write("# learning trace: wall-time %.3f s, CPU-time %.3f s\n" % (trace['wall_time'], trace['cpu_time']))
+    for stage in trace['stages']:
+        if stage['depth'] == 0:
+            f_out.write("# %s: wall-time %.3f s, CPU-time %.3f s\n" % (stage['stage'], stage['wall_time'],
+                                                                      stage['cpu_time']))
+    counters = ", ".join(name + " " + str(value) for name, value in sorted(trace['counters'].items()))
+    f_out.write("# counters: " + counters + "\n")
@@ -4,6 +4,8 @@ def print_invariant(f_out, mode_inv, modeID):
     :param f_out: file pointer where the output is printed.
     :param mode_inv: is a list with items of type [mode-id, invariant-constraints]. Where mode-id is the location number
                   and invariant-constraints holds the bounds (min, max) of each variable in the corresponding mode-id.
+                  For the octagon and convex hull invariants, a third item holds the list of linear constraints of type
+                  [coefficients, bound].
     :param modeID: location ID.
 
     """
@@ -24,5 +26,20 @@ def print_invariant(f_out, mode_inv, modeID):
                 inv_str += "x" + str(dim) + " >= " + str(low_bound) + " & " + "x" + str(dim) + " <= " + str(high_bound)
                 if dim != (len(inv_bounds) - 1):
                     inv_str += " & "
+            if len(invs) > 2:   # polyhedral invariant
+                for coefficients, bound in invs[2]:
+                    inv_str += " & " + print_linear_constraint(coefficients, bound)
             inv_str += "\n"
-            f_out.write(inv_str)
\ No newline at end of file
+            f_out.write(inv_str)
+
+
+def print_linear_constraint(coefficients, bound):
+    """
+    :param coefficients: the coefficient of each variable of the constraint.
+    :param bound: the right hand side of the constraint.
+    :return: the constraint as a string of the form "c0 * x0 + c1 * x1 <= bound". Variables having zero coefficient
+        are omitted.
+
+    """
+    terms = [str(coef) + " * x" + str(dim) for dim, coef in enumerate(coefficients) if coef != 0]
+    return " + ".join(terms) + " <= " + str(bound)
@@ -0,0 +1,158 @@
+"""
+This module runs the independent computations of the learning algorithm concurrently, as a graph of tasks. A task is a
+function call; it can use the outputs of other tasks (its dependencies) and starts once they are finished. Eg.:
+    graph = TaskGraph()
+    graph.add_task('assignments', all_assignments, data_points, L_y, Y)
+    graph.add_task('guard 0', transition_guard, src_mode, dest_mode, srcData, destData, ...)
+    graph.add_task('assignment 0', transition_assignment, src_mode, dest_mode, ..., TaskOutput('assignments'))
+    outputs = graph.run(jobs=4)     # {'assignments': ..., 'guard 0': ..., 'assignment 0': ...}
+(see compute_transitions() in infer_ha/infer_transitions/compute_transitions.py).
+
+After the clustering, the invariants and the transitions are independent, and so are the ODE of each mode (see
+get_desired_ODE_coefficients()) and the guard of each transition (see compute_transitions()).
+
+The tasks of all the graphs run in a single pool of threads bounded by the option --jobs: the thread running a graph
+is one of the jobs and the pool has jobs - 1 threads. A ready task is run by an idle thread of the pool, or by the
+thread running the graph when all the threads of the pool are busy. Hence, a task can run a graph itself (e.g., the
+task computing the transitions runs the graph of the guards) without waiting for a thread. Threads are used because the
+tasks spend most of their time in numpy, scikit-learn and libsvm, which release the GIL, and share the large arrays
+without copying them. With jobs = 1, the tasks run one after another in the order they are added, as a sequential run.
+
+The wall-clock time of each task is stored in TaskGraph.timings and in the trace (see record_task() in utils/trace.py).
+"""
+
+import collections
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.trace import open_stages, inherited_stages, notified_task, record_task
+
+TaskOutput = collections.namedtuple('TaskOutput', ['task'])   # an argument replaced by the output of the task
+
+_pool = None    # the pool of threads shared by all the task graphs, see worker_pool()
+_pool_lock = threading.Lock()
+
+
+class WorkerPool:
+    """
+    A pool of threads accepting a task only when one of its threads is idle.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='learnha-worker')
+        self.idle = threading.Semaphore(workers)
+
+    def try_submit(self, function, *args):
+        """
+        :return: the future of function(*args) run by an idle thread, or None if all the threads are busy.
+        """
+        if not self.idle.acquire(blocking=False):
+            return None
+        future = self.executor.submit(function, *args)
+        future.add_done_callback(lambda finished: self.idle.release())
+        return future
+
+
+def worker_pool(jobs):
+    """
+    :param jobs: the maximum number of threads running tasks, including the thread running the graph.
+    :return: the pool of jobs - 1 threads shared by the task graphs.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.workers != jobs - 1:
+            if _pool is not None:
+                _pool.executor.shutdown(wait=False)     # the running tasks finish in the threads of the old pool
+            _pool = WorkerPool(jobs - 1)
+        return _pool
+
+
+class TaskGraph:
+    """
+    A set of tasks with dependencies, see the description of this module.
+    """
+
+    def __init__(self):
+        self.tasks = collections.OrderedDict()  # name: (function, args, names of the dependencies)
+        self.timings = []   # {"task": name, "start": time.time(), "wall_time": seconds, "thread": name}
+
+    def add_task(self, name, function, *args, dependencies=()):
+        """
+        Adds the task computing function(*args).
+
+        :param name: the unique name of the task.
+        :param args: the arguments of function. An argument TaskOutput(task) is replaced by the output of the task,
+            which becomes a dependency.
+        :param dependencies: the names of the other tasks to finish before this task starts.
+        """
+        dependencies = set(dependencies) | {arg.task for arg in args if isinstance(arg, TaskOutput)}
+        unknown = [dependency for dependency in dependencies if dependency not in self.tasks]
+        if name in self.tasks or unknown:
+            raise ValueError("Task " + name + " is already added or depends on tasks not added: " + ", ".join(unknown))
+        self.tasks[name] = (function, args, dependencies)
+
+    def run_task(self, name, outputs, stages=None, graph_thread=None):
+        """
+        :param stages: the stages of the trace open in the thread running the graph, see inherited_stages().
+        :param graph_thread: the threading.get_ident() of the thread running the graph, see notified_task(). The current
+            thread if None.
+        :return: the output of the task.
+        """
+        function, args, dependencies = self.tasks[name]
+        args = [outputs[arg.task] if isinstance(arg, TaskOutput) else arg for arg in args]
+        start = time.time()
+        with inherited_stages(stages), notified_task(graph_thread or threading.get_ident()):
+            output = function(*args)
+        wall_time = time.time() - start
+        self.timings.append({'task': name, 'start': start, 'wall_time': wall_time,
+                             'thread': threading.current_thread().name})
+        record_task(name, start, wall_time)
+        return output
+
+    def run(self, jobs=1):
+        """
+        Runs the tasks using at most jobs threads, see the description of this module.
+
+        :return: a dictionary {name of the task: output}.
+        :raise: the exception raised by a task, after the running tasks are finished.
+        """
+        outputs = {}
+        if jobs <= 1:
+            for name in self.tasks:     # a task is added after its dependencies
+                outputs[name] = self.run_task(name, outputs)
+            return outputs
+
+        pool = worker_pool(jobs)
+        stages = open_stages()
+        graph_thread = threading.get_ident()
+        waiting = {name: set(dependencies) for name, (function, args, dependencies) in self.tasks.items()}
+        ready = collections.deque(name for name, dependencies in waiting.items() if not dependencies)
+        running = {}    # future: name of the task
+
+        def finished(name, output):
+            outputs[name] = output
+            del waiting[name]
+            for other, dependencies in waiting.items():
+                if name in dependencies:
+                    dependencies.discard(name)
+                    if not dependencies:
+                        ready.append(other)
+
+        try:
+            while ready or running:
+                while ready:
+                    name = ready.popleft()
+                    future = pool.try_submit(self.run_task, name, outputs, stages, graph_thread)
+                    if future is None:  # all the threads of the pool are busy
+                        finished(name, self.run_task(name, outputs))
+                    else:
+                        running[future] = name
+                if running:
+                    done, not_done = wait(list(running), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        finished(running.pop(future), future.result())
+        finally:
+            wait(list(running))
+        return outputs
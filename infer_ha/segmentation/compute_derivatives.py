@@ -4,7 +4,7 @@ This module computes the derivatives
 
 import numpy as np
 
-from utils import generator as generate # generate_complete_polynomial
+from utils.polynomial_basis import complete_polynomial_exponents, evaluate_monomials
 
 
 def BDF_backward_version(stepM, stepsize, y_points, index):
@@ -71,7 +71,7 @@ def BDF_forward_version(stepM, stepsize, y_points, index):
 
 
 
-def diff_method_backandfor(y_list, order, stepsize, stepM):
+def diff_method_backandfor(y_list, order, stepsize, stepM, chunk_rows=0, dtype=np.double):
     """Using multi-step backwards differentiation formula (BDF) to calculate the
     coefficient matrix. We have concatenated all the trajectories into a single list because this helped us discard fewer data than
     considering trajectories as a list of independent trajectories. This is because, for the first M points (M the
@@ -91,6 +91,12 @@ def diff_method_backandfor(y_list, order, stepsize, stepM):
         stepsize: is the sampling time period between two points.
     :param
         stepM: is the step size of Linear Multi-step Method (step M)
+    :param
+        chunk_rows: when positive, the monomials are evaluated in chunks of chunk_rows points directly into the matrix
+        A, to bound the memory of the temporary arrays (see chunk_rows() in utils/cost_estimator.py).
+    :param
+        dtype: the numeric type of the returned matrices, numpy.double or numpy.single (see the option --precision).
+        The values are computed in double precision and rounded when stored.
     :return:
         The following lists:
         final_A_mat: For every point of a trajectory the coefficients of the monomial terms obtained using the \Phi
@@ -113,7 +119,7 @@ def diff_method_backandfor(y_list, order, stepsize, stepM):
 
     L_y = y_list[0].shape[1]
     # print ("L_y=", L_y)  # returns the dimension excluding the time-column
-    gene = generate.generate_complete_polynomial(L_y, order)
+    gene = complete_polynomial_exponents(L_y, order)   # shared memoized table, read-only
     L_p = gene.shape[0]
     # print("Value of L_p = ", L_p)  # L_p = total number of terms in the mapping function \Phi as in the paper (depending on the order-size and dimension)
     for k in range(0, len(y_list)):     # this will run only 1 iteration now since we concatenated the trajectories
@@ -123,20 +129,23 @@ def diff_method_backandfor(y_list, order, stepsize, stepM):
         # print("value of k =", k)
         D = L_t - stepM  # here M = order5      //Discarding the last M-points
         # print("Value of D = ", D) # D = total-points - 5
-        A_matrix = np.zeros((D - stepM, L_p), dtype=np.double)  # stores the mapping function \Phi as in the paper
-        b1_matrix = np.zeros((D - stepM, L_y), dtype=np.double)  # stores the backward_BDF using LMM as in the paper
-        b2_matrix = np.zeros((D - stepM, L_y), dtype=np.double)  # stores the forward_BDF using LMM  as in the paper
-        y_matrix = np.zeros((D - stepM, L_y), dtype=np.double)
-        coef_matrix = np.ones((L_t, L_p), dtype=np.double)  # stores the coefficient F as in the paper
-        for i in range(0, L_t):
-            for j in range(0, L_p):
-                for l in range(0, L_y):
-                    coef_matrix[i][j] = coef_matrix[i][j] * (y_points[i][l] ** gene[j][l])
+        A_matrix = np.zeros((D - stepM, L_p), dtype=dtype)  # stores the mapping function \Phi as in the paper
+        b1_matrix = np.zeros((D - stepM, L_y), dtype=dtype)  # stores the backward_BDF using LMM as in the paper
+        b2_matrix = np.zeros((D - stepM, L_y), dtype=dtype)  # stores the forward_BDF using LMM  as in the paper
+        y_matrix = np.zeros((D - stepM, L_y), dtype=dtype)
+        coef_matrix = None
+        if chunk_rows > 0:  # A_matrix[i - stepM] = coef_matrix[i] computed for a chunk of points at a time
+            for start in range(0, D - stepM, chunk_rows):
+                end = min(start + chunk_rows, D - stepM)
+                A_matrix[start:end] = evaluate_monomials(y_points[stepM + start:stepM + end], gene)
+        else:
+            coef_matrix = evaluate_monomials(y_points, gene)  # stores the coefficient F as in the paper
         # For all the points i: For each variable, the mapping function \Phi is computed (monomials)
 
         for i in range(stepM, D):      #//Discarding the first M-points
             # forward
-            A_matrix[i - stepM] = coef_matrix[i]
+            if coef_matrix is not None:
+                A_matrix[i - stepM] = coef_matrix[i]
             # b1_matrix[i - 5] = (137 * y_points[i] - 300 * y_points[i - 1] + 300 * y_points[i - 2] -
             #                   200 * y_points[i - 3] + 75 * y_points[i - 4] - 12 * y_points[i - 5]) / (60 * stepsize)
             b1_matrix[i - stepM] = BDF_backward_version(stepM, stepsize, y_points, i)
@@ -3,9 +3,10 @@ Contains modules related to the segmentation process
 
 """
 
-from sklearn import linear_model
+import numpy as np
 
 from infer_ha.utils.util_functions import rel_diff, matrowex
+from utils.trace import count
 
 def two_fold_segmentation(A, b1, b2, ytuple, Y, size_of_input_variables, method, stepM, ep_FwdBwd=0.01, ep_backward=0.1):
     """
@@ -59,6 +60,7 @@ def two_fold_segmentation(A, b1, b2, ytuple, Y, size_of_input_variables, method,
     the previous segment. Thus, either we can drop boundary points for ODE inference or compute a mix of forward BDF
     for boundary points and backward BDF for the rest of the points to infer the coefficients of the ODE correctly.
     """
+    from sklearn import linear_model
 
     # lowDifference = ep_backward #bball=0.9 is good  # rest set 0.01     In the paper, \Epsilon_{Bwd}
     next_low = 0
@@ -180,13 +182,14 @@ def two_fold_segmentation(A, b1, b2, ytuple, Y, size_of_input_variables, method,
         for seg_element in segmented_traj:
             lst = seg_element[2]  # access the third item of the tuple
             # print("List in res is ", lst)
-            Ai = matrowex(A, lst)
-            Bi = matrowex(b1, lst)
+            Ai = matrowex(A, lst).astype(np.double, copy=False)  # in double precision, see the option --precision
+            Bi = matrowex(b1, lst).astype(np.double, copy=False)
             # print("Bi is ", Bi)
             # print("Ai is ", Ai)
             clf = linear_model.LinearRegression(fit_intercept=False)
             # print ("Testing 1")
             clf.fit(Ai, Bi)
+            count('regressions')
             # print("clf is ", clf.coef_)
             # print("Testing 2")
             clfs.append(clf)
@@ -298,6 +301,7 @@ def segmented_trajectories(clfs, segmented_traj, position, method, filter_last_s
             # if not cluster_by_DTW:  # for DTW clustering we do not have clfs data. So skipping this line saves time
             #     clfs.pop(pos)
 
+    count('segments', len(segmented_traj))
     return segmentedTrajectories, segmented_traj, clfs
 
 
@@ -308,6 +312,7 @@ The list of functions that can be removed and currently not in use are:
     two_fold_segmentation_new: Nearly no dropping of points 
 """
 def segment_and_fit(A, b1, b2, ytuple, ep=0.01):
+    from sklearn import linear_model
     # Segmentation
     # This function is used to implement the simple segmentation Algorithm-1 in the paper by Jin et al.
     res = []
@@ -394,6 +399,7 @@ def two_fold_segmentation_new(A, b1, b2, ytuple, size_of_input_variables, method
         ODE inference incorrect.
 
     """
+    from sklearn import linear_model
 
 
 
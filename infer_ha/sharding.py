@@ -0,0 +1,238 @@
+"""
+This module learns an HA model from a set of trajectories too large to be learned at once (see the options --shards and
+--shard-merge-tol in utils/commandline_parser.py), as a map-reduce:
+
+map: the trajectories are split into shards of consecutive trajectories holding about the same number of points (see
+    split_shards()). The derivatives, the segmentation and the clustering of each shard are computed independently, in
+    parallel using a pool of processes (see learn_shard()). Only the matrices of the derivatives of the shards learned
+    at the same time are in memory, and they are released when their shard is clustered.
+reduce: the modes of the shards are merged into the modes of the HA (see merge_shard_modes()). A mode of a shard joins
+    the first mode of the HA whose ODE has coefficients close to its own (see ode_difference()) and whose
+    representative segment is similar to its representative segment by DTW (see is_similar() in cluster_by_dtw.py). The
+    representative segment of a mode is its first segment, the one that started the mode in the greedy clustering.
+    The ODE of a merged mode is solved from the sum of the normal equations of its shard modes, computed by the shards
+    on the points used for their regressions. The invariants and the transitions are then learned from all the
+    trajectories, using the merged modes (the mode map), as in infer_model() in infer_HA.py.
+
+The positions of the points of a shard are offset by the number of points of the previous shards, so that the segments
+of the merged modes refer to the concatenation of all the trajectories (see preprocess_trajectories()).
+"""
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from infer_ha.clustering.cluster_by_dtw import dtw_similarity, is_similar
+from infer_ha.clustering.utils import get_signal_data, create_simple_modes_positions_for_ODE_with_pruned_segments
+from infer_ha.infer_invariants.invariants import compute_mode_invariant
+from infer_ha.infer_transitions.compute_transitions import compute_transitions
+from infer_ha.learner import Learner, PRECISIONS
+from infer_ha.scheduler import TaskGraph
+from infer_ha.utils.util_functions import normal_equations
+from utils.cost_estimator import chunk_rows
+from utils.stage_cache import optional_parameter
+from utils.trace import trace_stage
+from utils.trajectories_parser import preprocess_trajectories
+
+logger = logging.getLogger(__name__)
+
+
+def split_shards(list_of_trajectories, shards):
+    """
+    :param list_of_trajectories: the input trajectories, see infer_model() in infer_HA.py.
+    :param shards: the number of shards. It is reduced to the number of trajectories when larger.
+    :return: a list with the list of the positions (in list_of_trajectories) of the consecutive trajectories of each
+        shard. The shards hold about the same number of points.
+    """
+    sizes = [len(trajectory[0][0]) for trajectory in list_of_trajectories]
+    shards = max(1, min(shards, len(sizes)))
+    total = sum(sizes)
+    groups = []
+    current = []
+    points = 0
+    for index, size in enumerate(sizes):
+        current.append(index)
+        points += size
+        remaining_shards = shards - len(groups) - 1
+        remaining_trajectories = len(sizes) - index - 1
+        if remaining_shards > 0 and (points >= total * (len(groups) + 1) / shards or
+                                     remaining_trajectories == remaining_shards):
+            groups.append(current)
+            current = []
+    groups.append(current)
+    return groups
+
+
+def learn_shard(list_of_trajectories, learning_parameters):
+    """
+    The map step: clusters the trajectories of a shard.
+
+    :param list_of_trajectories: the trajectories of the shard.
+    :param learning_parameters: the dictionary of the learning parameters.
+    :return: a dictionary holding the 'P_modes' and 'G' of the shard (see select_clustering()), the 'normal_equations'
+        (A^T A, A^T b1) of the regression of the ODE of each mode, the 'segmented_traj' and 'segmentedTrajectories' of
+        the shard (see segmented_trajectories()) and its number of 'points'. The positions are relative to the shard.
+    """
+    learner = Learner(list_of_trajectories, learning_parameters)
+    segmentedTrajectories, segmented_traj, clfs = learner.segmented_trajectories()
+    A, b1 = learner.derivatives('A', 'b1', 'Y')[:2]     # kept until the normal equations are computed
+    P_modes, G = learner.clustering()
+
+    regression_rows = create_simple_modes_positions_for_ODE_with_pruned_segments(P_modes,
+                                                                                 learning_parameters['ode_speedup'])
+    rows_of_chunk = chunk_rows(learning_parameters.get('memory_budget', 0), 2 * (A.shape[1] + b1.shape[1]) * 8)
+    equations = [normal_equations(A, b1, rows, rows_of_chunk or max(len(rows), 1)) for rows in regression_rows]
+    return {'P_modes': P_modes, 'G': G, 'normal_equations': equations, 'segmented_traj': segmented_traj,
+            'segmentedTrajectories': segmentedTrajectories, 'points': len(learner.t_list[0])}
+
+
+def learn_shard_task(arguments):
+    return learn_shard(*arguments)
+
+
+def offset_segment(segment, offset):
+    """
+    :param segment: a segment ([start_ode, end_ode], [start_exact, end_exact], [p_1, ... , p_n]) of a shard.
+    :return: the segment with its positions offset.
+    """
+    return tuple([position + offset for position in positions] for positions in segment)
+
+
+def offset_shard(shard, offset):
+    """
+    Offsets the positions of the segments of a shard returned by learn_shard().
+    """
+    shard['P_modes'] = [[offset_segment(segment, offset) for segment in mode] for mode in shard['P_modes']]
+    shard['segmented_traj'] = [offset_segment(segment, offset) for segment in shard['segmented_traj']]
+    shard['segmentedTrajectories'] = [[[position + offset for position in segment] for segment in trajectory]
+                                      for trajectory in shard['segmentedTrajectories']]
+
+
+def ode_difference(G1, G2):
+    """
+    :return: the largest absolute difference of the coefficients of two ODEs, relative to the largest absolute
+        coefficient of both.
+    """
+    G1 = np.asarray(G1, dtype=np.double)
+    G2 = np.asarray(G2, dtype=np.double)
+    scale = max(np.max(np.abs(G1)), np.max(np.abs(G2)))
+    difference = np.max(np.abs(G1 - G2))
+    return difference / scale if scale > 0 else difference
+
+
+def merge_shard_modes(shards, Y, t_list, L_y, learning_parameters):
+    """
+    The reduce step: merges the modes of the shards, see the description of this module.
+
+    :param shards: the list of the outputs of learn_shard(), with the positions offset (see offset_shard()).
+    :param Y: contains the y_list values of all the trajectories, except the first and last M points.
+    :param t_list: a single-item list whose item is a numpy.ndarray containing time-values as a concatenated list.
+    :param L_y: is the dimension (input + output variables) of the system.
+    :param learning_parameters: the dictionary of the learning parameters.
+    :return: the triple (P_modes, G, mode_map) where P_modes and G are as returned by select_clustering() and mode_map
+        is a list holding, for each shard, the list of the modes of the HA of the modes of the shard.
+    """
+    size_of_input_variables = learning_parameters['size_input_variable']
+    stepM = learning_parameters['lmm_step_size']
+    P_modes = []
+    G = []
+    equations = []  # the sum of the normal equations of the shard modes of each mode
+    representatives = []    # the signal of the representative segment of each mode
+    mode_map = []
+    for shard in shards:
+        seeds = [mode[0] for mode in shard['P_modes']]
+        signals = get_signal_data(seeds, Y, None, L_y, t_list, size_of_input_variables, stepM)[0]
+        shard_map = []
+        for mode, coefficients, (AtA, Atb), signal in zip(shard['P_modes'], shard['G'], shard['normal_equations'],
+                                                         signals):
+            merged = None
+            for mode_id in range(len(P_modes)):
+                # the modes of a shard are not merged together, its clustering found them different
+                if mode_id not in shard_map and similar_modes(G[mode_id], coefficients, representatives[mode_id],
+                                                              signal, learning_parameters):
+                    merged = mode_id
+                    break
+            if merged is None:
+                shard_map.append(len(P_modes))
+                P_modes.append(list(mode))
+                G.append(coefficients)
+                equations.append((AtA, Atb))
+                representatives.append(signal)
+            else:
+                shard_map.append(merged)
+                P_modes[merged].extend(mode)
+                equations[merged] = (equations[merged][0] + AtA, equations[merged][1] + Atb)
+                G[merged] = np.linalg.lstsq(equations[merged][0], equations[merged][1], rcond=None)[0].T
+        mode_map.append(shard_map)
+    return P_modes, G, mode_map
+
+
+def similar_modes(G1, G2, signal1, signal2, learning_parameters):
+    """
+    :return: True if two modes have close ODEs (see ode_difference()) and similar representative segments (see
+        is_similar()).
+    """
+    if ode_difference(G1, G2) > learning_parameters['shard_merge_tol']:
+        return False
+    distance, correlation = dtw_similarity(signal1, signal2)
+    return is_similar(distance, correlation, learning_parameters['threshold_correlation'],
+                      learning_parameters['threshold_distance'])
+
+
+def learn_sharded(list_of_trajectories, learning_parameters, shards, jobs=1):
+    """
+    Learns an HA model by sharding the trajectories, see the description of this module.
+
+    :param list_of_trajectories: the input trajectories, see infer_model() in infer_HA.py.
+    :param learning_parameters: the dictionary of the learning parameters.
+    :param shards: the number of shards, see split_shards().
+    :param jobs: the number of processes learning the shards in parallel, and of threads learning the transitions.
+    :return: (P_modes, G, mode_inv, transitions, position) as returned by infer_model() in infer_HA.py.
+    """
+    groups = split_shards(list_of_trajectories, shards)
+    arguments = [([list_of_trajectories[index] for index in group], learning_parameters) for group in groups]
+    with trace_stage('shards'):
+        if jobs <= 1 or len(groups) == 1:
+            results = [learn_shard_task(argument) for argument in arguments]
+        else:
+            # the processes learn their shard without threads (see infer_ha/scheduler.py)
+            arguments = [(trajectories, dict(parameters, jobs=1)) for trajectories, parameters in arguments]
+            with ProcessPoolExecutor(max_workers=min(jobs, len(groups))) as executor:
+                results = list(executor.map(learn_shard_task, arguments))
+    offset = 0
+    for result in results:
+        offset_shard(result, offset)
+        offset += result['points']
+
+    t_list, y_list, position = preprocess_trajectories(list_of_trajectories)
+    L_y = len(y_list[0][0])
+    stepM = learning_parameters['lmm_step_size']
+    dtype = PRECISIONS[optional_parameter(learning_parameters, 'precision')]
+    Y = np.asarray(y_list[0][stepM:len(y_list[0]) - stepM], dtype=dtype)
+    with trace_stage('merge'):
+        P_modes, G, mode_map = merge_shard_modes(results, Y, t_list, L_y, learning_parameters)
+    logger.info("Modes of the %d shards merged into %d modes: %s", len(results), len(P_modes), mode_map)
+
+    segmentedTrajectories = [trajectory for result in results for trajectory in result['segmentedTrajectories']]
+    number_of_segments = sum(len(result['segmented_traj']) for result in results)
+    graph = TaskGraph()
+    graph.add_task('invariants', sharded_invariants, L_y, P_modes, Y, learning_parameters['is_invariant'])
+    graph.add_task('transitions', sharded_transitions, P_modes, position, segmentedTrajectories, L_y, Y,
+                   number_of_segments, learning_parameters, jobs)
+    outputs = graph.run(jobs)
+    return P_modes, G, outputs['invariants'], outputs['transitions'], position
+
+
+def sharded_invariants(L_y, P_modes, Y, isInvariant):
+    with trace_stage('invariants'):
+        return compute_mode_invariant(L_y, P_modes, Y, isInvariant)    # computes the statistics if enabled
+
+
+def sharded_transitions(P_modes, position, segmentedTrajectories, L_y, Y, number_of_segments, learning_parameters,
+                        jobs):
+    with trace_stage('transitions'):
+        return compute_transitions(P_modes, position, segmentedTrajectories, L_y, learning_parameters['guard_degree'],
+                                   Y, learning_parameters['variableType_datastruct'], number_of_segments, len(P_modes),
+                                   optional_parameter(learning_parameters, 'guard_backend'),
+                                   optional_parameter(learning_parameters, 'guard_max_points'), jobs)
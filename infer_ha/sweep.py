@@ -0,0 +1,160 @@
+"""
+This module sweeps the learning algorithm over a grid of values of the segmentation tolerances and of the DTW
+clustering thresholds, to help choosing these parameters for a new input.
+
+The computation shared by the configurations is done only once: the derivatives once, the segmentation once for each
+pair of tolerances (segmentation_error_tol, segmentation_fine_error_tol) and the DTW comparisons of all the pairs of
+segments (see compute_dtw_table()) once for each segmentation. Every combination of the thresholds
+(threshold_correlation, threshold_distance) is then clustered from the shared DTW table and its transitions are
+learned, in parallel using a pool of processes. The large arrays of the shared computation (the derivatives and the DTW
+table) are published once in shared memory and attached by the processes without copying them (see
+utils/shared_arrays.py). The result is a summary table of the number of segments, modes and
+transitions of each configuration.
+"""
+
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from infer_ha.clustering.clustering import select_clustering
+from infer_ha.clustering.cluster_by_dtw import compute_dtw_table
+from infer_ha.infer_transitions.compute_transitions import compute_transitions
+from infer_ha.learner import Learner
+from utils.shared_arrays import SharedArrays, attach_state
+from utils.stage_cache import optional_parameter
+
+SWEEP_PARAMETERS = ['segmentation_error_tol', 'segmentation_fine_error_tol', 'threshold_correlation',
+                    'threshold_distance']
+
+_worker_state = {}  # the shared computation of the current segmentation, set once in each process of the pool
+
+
+def parse_sweep_grid(sweep_grid):
+    """
+    :param sweep_grid: the values of the parameters to sweep in the same format as the argument --pool-values. Eg.:
+        "segmentation_error_tol={0.01,0.1} & threshold_correlation={0.8,0.85,0.9}"
+    :return: A dictionary of the list of values of each swept parameter.
+
+    """
+    grid = {}
+    for parameter_values in sweep_grid.split("&"):     # Eg.: "threshold_correlation={0.8,0.85,0.9}"
+        name, values = parameter_values.split("=")
+        name = name.strip().replace("-", "_")
+        if name not in SWEEP_PARAMETERS:
+            raise ValueError("Parameter " + name + " can not be swept. Options are: " + ", ".join(SWEEP_PARAMETERS))
+        values = values.strip()[1:-1]   # discarding parenthesis { and }
+        grid[name] = [float(value) for value in values.split(",")]
+
+    return grid
+
+
+def sweep_model(list_of_trajectories, learning_parameters, grid, jobs=1):
+    """
+    Learns an HA model for every combination of the values of the parameters in grid.
+
+    :param list_of_trajectories: the input trajectories, see infer_model() in infer_HA.py.
+    :param learning_parameters: is a dictionary data structure containing all the parameters required for our learning
+        algorithm. The parameters not in grid keep their values.
+    :param grid: A dictionary of the list of values of each swept parameter, as returned by parse_sweep_grid().
+    :param jobs: the number of processes learning the configurations in parallel.
+    :return: A list with an item for each configuration. The item is a dictionary holding the values of the parameters
+        SWEEP_PARAMETERS and the number of 'segments', 'modes' and 'transitions' of the learned HA and the learning
+        'time' in seconds. The time of the shared computation is not included.
+
+    """
+    values = [grid.get(name, [learning_parameters[name]]) for name in SWEEP_PARAMETERS]
+    learner = Learner(list_of_trajectories, learning_parameters)
+    summary = []
+    for segmentation_error_tol in values[0]:
+        for segmentation_fine_error_tol in values[1]:
+            learner.set_parameters(segmentation_error_tol=segmentation_error_tol,
+                                   segmentation_fine_error_tol=segmentation_fine_error_tol)
+            state = shared_segmentation_state(learner)
+            thresholds = [(threshold_correlation, threshold_distance) for threshold_correlation in values[2]
+                          for threshold_distance in values[3]]
+            if jobs <= 1:
+                init_worker(state)
+                results = [evaluate_thresholds(threshold) for threshold in thresholds]
+            else:
+                # the processes learn the configurations one after another, without threads (see infer_ha/scheduler.py)
+                state['learning_parameters']['jobs'] = 1
+                with SharedArrays() as shared, ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                                                   initargs=(shared.share_state(state),)) as executor:
+                    results = list(executor.map(evaluate_thresholds, thresholds))
+            for result in results:
+                result.update(segmentation_error_tol=segmentation_error_tol,
+                              segmentation_fine_error_tol=segmentation_fine_error_tol,
+                              segments=len(state['segmented_traj']))
+                summary.append(result)
+
+    return summary
+
+
+def shared_segmentation_state(learner):
+    """
+    :param learner: the Learner holding the current segmentation tolerances.
+    :return: A dictionary of the computation shared by all the threshold values for the current segmentation.
+    """
+    A, b1, b2, Y, ytuple = learner.derivatives()
+    segmentedTrajectories, segmented_traj, clfs = learner.segmented_trajectories()
+    parameters = learner.learning_parameters
+    dtw_table = None
+    if parameters['methods'] == "dtw":
+        dtw_table = compute_dtw_table(segmented_traj, b1, Y, learner.t_list, learner.L_y,
+                                      parameters['size_input_variable'], parameters['lmm_step_size'])
+
+    return {'A': A, 'b1': b1, 'Y': Y, 't_list': learner.t_list, 'L_y': learner.L_y, 'position': learner.position,
+            'segmentedTrajectories': segmentedTrajectories, 'segmented_traj': segmented_traj, 'clfs': clfs,
+            'dtw_table': dtw_table, 'learning_parameters': dict(parameters)}
+
+
+def init_worker(state):
+    """
+    Stores the shared computation in the (worker) process.
+
+    :param state: the dictionary returned by shared_segmentation_state(), whose arrays can be published in shared memory
+        (see SharedArrays.share_state()).
+    """
+    _worker_state.clear()
+    _worker_state.update(attach_state(state))
+
+
+def evaluate_thresholds(thresholds):
+    """
+    Clusters the shared segmentation using the thresholds and learns the transitions.
+
+    :param thresholds: the pair (threshold_correlation, threshold_distance).
+    :return: A dictionary holding the thresholds, the number of 'modes' and 'transitions' and the learning 'time'.
+    """
+    threshold_correlation, threshold_distance = thresholds
+    state = _worker_state
+    learning_parameters = dict(state['learning_parameters'], threshold_correlation=threshold_correlation,
+                               threshold_distance=threshold_distance)
+    start = time.time()
+    P_modes, G = select_clustering(state['segmented_traj'], state['A'], state['b1'], state['clfs'], state['Y'],
+                                   state['t_list'], state['L_y'], learning_parameters,
+                                   learning_parameters['lmm_step_size'], state['dtw_table'])
+    transitions = compute_transitions(P_modes, state['position'], state['segmentedTrajectories'], state['L_y'],
+                                      learning_parameters['guard_degree'], state['Y'],
+                                      learning_parameters['variableType_datastruct'], len(state['segmented_traj']),
+                                      len(P_modes), optional_parameter(learning_parameters, 'guard_backend'),
+                                      optional_parameter(learning_parameters, 'guard_max_points'),
+                                      learning_parameters.get('jobs', 1))
+
+    return {'threshold_correlation': threshold_correlation, 'threshold_distance': threshold_distance,
+            'modes': len(P_modes), 'transitions': len(transitions), 'time': time.time() - start}
+
+
+def print_sweep_summary(summary, outputfilename):
+    """
+    Prints the summary table of the sweep as a CSV file, with a row for each configuration.
+
+    :param summary: the list returned by sweep_model().
+    :param outputfilename: name of the CSV file.
+    """
+    columns = SWEEP_PARAMETERS + ['segments', 'modes', 'transitions', 'time']
+    with open(outputfilename, "w", newline="") as f_out:
+        writer = csv.DictWriter(f_out, fieldnames=columns)
+        writer.writeheader()
+        for row in summary:
+            writer.writerow(row)
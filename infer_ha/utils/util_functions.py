@@ -28,6 +28,45 @@ def rel_diff(A, B):
         return mat_norm(A - B) / (mat_norm(A) + mat_norm(B))
 
 
+def least_squares_in_chunks(A, b, rows, chunk_rows):
+    """
+    Linear regression (without intercept) of b on A restricted to some rows, computed by accumulating the normal
+    equations A_i^T A_i and A_i^T b_i over chunks of rows, so that the matrix of the selected rows is never built. Used
+    when the memory budget is limited, see chunk_rows() in utils/cost_estimator.py.
+    @param A: numpy array of the features, one row per point.
+    @param b: numpy array of the targets, one row per point.
+    @param rows: the list of the positions of the rows to fit.
+    @param chunk_rows: number of rows of a chunk.
+    @return:
+        The coefficients as a numpy array of shape (columns of b, columns of A), as the attribute coef_ of sklearn's
+        LinearRegression.
+    """
+    AtA, Atb = normal_equations(A, b, rows, chunk_rows)
+    return np.linalg.lstsq(AtA, Atb, rcond=None)[0].T
+
+
+def normal_equations(A, b, rows, chunk_rows):
+    """
+    Accumulates the normal equations of the linear regression of b on A restricted to some rows. The normal equations of
+    disjoint sets of rows add up, e.g., over the shards of the sharded learning (see infer_ha/sharding.py).
+    @param A: numpy array of the features, one row per point.
+    @param b: numpy array of the targets, one row per point.
+    @param rows: the list of the positions of the rows to fit.
+    @param chunk_rows: number of rows of a chunk.
+    @return:
+        The pair (A^T A, A^T b) of numpy arrays in double precision.
+    """
+    AtA = np.zeros((A.shape[1], A.shape[1]))
+    Atb = np.zeros((A.shape[1], b.shape[1]))
+    rows = np.asarray(rows)
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        A_chunk = np.asarray(A[chunk], dtype=np.double)   # accumulated in double precision, see the option --precision
+        AtA += A_chunk.T.dot(A_chunk)
+        Atb += A_chunk.T.dot(np.asarray(b[chunk], dtype=np.double))
+    return AtA, Atb
+
+
 def matrowex(matr, l):
     """Pick some rows of a matrix to form a new matrix."""
     finalmat = None
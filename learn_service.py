@@ -0,0 +1,187 @@
+"""
+Runs the learning algorithm as a long-running service, so that the learning modules (sklearn, scipy, fastdtw and the
+libsvm library) are imported once and many small learning jobs are served at low latency.
+
+The service listens on a Unix socket (--socket), readable and writable only by the user running the service. A client
+sends a job as a single JSON line {"arguments": "..."}, where arguments is the string of the command line arguments of
+run.py (see utils/commandline_parser.py). The job runs in its own process, forked from the service (see
+run_job_in_process() in run_batch.py), with at most --jobs jobs at a time, and the service streams back JSON lines:
+    {"event": "progress", "stage": "clustering", "time": 2.11}     when each stage of the learning finishes,
+    {"event": "done", "model": "...", "result": {...}}             with the printed HA model, or
+    {"event": "failed", "result": {...}}                           with the 'status' and 'error' of the job.
+The result holds the time of each stage as in the summary of run_batch.py. A job exceeding --timeout is killed.
+
+The files of the jobs are confined to the directory of the service (--service-dir, readable only by its user): the
+output, log, trace, profile and precision report files of a job are written in <service-dir>/jobs/<job-id>/ and the
+stages are cached in <service-dir>/cache (see confine_job_files() in run_batch.py). Thus, a client can neither write the
+files of the service user nor make the service load a cache file it planted. The HA model is sent back from the result
+of the job.
+
+Usage:
+    python learn_service.py --jobs 4
+    python learn_service.py --submit '--input-filename "data/simu_oscillator_2.txt" ...'
+"""
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import socket
+import socketserver
+import warnings
+warnings.filterwarnings('ignore')   # disables FutureWarning in the use of clf.fit()
+
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Manager
+
+PROGRESS_POLL_INTERVAL = 0.1    # seconds between the checks of a job's completion while waiting for progress
+DEFAULT_SERVICE_DIR = "learnha_service"
+SOCKET_FILENAME = "learnha.sock"    # in the directory of the service
+
+
+class LearnerRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Serves one job per connection, streaming its progress and its result.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            arguments = request['arguments']
+        except (ValueError, KeyError, TypeError) as e:
+            self.send({'event': 'failed', 'result': {'status': 'failed', 'error': "invalid request: " + str(e)}})
+            return
+        service = self.server.service
+        job_id = next(service.job_ids)
+        progress = service.manager.Queue()
+        future = service.submit((job_id, arguments), progress)
+        while not future.done():
+            try:
+                stage, seconds = progress.get(timeout=PROGRESS_POLL_INTERVAL)
+                self.send({'event': 'progress', 'stage': stage, 'time': seconds})
+            except queue.Empty:
+                pass
+        while not progress.empty():
+            stage, seconds = progress.get()
+            self.send({'event': 'progress', 'stage': stage, 'time': seconds})
+
+        result = future.result()
+        if result['status'] != 'done':
+            self.send({'event': 'failed', 'result': result})
+            return
+        model = result.pop('model')
+        self.send({'event': 'done', 'model': model, 'result': result})
+
+    def send(self, message):
+        self.wfile.write((json.dumps(message) + "\n").encode())
+        self.wfile.flush()
+
+
+class LearnerService:
+    """
+    The state shared by the connections: the threads waiting for the processes of the jobs, the job counter and the
+    progress queues.
+    """
+
+    def __init__(self, workers=1, timeout=0, service_dir=DEFAULT_SERVICE_DIR):
+        # the learning modules are imported once here and inherited by the forked processes of the jobs, a client
+        # submitting jobs does not import them
+        from run_batch import import_learning_modules, run_job_in_process
+        import_learning_modules()
+        self.run_job_in_process = run_job_in_process
+        self.timeout = timeout
+        self.service_dir = service_dir
+        os.makedirs(service_dir, mode=0o700, exist_ok=True)
+        os.chmod(service_dir, 0o700)
+        self.job_ids = itertools.count()
+        self.manager = Manager()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def submit(self, job, progress):
+        """
+        :param job: the pair (job-id, arguments), see run_job() in run_batch.py.
+        :return: the future of the result of the job.
+        """
+        return self.executor.submit(self.run_job_in_process, job, self.timeout, progress, self.service_dir)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        self.manager.shutdown()
+
+
+def create_server(service, socket_path):
+    """
+    :param service: the LearnerService running the jobs.
+    :param socket_path: the path of the Unix socket to listen on. The socket is created with the permissions 0600.
+    :return: the server, a socketserver.BaseServer whose attribute service is the LearnerService.
+    """
+    if os.path.exists(socket_path):
+        os.remove(socket_path)  # left by a previous run of the service
+    umask = os.umask(0o177)     # no access for the other users from the creation of the socket
+    try:
+        server = socketserver.ThreadingUnixStreamServer(socket_path, LearnerRequestHandler)
+    finally:
+        os.umask(umask)
+    os.chmod(socket_path, 0o600)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def submit_job(address, arguments):
+    """
+    Sends a job to the service and yields the messages streamed back, see the description of this module.
+
+    :param address: the path of the Unix socket of the service.
+    :param arguments: the string of the command line arguments of run.py.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(address)
+        connection.sendall((json.dumps({'arguments': arguments}) + "\n").encode())
+        with connection.makefile("r") as f_in:
+            for line in f_in:
+                yield json.loads(line)
+
+
+def runLearnerService():
+    parser = argparse.ArgumentParser(description='Serves HA learning jobs over a Unix socket')
+    parser.add_argument('--service-dir', help='Directory of the service, where the files of the jobs are written. Set to '
+                        + DEFAULT_SERVICE_DIR + ' by default', type=str, default=DEFAULT_SERVICE_DIR, required=False)
+    parser.add_argument('--socket', help='Path of the Unix socket to listen on (or to submit to). Set to <service-dir>/'
+                        + SOCKET_FILENAME + ' by default', type=str, default='', required=False)
+    parser.add_argument('--jobs', help='Number of jobs run in parallel. Set to 1 by default', type=int, default=1,
+                        required=False)
+    parser.add_argument('--timeout', help='Maximum time in seconds of each job. Set to 0 (no limit) by default',
+                        type=int, default=0, required=False)
+    parser.add_argument('--submit', help='Submits the job, given as the command line arguments of run.py, to a running '
+                        'service and prints the progress and the HA model', type=str, default='', required=False)
+    args = vars(parser.parse_args())
+
+    address = args['socket'] or os.path.join(args['service_dir'], SOCKET_FILENAME)
+    if args['submit']:
+        for message in submit_job(address, args['submit']):
+            if message['event'] == 'progress':
+                print(message['stage'], "finished in", "{0:.2f}".format(message['time']), "seconds")
+            elif message['event'] == 'done':
+                print(message['model'])
+            else:
+                print("Job", message['result']['status'] + ":", message['result']['error'])
+        return
+
+    service = LearnerService(args['jobs'], args['timeout'], args['service_dir'])
+    server = create_server(service, address)
+    print("Learner service listening on", address, "running", args['jobs'], "jobs in parallel")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+        if os.path.exists(address):
+            os.remove(address)
+
+
+if __name__ == '__main__':
+    runLearnerService()
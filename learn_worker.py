@@ -0,0 +1,45 @@
+"""
+Runs the DTW comparisons and the guards of a learning run on this host. The workers connect to the coordinator started
+by run.py with the option --coordinator (see infer_ha/distributed.py), run its tasks and exit when the learning ends.
+
+Usage (from the project folder, on any host reaching the coordinator):
+    python learn_worker.py --connect learning-host:8766 --authkey <key printed by run.py> --processes 8
+"""
+
+import argparse
+import logging
+import sys
+import warnings
+warnings.filterwarnings('ignore')   # disables FutureWarning in the use of clf.fit()
+
+from concurrent.futures import ProcessPoolExecutor
+
+from infer_ha.distributed import run_worker, parse_address
+
+
+def runLearnerWorker():
+    parser = argparse.ArgumentParser(description='Runs the tasks of a coordinator of the learning (see run.py '
+                                                 '--coordinator)')
+    parser.add_argument('--connect', help='Address host:port of the coordinator', type=str, required=True)
+    parser.add_argument('--authkey', help='Secret key of the coordinator, printed by run.py --coordinator', type=str,
+                        required=True)
+    parser.add_argument('--processes', help='Number of worker processes on this host. Set to 1 by default', type=int,
+                        default=1, required=False)
+    parser.add_argument('--connect-timeout', help='Seconds during which the connection is retried while the coordinator '
+                        'is not started. Set to 60 by default', type=float, default=60, required=False)
+    args = vars(parser.parse_args())
+    logging.basicConfig(level=logging.WARNING, format="%(message)s", stream=sys.stdout)
+
+    address = parse_address(args['connect'])
+    arguments = (address, args['authkey'], args['connect_timeout'])
+    if args['processes'] <= 1:
+        tasks = run_worker(*arguments)
+    else:
+        with ProcessPoolExecutor(max_workers=args['processes']) as executor:
+            futures = [executor.submit(run_worker, *arguments) for _ in range(args['processes'])]
+            tasks = sum(future.result() for future in futures)
+    print("Worker finished", tasks, "tasks")
+
+
+if __name__ == '__main__':
+    runLearnerWorker()
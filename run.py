@@ -1,3 +1,4 @@
+import logging
 import sys
 import time
 import warnings
@@ -7,23 +8,26 @@ from infer_ha import infer_HA as learnHA     #infer_model, svm_classify
 from infer_ha.model_printer.print_HA import print_HA
 from utils.parse_parameters import parse_trajectories
 from utils.commandline_parser import read_commandline_arguments, process_type_annotation_parameters
+from infer_ha.sweep import parse_sweep_grid, sweep_model, print_sweep_summary
+from infer_ha.sharding import learn_sharded
+from utils.trace import start_trace, stop_trace, current_trace, trace_stage, write_trace
+from utils.profiling import Profiler, parse_profile_stages
+from utils.cost_estimator import estimate_cost, print_cost_estimate, check_memory_budget, MemoryBudgetExceeded
+from infer_ha.distributed import start_coordinator, stop_coordinator, parse_address
+from utils.precision_report import precision_report, print_precision_report, write_precision_report
 
 methods = ['dbscan', 'piecelinear', 'dtw']
 
 
-def runLearnHA():  # Calling the implementation from project BBC4CPS
-    '''
-    Hints:
-        To analysis the segmentation output: in the file "learnHA/infer_ha/infer_HA.py" uncomment the line 24 having "plot_segmentation_new(segmented_traj, L_y, t_list, Y, stepM)"
-        To analysis the clustering output: in the file "learnHA/infer_ha/infer_HA.py" uncomment the line 136 having "plot_after_clustering(t_list, L_y, P_modes, Y, stepM)"
-    @return:
-    '''
-    # input_filename, output_filename, list_of_trajectories, learning_parameters = read_command_line(sys.argv)
-    parameters = read_commandline_arguments()   # reads the command line values also can use -h to see help on usages
+def load_input(parameters):
+    """
+    Reads the input trajectories and completes the learning parameters read from the command line.
 
-    num_mode = parameters['modes']
+    :param parameters: the dictionary of arguments returned by read_commandline_arguments(). The step-size and the
+        type annotation data-structure are updated.
+    :return: the list of trajectories read from the input file.
+    """
     input_filename = parameters['input_filename']
-    output_filename = parameters['output_filename']
     default_user_stepsize = parameters['stepsize']
     list_of_trajectories, stepsize, system_dimension = parse_trajectories(input_filename)
     step_size = default_user_stepsize
@@ -44,12 +48,121 @@ def runLearnHA():  # Calling the implementation from project BBC4CPS
     parameters['stepsize'] = step_size   # we assume trajectories are sampled at fixed size time-step
     parameters['variableType_datastruct'] = variableType_datastruct
     # parameters['position'] = position
+
+    return list_of_trajectories
+
+
+def runLearnHA():  # Calling the implementation from project BBC4CPS
+    '''
+    Hints:
+        To analysis the segmentation output: in the file "learnHA/infer_ha/infer_HA.py" uncomment the line 24 having "plot_segmentation_new(segmented_traj, L_y, t_list, Y, stepM)"
+        To analysis the clustering output: in the file "learnHA/infer_ha/infer_HA.py" uncomment the line 136 having "plot_after_clustering(t_list, L_y, P_modes, Y, stepM)"
+    @return:
+    '''
+    # input_filename, output_filename, list_of_trajectories, learning_parameters = read_command_line(sys.argv)
+    parameters = read_commandline_arguments()   # reads the command line values also can use -h to see help on usages
+    logging.basicConfig(level=parameters['log_level'], format="%(message)s", stream=sys.stdout)
+    try:
+        learn(parameters)
+    except MemoryBudgetExceeded as error:
+        sys.exit(str(error))
+
+
+def learn(parameters):
+    """
+    Runs the learning requested by the command line arguments: estimates its cost (see the options --dry-run and
+    --memory-budget), starts the coordinator of the remote workers (see the option --coordinator) and learns the HA
+    model (see learn_with_profile()). Also used by the jobs of run_batch.py and learn_service.py.
+
+    :param parameters: the dictionary of arguments returned by read_commandline_arguments().
+    :raise MemoryBudgetExceeded: if the estimated memory of the learning exceeds the memory budget.
+    """
+    if parameters['dry_run'] or parameters['memory_budget'] > 0:
+        estimate = estimate_cost(parameters)
+        if parameters['dry_run']:
+            print_cost_estimate(estimate)
+        warning = check_memory_budget(estimate, parameters['memory_budget'])
+        if warning is not None:
+            logging.warning(warning)
+        if parameters['dry_run']:
+            return
+
+    if parameters['coordinator']:  # the DTW comparisons and the guards are computed by the workers, see learn_worker.py
+        coordinator = start_coordinator(parse_address(parameters['coordinator']), parameters['coordinator_authkey'],
+                                        parameters['straggler_timeout'])
+        print("Coordinator listening on %s:%d, start the workers with: python learn_worker.py --connect %s:%d "
+              "--authkey %s" % (coordinator.address + coordinator.address + (coordinator.authkey,)))
+    try:
+        learn_with_profile(parameters)
+    finally:
+        stop_coordinator()
+
+
+def learn_with_profile(parameters):
+    """
+    Learns the HA model, tracing (see the options --trace-file and --trace-header) and profiling (see the option
+    --profile) the learning if requested. The trace is stopped and written also when the learning fails.
+    """
+    if parameters['trace_file'] or parameters['trace_header']:
+        start_trace(parameters['trace_memory'] == 1)
+    try:
+        if parameters['profile'] == 'none':
+            learn_and_print(parameters)
+        else:
+            learn_and_profile(parameters)
+    finally:
+        trace = stop_trace()
+        if parameters['trace_file'] and trace is not None:
+            write_trace(trace, parameters['trace_file'])
+
+
+def learn_and_profile(parameters):
+    """
+    Learns the HA model and writes the profile of the learning, see the option --profile.
+    """
+    profiler = Profiler(parameters['profile'], parse_profile_stages(parameters['profile_stages']),
+                        parameters['profile_interval'])
+    profiler.start()
+    try:
+        learn_and_print(parameters)
+    finally:
+        profiler.stop()
+        profile_files = profiler.write(parameters['profile_output'] or parameters['output_filename'])
+        print("Profile written to", " and ".join(profile_files))
+
+
+def learn_and_print(parameters):
+    """
+    Learns the HA model from the input trajectories and prints it in the output file (or prints the summary of the sweep).
+
+    :param parameters: the dictionary of arguments returned by read_commandline_arguments().
+    """
+    num_mode = parameters['modes']
+    output_filename = parameters['output_filename']
+    with trace_stage('parse'):
+        list_of_trajectories = load_input(parameters)
     end = time.time()  # creation of variable end
 
+    if len(parameters['sweep_grid']) >= 1:  # sweep mode: prints the summary table of all the configurations
+        grid = parse_sweep_grid(parameters['sweep_grid'])
+        summary = sweep_model(list_of_trajectories, parameters, grid, parameters['jobs'])
+        print_sweep_summary(summary, output_filename)
+        return
+
+    if parameters['precision_report']:  # validates the learning in float32 against float64
+        report = precision_report(list_of_trajectories, parameters)
+        print_precision_report(report)
+        write_precision_report(report, parameters['precision_report'])
+        print("Precision report written to", parameters['precision_report'])
+
     start = time.time()
     #################################################################################################
     # P, G, mode_inv, transitions = learnHA.infer_model(list_of_trajectories, learning_parameters)
-    P_modes, G, mode_inv, transitions, position = learnHA.infer_model(list_of_trajectories, parameters)
+    if parameters['shards'] > 1:    # the modes of the shards are learned independently and merged
+        P_modes, G, mode_inv, transitions, position = learn_sharded(list_of_trajectories, parameters,
+                                                                    parameters['shards'], parameters['jobs'])
+    else:
+        P_modes, G, mode_inv, transitions, position = learnHA.infer_model(list_of_trajectories, parameters)
     # Note P is the Segmented data. G is the coefficients of the ODE and boundary is the guard conditions
     #################################################################################################
     end = time.time()
@@ -59,9 +172,9 @@ def runLearnHA():  # Calling the implementation from project BBC4CPS
     # print("Number of modes chosen =", num_mode)
     # print("Number of modes learned = ", len(P_modes))
 
-    print_HA(P_modes, G, mode_inv, transitions, position, parameters, output_filename)   # prints an HA model file inside the folder outputs/
-
-    return
+    trace = current_trace() if parameters['trace_header'] else None
+    with trace_stage('print'):
+        print_HA(P_modes, G, mode_inv, transitions, position, parameters, output_filename, trace)   # prints an HA model file inside the folder outputs/
 
 # runLearnHA()
 
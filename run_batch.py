@@ -0,0 +1,309 @@
+"""
+Learns HA models for many jobs in a single run, running several jobs in parallel processes.
+
+The jobs are listed in a manifest file with one job per line. A job is given by the command line arguments of run.py
+(see utils/commandline_parser.py), including the input and the output file names. Empty lines and lines starting with
+'#' are ignored. Eg.:
+    --input-filename "data/simu_oscillator_2.txt" --output-filename "oscillator_2.txt" --size-input-variable 0 --size-output-variable 2
+    --input-filename "data/simu_bball_4.txt" --output-filename "bball_4.txt" --size-input-variable 0 --size-output-variable 2 --guard-degree 2
+
+The learning modules are imported once by the batch process, and each job runs in its own process forked from it, so
+the modules are loaded (warm) in every job (see run_job_in_process()). A job failing, crashing or exceeding the timeout
+does not stop the other jobs. The timeout is enforced by the batch process, which kills the process of the job: a job
+stuck in native code (numpy, scikit-learn, libsvm) is stopped too. A job is learned as by run.py, with all its options
+(e.g., --shards, --sweep-grid, --trace-file or --profile, see learn() in run.py). The output printed by a job is
+written in the file <output-filename>.log and the status and the time of each stage of all the jobs are written in a
+summary table (CSV).
+
+Usage:
+    python run_batch.py --manifest jobs.txt --jobs 4 --timeout 3600 --summary batch_summary.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import importlib
+import logging
+import multiprocessing
+import os
+import shlex
+import threading
+import time
+import warnings
+warnings.filterwarnings('ignore')   # disables FutureWarning in the use of clf.fit()
+
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.commandline_parser import read_commandline_arguments
+from utils.trace import add_stage_listener, remove_stage_listener
+from run import learn
+
+STAGES = ['parse', 'derivatives', 'segmentation', 'filtering', 'clustering', 'invariants', 'transitions', 'print']
+MAXIMUM_ATTEMPTS = 2    # a job whose process crashed is run again once
+JOB_FILE_PARAMETERS = ['output_filename', 'trace_file', 'profile_output', 'precision_report']  # files written by a job
+# the modules imported by the learning algorithm in the functions using them (see, e.g., cluster_by_dtw.py or guards.py)
+LEARNING_MODULES = ['sklearn.linear_model', 'sklearn.svm', 'sklearn.preprocessing', 'sklearn.cluster', 'fastdtw',
+                    'scipy.spatial', 'scipy.spatial.distance', 'infer_ha.libsvm.svmutil', 'infer_ha.libsvm.commonutil',
+                    'infer_ha.clustering.gridSearch_fromSKLearn']
+
+
+def import_learning_modules():
+    """
+    Imports the modules of LEARNING_MODULES, so that the processes of the jobs forked afterwards do not import them.
+    """
+    for module in LEARNING_MODULES:
+        importlib.import_module(module)
+
+
+def read_manifest(manifest_filename):
+    """
+    :param manifest_filename: name of the manifest file.
+    :return: the list of the jobs. Each job is the string of the command line arguments of run.py.
+    """
+    jobs = []
+    with open(manifest_filename) as f_in:
+        for line in f_in:
+            line = line.strip()
+            if len(line) > 0 and not line.startswith("#"):
+                jobs.append(line)
+    return jobs
+
+
+def confine_job_files(parameters, service_dir, job_id):
+    """
+    Moves the files written and read by a job of the learner service (see learn_service.py) into the directory of the
+    service: the output files (see JOB_FILE_PARAMETERS) into <service_dir>/jobs/<job-id>/ with their base names, and the
+    cache of the stages (see the option --cache-dir) into <service_dir>/cache.
+
+    :param parameters: the dictionary of arguments returned by read_commandline_arguments(), updated.
+    :param service_dir: the directory owned by the service.
+    :param job_id: the id of the job.
+    """
+    job_dir = os.path.join(service_dir, "jobs", str(job_id))
+    os.makedirs(job_dir, mode=0o700, exist_ok=True)
+    for name in JOB_FILE_PARAMETERS:
+        if parameters[name]:
+            filename = os.path.basename(parameters[name])
+            if filename in ('', '.', '..'):
+                filename = name
+            parameters[name] = os.path.join(job_dir, filename)
+    if parameters['cache_dir']:
+        parameters['cache_dir'] = os.path.join(service_dir, "cache")
+
+
+def run_job(job, progress=None, service_dir=''):
+    """
+    Learns and prints the HA model of a job. All the errors are caught and reported in the result.
+
+    :param job: the pair (job-id, arguments), where arguments is the string of the command line arguments of run.py.
+    :param progress: an optional queue receiving the pair (stage, time in seconds) when each stage in STAGES finishes.
+        The job is learned as by run.py (see learn() in run.py), the stages are timed by a StageTimer.
+    :param service_dir: for a job of the learner service, the directory where the files of the job are confined (see
+        confine_job_files()). The printed HA model is then also returned in the result as 'model'.
+    :return: A dictionary holding the 'job' id, the 'arguments', the 'status' (done or failed), the 'error' message, the
+        'total' time and the time in seconds of each stage in STAGES.
+    """
+    job_id, arguments = job
+    result = {'job': job_id, 'arguments': arguments, 'status': 'done', 'error': ''}
+    start = time.time()
+    try:
+        parameters = read_commandline_arguments(shlex.split(arguments))
+        if service_dir:
+            confine_job_files(parameters, service_dir, job_id)
+        output_filename = parameters['output_filename']
+        timer = StageTimer(result, progress)
+        with open(output_filename + ".log", "w") as f_log, contextlib.redirect_stdout(f_log), \
+                log_to_file(f_log, parameters['log_level']):
+            add_stage_listener(timer)
+            try:
+                learn(parameters)
+            finally:
+                remove_stage_listener(timer)
+        if service_dir:
+            result['model'] = ''    # a dry run (see the option --dry-run) prints no model
+            if os.path.exists(output_filename):
+                with open(output_filename) as f_in:
+                    result['model'] = f_in.read()
+    except (Exception, SystemExit) as e:   # argparse and some stages exit on invalid arguments
+        result['status'] = 'failed'
+        result['error'] = type(e).__name__ + ": " + str(e)
+    result['total'] = time.time() - start
+
+    return result
+
+
+def send_job_result(connection, job, progress, service_dir):
+    """
+    The body of the process of a job, see run_job_in_process().
+    """
+    connection.send(run_job(job, progress, service_dir))
+    connection.close()
+
+
+def run_job_in_process(job, timeout=0, progress=None, service_dir=''):
+    """
+    Runs run_job() in a new process, killed when it exceeds the timeout. The process is forked, hence the modules
+    imported by this process (see import_learning_modules()) are loaded in the job.
+
+    :param job: the pair (job-id, arguments), see run_job().
+    :param timeout: the maximum time in seconds of the job (0 for no limit).
+    :param progress: see run_job(). It must be shareable with the process, e.g., a multiprocessing queue.
+    :param service_dir: see run_job().
+    :return: the result of run_job(), or a result with the status 'timeout' when the process was killed, or 'failed'
+        with the error "worker process crashed" when the process ended without a result (e.g., killed by the system).
+    """
+    job_id, arguments = job
+    start = time.time()
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    # not a daemon: a job learning shards starts its own processes (see infer_ha/sharding.py)
+    process = multiprocessing.Process(target=send_job_result, args=(writer, job, progress, service_dir))
+    process.start()
+    writer.close()
+    result = {'job': job_id, 'arguments': arguments, 'status': 'failed', 'error': "worker process crashed"}
+    try:
+        if reader.poll(timeout if timeout > 0 else None):   # a result, or the end of the pipe when the process ended
+            result = reader.recv()
+        else:
+            result['status'] = 'timeout'
+            result['error'] = "exceeded " + str(timeout) + " seconds"
+    except EOFError:
+        pass
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        reader.close()
+    result.setdefault('total', time.time() - start)
+    return result
+
+
+def run_job_attempts(job, timeout):
+    """
+    Runs a job in a new process (see run_job_in_process()), again if the process crashed, up to MAXIMUM_ATTEMPTS times.
+    """
+    for attempt in range(MAXIMUM_ATTEMPTS):
+        result = run_job_in_process(job, timeout)
+        if result['status'] != 'failed' or result['error'] != "worker process crashed":
+            break
+    return result
+
+
+@contextlib.contextmanager
+def log_to_file(f_log, level):
+    """
+    Writes the messages logged by the learning algorithm during the body of the with-statement in f_log.
+    """
+    handler = logging.StreamHandler(f_log)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    root = logging.getLogger()
+    previous_level = root.level
+    root.addHandler(handler)
+    root.setLevel(level)
+    try:
+        yield
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(previous_level)
+
+
+class StageTimer:
+    """
+    A stage listener (see add_stage_listener() in utils/trace.py) recording the wall-clock time of the stages in STAGES
+    in the result of a job, and reporting their progress.
+    """
+
+    def __init__(self, result, progress=None):
+        self.result = result
+        self.progress = progress
+        self.starts = {}    # (thread id, stage): time.time() at the start of the stage
+        self.lock = threading.Lock()
+        self.pid = os.getpid()  # the stages of the processes learning shards are not timed (see infer_ha/sharding.py)
+
+    def stage_started(self, name):
+        if name in STAGES and os.getpid() == self.pid:
+            with self.lock:
+                self.starts[(threading.get_ident(), name)] = time.time()
+
+    def stage_finished(self, name):
+        if name not in STAGES or os.getpid() != self.pid:
+            return
+        with self.lock:
+            seconds = time.time() - self.starts.pop((threading.get_ident(), name))
+            self.result[name] = self.result.get(name, 0.0) + seconds
+        if self.progress is not None:
+            self.progress.put((name, seconds))
+
+    def task_started(self, graph_thread):
+        pass
+
+    def task_finished(self):
+        pass
+
+
+def run_batch(jobs, workers=1, timeout=0):
+    """
+    Runs the jobs in parallel processes, one per job (see run_job_in_process()).
+
+    :param jobs: the list of the jobs, each is a string of the command line arguments of run.py.
+    :param workers: the number of jobs run in parallel. With 1 and no timeout, the jobs are run in this process.
+    :param timeout: the maximum time in seconds of each job (0 for no limit).
+    :return: the list of the results returned by run_job(), in the order of the jobs.
+    """
+    results = []
+    if workers <= 1 and timeout <= 0:
+        for job_id, job in enumerate(jobs):
+            results.append(run_job((job_id, job)))
+            report(results[-1])
+        return results
+
+    import_learning_modules()
+    # each thread waits for the process of a job, see run_job_in_process()
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        futures = [executor.submit(run_job_attempts, (job_id, job), timeout) for job_id, job in enumerate(jobs)]
+        for future in futures:
+            results.append(future.result())
+            report(results[-1])
+    return results
+
+
+def report(result):
+    print("Job", result['job'], result['status'], "in", "{0:.2f}".format(result.get('total', 0)), "seconds", result['error'])
+
+
+def print_batch_summary(results, outputfilename):
+    """
+    Prints the status and the time of each stage of all the jobs as a CSV file.
+
+    :param results: the list returned by run_batch().
+    :param outputfilename: name of the CSV file.
+    """
+    columns = ['job', 'status', 'error', 'total'] + STAGES + ['arguments']
+    with open(outputfilename, "w", newline="") as f_out:
+        writer = csv.DictWriter(f_out, fieldnames=columns, restval='')
+        writer.writeheader()
+        for result in results:
+            writer.writerow(result)
+
+
+def runBatch():
+    parser = argparse.ArgumentParser(description='Learns HA models for a list of jobs using parallel processes')
+    parser.add_argument('--manifest', help='File listing the jobs, one per line as the command line arguments of run.py',
+                        type=str, required=True)
+    parser.add_argument('--jobs', help='Number of jobs run in parallel. Set to 1 by default', type=int, default=1,
+                        required=False)
+    parser.add_argument('--timeout', help='Maximum time in seconds of each job. Set to 0 (no limit) by default',
+                        type=int, default=0, required=False)
+    parser.add_argument('--summary', help='Output CSV file with the status and the time of each stage of every job. '
+                        'Set to batch_summary.csv by default', type=str, default='batch_summary.csv', required=False)
+    args = vars(parser.parse_args())
+
+    jobs = read_manifest(args['manifest'])
+    start = time.time()
+    results = run_batch(jobs, args['jobs'], args['timeout'])
+    print_batch_summary(results, args['summary'])
+    failed = sum(1 for result in results if result['status'] != 'done')
+    print("Total jobs =", len(jobs), " failed =", failed, " time =", "{0:.2f}".format(time.time() - start), "seconds")
+
+
+if __name__ == '__main__':
+    runBatch()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+from sklearn import linear_model
+
+from infer_ha.infer_transitions.compute_assignments import compute_all_assignments
+from infer_ha.infer_transitions.apply_annotation import apply_annotation
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestAssignments(unittest.TestCase):
+
+    def test_compute_all_assignments(self):
+        print("Running test compute_all_assignments module")
+        rng = np.random.RandomState(0)
+        Y = rng.normal(size=(300, 3))
+        Y[:, 2] = 4.0   # a constant variable makes the regression rank deficient
+        list_of_connection_pts = [rng.randint(0, 300, size=(n, 3)).tolist() for n in [1, 2, 7, 40, 41, 100]]
+
+        assign_coeffs, assign_intercepts = compute_all_assignments(list_of_connection_pts, 3, Y)
+        for list_connection_pt, coeff, intercept in zip(list_of_connection_pts, assign_coeffs, assign_intercepts):
+            x_pts = [Y[connection_pt[1]] for connection_pt in list_connection_pt]
+            y_pts = [Y[connection_pt[2]] for connection_pt in list_connection_pt]
+            lin_reg = linear_model.LinearRegression().fit(x_pts, y_pts)
+            np.testing.assert_allclose(coeff, lin_reg.coef_, atol=1e-10)
+            np.testing.assert_allclose(intercept, lin_reg.intercept_, atol=1e-10)
+
+    def test_apply_annotation_pool_values(self):
+        Y = np.array([[0.0, 10.0], [1.0, 20.0], [2.0, 20.0], [3.0, 30.0], [4.0, 10.0]])
+        list_connection_pt = [[0, 0, 1], [0, 0, 2], [0, 0, 3], [0, 0, 4]]
+        variableType_datastruct = [[0, 'x0', 't1', '', ''], [1, 'x1', 't2', [10.0, 20.0, 30.0], '']]
+
+        coeff, intercept = apply_annotation(Y, variableType_datastruct, list_connection_pt, np.ones((2, 2)),
+                                            np.ones(2))
+        np.testing.assert_array_equal(coeff, [[1, 0], [0, 0]])
+        np.testing.assert_array_equal(intercept, [0, 20.0])   # majority polling of the start-points
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import csv
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from run_batch import run_batch, print_batch_summary, read_manifest
+
+
+def stuck_job(job, progress, service_dir):
+    time.sleep(60)
+
+
+def crashing_job(job, progress, service_dir):
+    os._exit(1)
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestBatch(unittest.TestCase):
+
+    def test_run_batch(self):
+        print("Running test batch module")
+        with tempfile.TemporaryDirectory() as output_dir:
+            good_output = os.path.join(output_dir, "oscillator_2.txt")
+            bad_output = os.path.join(output_dir, "missing.txt")
+            manifest = os.path.join(output_dir, "jobs.txt")
+            with open(manifest, "w") as f_out:
+                f_out.write("# a job learning the oscillator and a job with a missing input file\n\n")
+                f_out.write('--input-filename "data/test_data/simu_oscillator_2.txt" --output-filename "' + good_output
+                            + '" --size-input-variable 0 --size-output-variable 2 --threshold-correlation 0.89\n')
+                f_out.write('--input-filename "data/test_data/missing.txt" --output-filename "' + bad_output
+                            + '" --size-input-variable 0 --size-output-variable 2\n')
+            jobs = read_manifest(manifest)
+            self.assertEqual(len(jobs), 2)
+
+            results = run_batch(jobs)
+            # the failing job does not stop the other jobs
+            self.assertEqual(results[0]['status'], 'done')
+            self.assertTrue(os.path.isfile(good_output))
+            self.assertTrue(os.path.isfile(good_output + ".log"))
+            self.assertEqual(results[1]['status'], 'failed')
+            self.assertIn("missing.txt", results[1]['error'])
+
+            summary = os.path.join(output_dir, "summary.csv")
+            print_batch_summary(results, summary)
+            with open(summary) as f_in:
+                rows = list(csv.DictReader(f_in))
+            self.assertEqual([row['status'] for row in rows], ['done', 'failed'])
+            self.assertGreaterEqual(float(rows[0]['clustering']), 0.0)
+
+    def test_run_options(self):
+        # a job is learned with the options of run.py, not only the learning parameters
+        with tempfile.TemporaryDirectory() as output_dir:
+            output = os.path.join(output_dir, "o.txt")
+            job = '--input-filename "data/test_data/simu_oscillator_2.txt" --output-filename "' + output + \
+                  '" --size-input-variable 0 --size-output-variable 2 --threshold-correlation 0.89 --shards 2 ' \
+                  '--trace-file "' + os.path.join(output_dir, "t.json") + '" --precision-report "' + \
+                  os.path.join(output_dir, "p.json") + '"'
+            results = run_batch([job, job + " --memory-budget 0.001"])
+            self.assertEqual(results[0]['status'], 'done')
+            self.assertTrue(os.path.isfile(output))
+            self.assertTrue(os.path.isfile(os.path.join(output_dir, "p.json")))
+            with open(os.path.join(output_dir, "t.json")) as f_in:
+                stages = [stage['stage'] for stage in json.load(f_in)['stages']]
+            self.assertIn('shards', stages)     # learned as a sharded set of trajectories
+            self.assertGreater(results[0]['parse'], 0.0)
+            self.assertGreater(results[0]['print'], 0.0)
+            self.assertEqual(results[1]['status'], 'failed')
+            self.assertIn("MemoryBudgetExceeded", results[1]['error'])
+
+    def test_timeout(self):
+        # the process of a job exceeding the timeout is killed by the batch process
+        start = time.time()
+        with mock.patch('run_batch.run_job', stuck_job):
+            results = run_batch(["job 0", "job 1"], workers=2, timeout=1)
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual([result['status'] for result in results], ['timeout', 'timeout'])
+        self.assertEqual(results[0]['error'], "exceeded 1 seconds")
+
+        with mock.patch('run_batch.run_job', crashing_job):
+            results = run_batch(["job 0"], workers=2)
+        self.assertEqual(results[0]['status'], 'failed')
+        self.assertEqual(results[0]['error'], "worker process crashed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from benchmarks.scaling import run_micro_benchmarks, run_scaling_curve
+from benchmarks.systems import SYSTEMS, generate_trajectories
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_synthetic_systems(self):
+        print("Running test benchmarks module")
+        for system in SYSTEMS:
+            list_of_trajectories = generate_trajectories(system, dimension=3, modes=3, trajectories=2, length=50)
+            self.assertEqual(len(list_of_trajectories), 2)
+            t_list, y_list = list_of_trajectories[0]
+            self.assertEqual(t_list[0].shape, (50,))
+            self.assertEqual(y_list[0].shape, (50, 2 if system in ['oscillator', 'bouncing_ball'] else 3))
+            self.assertEqual(t_list[0][0], 0.0)     # a new trajectory starts at time 0, see parse_trajectories()
+        # the linear system visits its modes in sequence: the clock x0 is reset after the last mode
+        y_points = generate_trajectories('linear', dimension=2, modes=2, trajectories=1, length=400)[0][1][0]
+        self.assertLess(y_points[:, 0].max(), 2.01)
+        self.assertLess(y_points[-1, 0], y_points[:, 0].max())
+
+    def test_scaling_curve(self):
+        micro = run_micro_benchmarks('oscillator', 2, 2, trajectories=1, length=200, repeats=1)
+        self.assertEqual([result['kernel'] for result in micro], ['derivatives', 'rel_diff_scan', 'dtw', 'guard'])
+        results = run_scaling_curve('thermostat', 'trajectories', [1, 2],
+                                    {'trajectories': 1, 'length': 300, 'dimension': 2, 'modes': 2})
+        self.assertEqual([result['trajectories'] for result in results], [1, 2])
+        for result in results:
+            self.assertIsNone(result['error'])
+            self.assertIn('clustering', result['stages'])
+            self.assertGreater(result['counters']['dtw_calls'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from infer_ha.infer_transitions.connecting_points import create_connecting_points, create_position_mode_lookup
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestConnectingPoints(unittest.TestCase):
+
+    def test_create_connecting_points(self):
+        print("Running test create_connecting_points module")
+        # Two trajectories of positions 0..29 and 30..49. Segments are of type [start, pre_end, end]
+        segmentedTrajectories = [[[0, 8, 9], [10, 18, 19], [20, 28, 29]], [[30, 38, 39], [40, 48, 49]]]
+        P_modes = [[([0, 9], [0, 9], list(range(0, 10))), ([20, 29], [20, 29], list(range(20, 30))),
+                    ([40, 49], [40, 49], list(range(40, 50)))],
+                   [([10, 19], [10, 19], list(range(10, 20))), ([30, 39], [30, 39], list(range(30, 40)))]]
+        position = [[0, 29], [30, 49]]
+
+        data_points = create_connecting_points(P_modes, position, segmentedTrajectories)
+
+        # forward transition (0, 1) is followed by the backward transition (1, 0)
+        self.assertEqual(data_points, [[0, 1, [[8, 9, 10]]],
+                                       [1, 0, [[18, 19, 20], [38, 39, 40]]]])
+
+    def test_no_modes(self):
+        mode_positions, mode_ids = create_position_mode_lookup([])
+        self.assertEqual(len(mode_positions), 0)
+        self.assertEqual(mode_ids, [])
+        self.assertEqual(create_connecting_points([], [[0, 29]], [[[0, 8, 9], [10, 18, 19], [20, 28, 29]]]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import multiprocessing
+import threading
+import time
+import unittest
+from multiprocessing.connection import Client, AuthenticationError
+
+from infer_ha.distributed import Coordinator, RemoteTaskError, run_worker, start_coordinator, stop_coordinator
+from infer_ha.learner import Learner
+from tests.test_learner import learning_parameters
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+def failing_worker(address, authkey, reply):
+    """
+    Receives a task and disconnects (reply=False, as a crashed worker) or never replies (reply=True, as a straggler).
+    """
+    connection = Client(address, authkey=authkey.encode())
+    connection.recv()
+    if reply:
+        time.sleep(2)
+    connection.close()
+
+
+class TestDistributed(unittest.TestCase):
+
+    def test_retries_and_stragglers(self):
+        print("Running test distributed module")
+        coordinator = Coordinator(straggler_timeout=0.5)
+        signal = [[0.0, 1.0], [0.5, 1.5], [1.0, 2.0]]
+        results = []
+        try:
+            mapping = threading.Thread(target=lambda: results.extend(
+                coordinator.map('dtw_block', [(signal, [signal, signal]), (signal, [signal])])))
+            mapping.start()
+            crashed = threading.Thread(target=failing_worker, args=(coordinator.address, coordinator.authkey, False))
+            crashed.start()
+            crashed.join()  # the first task is lost and dispatched again to the next worker
+            straggler = threading.Thread(target=failing_worker, args=(coordinator.address, coordinator.authkey, True),
+                                         daemon=True)
+            straggler.start()
+            time.sleep(0.2)
+            worker = threading.Thread(target=run_worker, args=(coordinator.address, coordinator.authkey))
+            worker.start()  # runs the second task, then the first task when it is straggling
+            mapping.join(10)
+            self.assertEqual([len(result) for result in results], [2, 1])
+            self.assertAlmostEqual(results[0][0][0], 0.0)
+
+            with self.assertRaises(RemoteTaskError):
+                coordinator.map('dtw_block', [(signal, None)])  # fails in all the attempts
+        finally:
+            coordinator.close()
+        worker.join()   # the worker is stopped by the coordinator
+
+    def test_distributed_learning(self):
+        parameters, list_of_trajectories = learning_parameters(guard_degree=2)
+        model = Learner(list_of_trajectories, parameters).infer_model()
+
+        coordinator = start_coordinator()   # on the local host with a random key
+        self.assertEqual(coordinator.address[0], '127.0.0.1')
+        with self.assertRaises(AuthenticationError):    # a worker without the key is refused
+            run_worker(coordinator.address, 'learnha')
+        workers = [multiprocessing.Process(target=run_worker, args=(coordinator.address, coordinator.authkey))
+                   for _ in range(3)]
+        try:
+            for worker in workers:
+                worker.start()
+            distributed_model = Learner(list_of_trajectories, dict(parameters, jobs=2)).infer_model()
+        finally:
+            stop_coordinator()
+            for worker in workers:
+                worker.join()
+        self.assertEqual(str(distributed_model), str(model))
+        self.assertEqual([worker.exitcode for worker in workers], [0, 0, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from scipy.sparse import csr_matrix
+from scipy.spatial.distance import cdist
+
+from infer_ha.infer_transitions.guards import get_coeffs, getGuard_inequality, explicit_guard_features, \
+    get_linear_coeffs, select_guard_backend
+from infer_ha.infer_transitions.guard_coreset import select_guard_coreset
+from infer_ha.infer_transitions.svm_operations import svm_model_training, linear_svm_training
+from infer_ha.libsvm.svmutil import svm_predict
+from utils.polynomial_basis import multinomial_expansion, evaluate_monomials
+
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+def evaluate_guard(guard_coeff, x, L_y, boundary_order):
+    """
+    Evaluates the guard polynomial, in the term order of the multinomial expansion, at the points x.
+    """
+    coefficients, exponents = multinomial_expansion(L_y + 1, boundary_order)
+    return evaluate_monomials(x, exponents[:, :L_y]).dot(np.array(guard_coeff))
+
+
+class TestGuards(unittest.TestCase):
+
+    def test_get_coeffs_matches_svm_decision_values(self):
+        print("Running test get_coeffs module")
+        rng = np.random.RandomState(0)
+        x = rng.uniform(-1, 1, size=(60, 2))
+        y = [1 if (x0 ** 2 + x1 ** 2) < 0.5 else -1 for x0, x1 in x]
+        y[0] = 1    # the first label decides the sign of the decision values returned by libsvm
+
+        for boundary_order in [1, 2, 3]:
+            L_y = x.shape[1]
+            gamma = float(1 / L_y)
+            m = svm_model_training(x.tolist(), y, boundary_order, 100, 1, gamma)
+            guard_coeff = get_coeffs(L_y, m, gamma, order=boundary_order)
+            p_label, p_acc, p_val = svm_predict(y, x.tolist(), m, '-q')
+
+            guard_values = evaluate_guard(guard_coeff, x, L_y, boundary_order)
+            np.testing.assert_allclose(guard_values, np.array(p_val)[:, 0], rtol=1e-6, atol=1e-6)
+
+    def test_linear_guard_backend(self):
+        print("Running test getGuard_inequality module with the linear backend")
+        rng = np.random.RandomState(1)
+        Y = np.c_[rng.uniform(0, 10, size=200), rng.uniform(-5, 5, size=200)]
+        Y[:, 0] += np.where(Y[:, 1] > 0, 12, 0)    # two classes separated by the line x1 = 0 (after the shift)
+        srcData = [i for i in range(200) if Y[i, 1] > 0][:50]
+        destData = [i for i in range(200) if Y[i, 1] <= 0][:50]
+
+        guard_coeff = getGuard_inequality(srcData, destData, 2, 1, Y, guard_backend="linear")
+        self.assertEqual(len(guard_coeff), 3)
+        guard_values = evaluate_guard(guard_coeff, Y, 2, 1)    # guard_coeff is already inverse scaled
+        self.assertTrue(np.all(guard_values[srcData] > 0))
+        self.assertTrue(np.all(guard_values[destData] < 0))
+
+    def test_explicit_guard_backend(self):
+        print("Running test explicit_guard_features module")
+        rng = np.random.RandomState(2)
+        x = rng.uniform(0, 1, size=(300, 2))
+        radius = (x[:, 0] - 0.5) ** 2 + (x[:, 1] - 0.5) ** 2
+        x = x[(radius < 0.05) | (radius > 0.09)]    # leaving a gap between the two classes
+        y = np.where(((x[:, 0] - 0.5) ** 2 + (x[:, 1] - 0.5) ** 2) < 0.05, 1, -1)
+
+        features = explicit_guard_features(csr_matrix(x), 2, 2)
+        clf = linear_svm_training(features, y, 100)
+        guard_coeff = get_linear_coeffs(features.shape[1], clf)
+
+        self.assertEqual(len(guard_coeff), len(multinomial_expansion(3, 2)[0]))   # same format as get_coeffs()
+        self.assertEqual(clf.score(features, y), 1.0)
+        np.testing.assert_allclose(evaluate_guard(guard_coeff, x, 2, 2), clf.decision_function(features))
+
+    def test_select_guard_backend(self):
+        self.assertEqual(select_guard_backend("auto", 1, 10), "linear")
+        self.assertEqual(select_guard_backend("auto", 3, 2), "explicit")
+        self.assertEqual(select_guard_backend("auto", 4, 20), "kernel")
+        self.assertEqual(select_guard_backend("kernel", 1, 2), "kernel")
+
+    def test_select_guard_coreset(self):
+        print("Running test guard_coreset module")
+        rng = np.random.RandomState(3)
+        x = np.r_[rng.uniform(0, 0.5, size=(500, 2)), rng.uniform(0.5, 1, size=(300, 2))]
+        x[1:100] = x[0]     # near-identical points
+        y = np.r_[np.ones(500), -np.ones(300)]
+
+        index = select_guard_coreset(csr_matrix(x), y, 100)
+        self.assertEqual(np.sum(y[index] == 1), 100)
+        self.assertEqual(np.sum(y[index] == -1), 100)
+        self.assertEqual(len(np.unique(x[index], axis=0)), len(index))     # the duplicates are kept once
+        closest = np.argmin(cdist(x[:500], x[500:]).min(axis=1))
+        self.assertIn(closest, index)   # the point closest to the other class is kept
+        np.testing.assert_array_equal(select_guard_coreset(x, y, 0), np.arange(800))   # disabled
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+from scipy.spatial import ConvexHull
+
+from infer_ha.infer_invariants.invariants import compute_invariant
+from infer_ha.infer_invariants.mode_statistics import compute_mode_statistics
+from infer_ha.infer_invariants.polyhedral_invariants import compute_octagon_constraints, \
+    compute_convex_hull_constraints, compute_polyhedral_invariant, filter_extreme_points, octagon_directions
+from infer_ha.model_printer.print_invariant import print_linear_constraint
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestInvariants(unittest.TestCase):
+
+    def test_compute_mode_statistics(self):
+        print("Running test mode_statistics module")
+        rng = np.random.RandomState(0)
+        Y = rng.normal(size=(100, 3))
+        P_modes = [[([0, 9], [0, 9], list(range(0, 10))), ([50, 79], [50, 79], list(range(50, 80)))],
+                   [([10, 49], [10, 49], list(range(10, 50)))],
+                   [([80, 80], [80, 80], [80])],
+                   []]
+
+        statistics = compute_mode_statistics(P_modes, Y)
+        np.testing.assert_array_equal(statistics['count'], [40, 40, 1, 0])
+        for imode, positions in enumerate([list(range(0, 10)) + list(range(50, 80)), list(range(10, 50))]):
+            np.testing.assert_allclose(statistics['min'][imode], Y[positions].min(axis=0))
+            np.testing.assert_allclose(statistics['max'][imode], Y[positions].max(axis=0))
+            np.testing.assert_allclose(statistics['mean'][imode], Y[positions].mean(axis=0))
+            np.testing.assert_allclose(statistics['covariance'][imode], np.cov(Y[positions], rowvar=False))
+        np.testing.assert_array_equal(statistics['min'][2], Y[80])
+        self.assertTrue(np.all(np.isnan(statistics['covariance'][2])))  # a single point
+        self.assertTrue(np.all(np.isnan(statistics['mean'][3])))  # no point
+
+        mode_inv = compute_invariant(3, P_modes[:2], Y)
+        self.assertEqual(mode_inv[1], [1, [[min(Y[10:50, dim]), max(Y[10:50, dim])] for dim in range(3)]])
+
+    def test_octagon_constraints(self):
+        print("Running test polyhedral_invariants module")
+        rng = np.random.RandomState(1)
+        Y = rng.normal(size=(200, 2))
+        mode = [([0, 99], [0, 99], list(range(0, 100))), ([150, 199], [150, 199], list(range(150, 200)))]
+        positions = list(range(0, 100)) + list(range(150, 200))
+
+        constraints = compute_octagon_constraints(2, mode, Y)
+        self.assertEqual(len(constraints), 4)
+        for coefficients, bound in constraints:     # the merged bounds are the maximum over all the points of the mode
+            self.assertAlmostEqual(bound, np.max(Y[positions].dot(coefficients)))
+        self.assertEqual(print_linear_constraint([1.0, -1.0], 2.5), "1.0 * x0 + -1.0 * x1 <= 2.5")
+
+    def test_convex_hull_constraints(self):
+        rng = np.random.RandomState(2)
+        Y = np.c_[rng.normal(size=(3000, 3)), np.full(3000, 7.0)]   # the last variable is constant
+        mode = [([i, i + 999], [i, i + 999], list(range(i, i + 1000))) for i in [0, 1000, 2000]]
+
+        directions = np.vstack([np.eye(3), -np.eye(3), octagon_directions(3)])
+        filtered = filter_extreme_points(Y[:, :3], directions)
+        self.assertLess(len(filtered), 3000)
+        hull_vertices = Y[ConvexHull(Y[:, :3]).vertices, :3]
+        self.assertEqual(len(np.unique(np.r_[filtered, hull_vertices], axis=0)), len(filtered))  # no vertex is lost
+
+        constraints = compute_convex_hull_constraints(4, mode, Y, Y.min(axis=0), Y.max(axis=0))
+        coefficients = np.array([constraint[0] for constraint in constraints])
+        bounds = np.array([constraint[1] for constraint in constraints])
+        self.assertTrue(np.all(coefficients[:, 3] == 0))
+        values = Y.dot(coefficients.T)
+        self.assertTrue(np.all(values <= bounds))   # all the points satisfy the invariant
+        np.testing.assert_allclose(values.max(axis=0), bounds)     # and each facet touches the points
+        self.assertEqual(len(constraints), len(np.unique(np.round(ConvexHull(Y[:, :3]).equations[:, :3], 12), axis=0)))
+
+        # a mode with too many varying variables for the convex hull gets the octagon invariant
+        Y = rng.normal(size=(300, 7))
+        mode = [([0, 299], [0, 299], list(range(300)))]
+        mode_invariant = [[0, np.c_[Y.min(axis=0), Y.max(axis=0)].tolist()]]
+        with self.assertLogs('infer_ha.infer_invariants.polyhedral_invariants', level='WARNING'):
+            mode_inv = compute_polyhedral_invariant(7, [mode], Y, 4, mode_invariant)
+        self.assertEqual(str(mode_inv[0][2]), str(compute_octagon_constraints(7, mode, Y)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,19 @@
+import unittest
+
+from benchmarks.startup import heavy_modules_loaded
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_run_imports(self):
+        print("Running test lazy imports module")
+        # matplotlib, sklearn, fastdtw, scipy.spatial and libsvm are imported only by the code paths using them
+        self.assertEqual(heavy_modules_loaded("run"), [])
+        self.assertEqual(heavy_modules_loaded("infer_ha.infer_HA"), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
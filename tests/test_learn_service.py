@@ -0,0 +1,55 @@
+import os
+import stat
+import sys
+import tempfile
+import threading
+import unittest
+
+from learn_service import LearnerService, create_server, submit_job
+from run_batch import LEARNING_MODULES
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestLearnService(unittest.TestCase):
+
+    def test_submit_job(self):
+        print("Running test learn service module")
+        with tempfile.TemporaryDirectory() as output_dir:
+            service_dir = os.path.join(output_dir, "service")
+            socket_path = os.path.join(service_dir, "learnha.sock")
+            service = LearnerService(workers=1, service_dir=service_dir)
+            server = create_server(service, socket_path)
+            self.assertEqual(stat.S_IMODE(os.stat(socket_path).st_mode), 0o600)   # only for the user of the service
+            self.assertTrue(all(module in sys.modules for module in LEARNING_MODULES))
+            thread = threading.Thread(target=server.serve_forever)
+            thread.start()
+            try:
+                output_filename = os.path.join(output_dir, "oscillator_2.txt")
+                arguments = '--input-filename "data/test_data/simu_oscillator_2.txt" --output-filename "' + \
+                            output_filename + '" --size-input-variable 0 --size-output-variable 2 --cache-dir /tmp'
+                messages = list(submit_job(socket_path, arguments))
+                stages = [message['stage'] for message in messages if message['event'] == 'progress']
+                self.assertEqual(stages, ['parse', 'derivatives', 'segmentation', 'filtering', 'clustering',
+                                          'invariants', 'transitions', 'print'])
+                self.assertEqual(messages[-1]['event'], 'done')
+                # the files of the job are written in the directory of the service, not where the client asked
+                self.assertFalse(os.path.exists(output_filename))
+                with open(os.path.join(service_dir, "jobs", "0", "oscillator_2.txt")) as f_in:
+                    self.assertEqual(messages[-1]['model'], f_in.read())
+                self.assertTrue(os.path.isdir(os.path.join(service_dir, "cache")))
+
+                # a failing job is reported and the service keeps serving
+                messages = list(submit_job(socket_path, arguments.replace("simu_oscillator_2", "missing")))
+                self.assertEqual(messages[-1]['event'], 'failed')
+                self.assertIn("missing.txt", messages[-1]['result']['error'])
+            finally:
+                server.shutdown()
+                server.server_close()
+                thread.join()
+                service.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from infer_ha.infer_HA import infer_model
+from infer_ha.learner import Learner
+from utils.parse_parameters import parse_trajectories
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+def learning_parameters(**overrides):
+    """
+    The learning parameters shared by the tests learning the oscillator test data.
+
+    :param overrides: the parameters whose values differ from the ones below, Eg. guard_degree=2.
+    :return: the learning parameters and the trajectories of the oscillator test data.
+    """
+    parameters = {}
+    parameters['input_filename'] = "data/test_data/simu_oscillator_2.txt"
+    parameters['methods'] = "dtw"
+    parameters['ode_degree'] = 1
+    parameters['modes'] = 4
+    parameters['guard_degree'] = 1
+    parameters['guard_backend'] = 'kernel'
+    parameters['guard_max_points'] = 1000
+    parameters['segmentation_error_tol'] = 0.1
+    parameters['segmentation_fine_error_tol'] = 0.1
+    parameters['threshold_distance'] = 1.0
+    parameters['threshold_correlation'] = 0.89
+    parameters['dbscan_eps_dist'] = 0.01  # default value
+    parameters['dbscan_min_samples'] = 2  # default value
+    parameters['size_input_variable'] = 0
+    parameters['size_output_variable'] = 2
+    parameters['ode_speedup'] = 50
+    parameters['is_invariant'] = 0
+    parameters['filter_last_segment'] = 1
+    parameters['lmm_step_size'] = 5
+    parameters['cache_dir'] = ''
+    parameters['memory_budget'] = 0
+    parameters['precision'] = 'float64'
+    parameters['jobs'] = 1
+    parameters['variableType_datastruct'] = []
+    parameters.update(overrides)
+
+    list_of_trajectories, stepsize, system_dimension = parse_trajectories(parameters['input_filename'])
+    parameters['stepsize'] = stepsize
+
+    return parameters, list_of_trajectories
+
+
+class TestLearner(unittest.TestCase):
+
+    def test_memoized_stages(self):
+        print("Running test Learner module")
+        parameters, list_of_trajectories = learning_parameters()
+
+        learner = Learner(list_of_trajectories, parameters)
+        P_modes, G, mode_inv, transitions, position = learner.infer_model()
+        self.assertEqual(len(P_modes), 2)
+        self.assertEqual(len(transitions), 2)
+        segmentation = learner.segmentation()
+        clustering = learner.clustering()
+        self.assertIs(learner.infer_model()[3], transitions)   # nothing is recomputed
+
+        learner.set_parameters(guard_degree=2)
+        self.assertIs(learner.clustering(), clustering)
+        self.assertIsNot(learner.transitions(), transitions)
+        self.assertEqual(str(learner.transitions()),
+                         str(infer_model(list_of_trajectories, dict(parameters, guard_degree=2))[3]))
+
+        learner.set_parameters(threshold_correlation=0.95)
+        self.assertIs(learner.segmentation(), segmentation)
+        self.assertIsNot(learner.clustering(), clustering)
+        learner.set_parameters(threshold_correlation=0.89)  # the memoized segmentation was not modified by clustering
+        self.assertEqual(str(learner.clustering()), str(clustering))
+
+        # the statistics of the modes are not computed for memoized invariants, nor without invariants
+        with mock.patch('infer_ha.infer_invariants.invariants.compute_mode_statistics') as mode_statistics:
+            learner.mode_invariants()
+            learner.set_parameters(is_invariant=2)
+            self.assertEqual(learner.mode_invariants(), [])
+        mode_statistics.assert_not_called()
+
+    def test_memory_budget(self):
+        parameters, list_of_trajectories = learning_parameters()
+        P_modes, G, mode_inv, transitions, position = infer_model(list_of_trajectories, parameters)
+
+        learner = Learner(list_of_trajectories, dict(parameters, memory_budget=1))   # chunks of 655 points
+        budget_model = learner.infer_model()
+        self.assertEqual(len(budget_model[0]), len(P_modes))
+        np.testing.assert_allclose(np.array(budget_model[1]), np.array(G), rtol=1e-9, atol=1e-9)
+        self.assertEqual(str(budget_model[2]), str(mode_inv))
+        A, b1, b2, Y, ytuple = learner.stage_outputs['derivatives'][1]
+        self.assertTrue(A is None and b1 is None and b2 is None)    # released after their last consumer
+        self.assertIsNotNone(Y)
+
+        learner.set_parameters(threshold_correlation=0.95)  # the clustering recomputes the released derivatives
+        self.assertEqual(len(learner.clustering()[0]),
+                         len(Learner(list_of_trajectories, dict(parameters, threshold_correlation=0.95)).clustering()[0]))
+
+        A_chunked = learner.derivatives()[0]
+        A = Learner(list_of_trajectories, parameters).derivatives()[0]
+        np.testing.assert_array_equal(A_chunked, A)     # the monomials are evaluated in chunks
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+
+from infer_ha.infer_HA import infer_model
+from infer_ha.learner import Learner
+from infer_ha.scheduler import TaskGraph, TaskOutput
+from tests.test_learner import learning_parameters
+from utils.trace import start_trace, stop_trace, trace_stage
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+def wait_and_add(*values):
+    time.sleep(0.05)
+    return sum(values)
+
+
+def nested_graph(jobs):
+    graph = TaskGraph()
+    for i in range(4):
+        graph.add_task('inner ' + str(i), wait_and_add, i)
+    with trace_stage('inner'):
+        return sum(graph.run(jobs).values())
+
+
+class TestScheduler(unittest.TestCase):
+
+    def test_task_graph(self):
+        print("Running test scheduler module")
+        for jobs in [1, 3]:
+            graph = TaskGraph()
+            graph.add_task('a', wait_and_add, 1)
+            graph.add_task('b', wait_and_add, 2)
+            graph.add_task('c', wait_and_add, TaskOutput('a'), TaskOutput('b'))
+            graph.add_task('d', nested_graph, jobs, dependencies=['a'])
+            start_trace()
+            with trace_stage('graph'):
+                outputs = graph.run(jobs)
+            trace = stop_trace()
+            self.assertEqual(outputs, {'a': 1, 'b': 2, 'c': 3, 'd': 6})
+            timings = {timing['task']: timing for timing in graph.timings}
+            self.assertGreaterEqual(timings['c']['start'], timings['a']['start'] + timings['a']['wall_time'])
+            self.assertGreaterEqual(timings['c']['start'], timings['b']['start'] + timings['b']['wall_time'])
+            self.assertEqual(len(trace['tasks']), 8)
+            self.assertEqual([stage['depth'] for stage in trace['stages'] if stage['stage'] == 'inner'], [1])
+            if jobs == 1:
+                self.assertEqual([timing['task'] for timing in graph.timings], ['a', 'b', 'c', 'd'])
+                self.assertEqual({timing['thread'] for timing in graph.timings}, {threading.current_thread().name})
+            else:
+                self.assertGreater(len({timing['thread'] for timing in trace['tasks']}), 1)
+
+        graph = TaskGraph()
+        graph.add_task('a', wait_and_add, 1)
+        graph.add_task('fails', wait_and_add, 'not a number')
+        with self.assertRaises(TypeError):
+            graph.run(2)
+        with self.assertRaises(ValueError):
+            graph.add_task('b', wait_and_add, TaskOutput('unknown'))
+
+    def test_concurrent_learning(self):
+        parameters, list_of_trajectories = learning_parameters(guard_degree=2)
+
+        model = Learner(list_of_trajectories, parameters).infer_model()
+        start_trace()
+        concurrent_model = infer_model(list_of_trajectories, dict(parameters, jobs=4))    # as called by run.py
+        trace = stop_trace()
+        self.assertEqual(str(concurrent_model), str(model))
+        tasks = [task['task'] for task in trace['tasks']]
+        for task in ['invariants', 'transitions', 'ode 0', 'guard 0', 'assignments', 'assignment 0']:
+            self.assertIn(task, tasks)
+        guards = [stage for stage in trace['stages'] if stage['stage'] == 'guard']
+        self.assertEqual([stage['depth'] for stage in guards], [1] * len(model[3]))    # nested in 'transitions'
+
+
+if __name__ == '__main__':
+    unittest.main()
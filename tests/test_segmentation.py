@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+
+from infer_ha.learner import Learner
+from infer_ha.segmentation.segmentation import two_fold_segmentation
+from tests.test_learner import learning_parameters
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestSegmentation(unittest.TestCase):
+
+    def test_two_fold_segmentation(self):
+        print("Running test segmentation module")
+        for precision in ['float64', 'float32']:
+            parameters, list_of_trajectories = learning_parameters(precision=precision)
+            A, b1, b2, Y, ytuple = Learner(list_of_trajectories, parameters).derivatives()
+            segmented_traj, clfs, drop = two_fold_segmentation(A, b1, b2, ytuple, Y, 0, "dtw", 5, 0.1, 0.1)
+            self.assertEqual(clfs, [])  # the clustering by DTW fits the segments itself
+
+            # the other clustering methods need the fit of each segment, computed in double precision
+            dbscan_traj, clfs, drop = two_fold_segmentation(A, b1, b2, ytuple, Y, 0, "dbscan", 5, 0.1, 0.1)
+            self.assertEqual(dbscan_traj, segmented_traj)
+            self.assertEqual(len(clfs), len(segmented_traj))
+            self.assertEqual(clfs[0].coef_.shape, (b1.shape[1], A.shape[1]))
+            self.assertEqual(clfs[0].coef_.dtype, np.float64)
+
+
+if __name__ == '__main__':
+    unittest.main()
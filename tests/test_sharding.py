@@ -0,0 +1,49 @@
+import unittest
+
+import numpy as np
+
+from infer_ha.infer_HA import infer_model
+from infer_ha.sharding import split_shards, learn_sharded, ode_difference
+from tests.test_learner import learning_parameters
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+def trajectory(points):
+    return [np.arange(points) * 0.01], [np.zeros((points, 2))]
+
+
+class TestSharding(unittest.TestCase):
+
+    def test_split_shards(self):
+        print("Running test sharding module")
+        trajectories = [trajectory(points) for points in [100, 100, 100, 100]]
+        self.assertEqual(split_shards(trajectories, 2), [[0, 1], [2, 3]])
+        self.assertEqual(split_shards(trajectories, 8), [[0], [1], [2], [3]])   # at most one shard per trajectory
+        trajectories = [trajectory(points) for points in [1000, 10, 10]]
+        self.assertEqual(split_shards(trajectories, 3), [[0], [1], [2]])   # no empty shard
+        self.assertEqual(split_shards(trajectories, 1), [[0, 1, 2]])
+        self.assertAlmostEqual(ode_difference([[1.0, 2.0]], [[1.0, 2.2]]), 0.1 / 1.1)
+
+    def test_learn_sharded(self):
+        parameters, list_of_trajectories = learning_parameters(shard_merge_tol=0.1)
+        P_modes, G, mode_inv, transitions, position = infer_model(list_of_trajectories, parameters)
+
+        # each trajectory is a shard, learned by a process of the pool
+        sharded = learn_sharded(list_of_trajectories, parameters, shards=2, jobs=2)
+        # the segments are the same, except at the start of a shard whose first M points have no derivatives
+        self.assertEqual([len(mode) for mode in sharded[0]], [len(mode) for mode in P_modes])
+        for coefficients, sharded_coefficients in zip(G, sharded[1]):   # the ODEs of the merged modes
+            np.testing.assert_allclose(sharded_coefficients, coefficients, atol=1e-8)
+        self.assertEqual(str(sharded[2]), str(mode_inv))
+        self.assertEqual([transition[:2] for transition in sharded[3]], [transition[:2] for transition in transitions])
+        self.assertEqual(sharded[4], position)
+
+        # the modes of the shards are not merged when their ODEs are too different
+        unmerged = learn_sharded(list_of_trajectories, dict(parameters, shard_merge_tol=0.0), shards=2)
+        self.assertEqual(len(unmerged[0]), 2 * len(P_modes))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+from infer_ha.clustering.cluster_by_dtw import cluster_by_dtw
+from infer_ha.learner import Learner
+from infer_ha.sweep import parse_sweep_grid, shared_segmentation_state, init_worker, evaluate_thresholds
+from tests.test_learner import learning_parameters
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestSweep(unittest.TestCase):
+
+    def test_parse_sweep_grid(self):
+        print("Running test sweep module")
+        grid = parse_sweep_grid("segmentation_error_tol={0.01,0.1} & threshold-correlation={0.8}")
+        self.assertEqual(grid, {'segmentation_error_tol': [0.01, 0.1], 'threshold_correlation': [0.8]})
+        with self.assertRaises(ValueError):
+            parse_sweep_grid("guard_degree={1,2}")
+
+    def test_sweep_model(self):
+        parameters, list_of_trajectories = learning_parameters()
+
+        # the clustering from the shared DTW table is the same as comparing the segments during the clustering
+        learner = Learner(list_of_trajectories, parameters)
+        state = shared_segmentation_state(learner)
+        for threshold_correlation, threshold_distance in [(0.95, 0.001)]:
+            arguments = [state['segmented_traj'], state['A'], state['b1'], state['Y'], state['t_list'], 2,
+                         threshold_correlation, threshold_distance, 0, 5]
+            P_modes, G = cluster_by_dtw(*arguments)
+            P_modes_table, G_table = cluster_by_dtw(*arguments, dtw_table=state['dtw_table'])
+            self.assertEqual(P_modes_table, P_modes)
+
+        init_worker(state)
+        result = evaluate_thresholds((0.89, 1.0))
+        self.assertEqual(result['modes'], len(learner.clustering()[0]))
+        self.assertEqual(result['transitions'], len(learner.transitions()))
+
+
+if __name__ == '__main__':
+    unittest.main()
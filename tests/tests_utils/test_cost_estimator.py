@@ -0,0 +1,45 @@
+import unittest
+
+from utils.commandline_parser import read_commandline_arguments
+from utils.cost_estimator import read_input_statistics, estimate_cost, check_memory_budget, MemoryBudgetExceeded
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestCostEstimator(unittest.TestCase):
+
+    def test_input_statistics(self):
+        print("Running test cost estimator module")
+        statistics = read_input_statistics("data/test_data/simu_oscillator_2.txt", sample_points=100)
+        self.assertEqual(statistics['points'], 2002)
+        self.assertEqual(statistics['trajectories'], 2)
+        self.assertEqual(statistics['dimension'], 2)
+        self.assertAlmostEqual(statistics['stepsize'], 0.01)
+        self.assertEqual(statistics['sample'].shape, (100, 2))
+
+    def test_estimate_and_budget(self):
+        parameters = read_commandline_arguments(['-i', 'data/test_data/simu_oscillator_2.txt', '--ode-degree', '2',
+                                                 '--size-input-variable', '0', '--size-output-variable', '2'])
+        estimate = estimate_cost(parameters)
+        self.assertEqual(estimate['ode_monomials'], 6)
+        memory = dict(estimate['memory'])
+        self.assertEqual(memory['A (1992 x 6)'], 1992 * 6 * 8)
+        self.assertGreaterEqual(estimate['segments'], 2)
+        self.assertGreater(estimate['total_time'], 0)
+
+        peak = estimate['peak_memory'] / (1024 * 1024)
+        self.assertIsNone(check_memory_budget(estimate, 0))     # disabled
+        self.assertIsNone(check_memory_budget(estimate, 2 * peak))
+        self.assertIsNotNone(check_memory_budget(estimate, 1.1 * peak))
+        with self.assertRaises(MemoryBudgetExceeded):
+            check_memory_budget(estimate, 0.5 * peak)
+
+        parameters['shards'] = 2    # the derivatives of a shard, see infer_ha/sharding.py
+        memory = dict(estimate_cost(parameters)['memory'])
+        self.assertEqual(memory['A (991 x 6) per shard, 1 in parallel'], 991 * 6 * 8)
+        self.assertEqual(memory['Y (1992 x 2)'], 1992 * 2 * 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from utils.polynomial_basis import complete_polynomial_exponents, multinomial_expansion, evaluate_monomials
+from utils import misc_math_functions as myUtil
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestPolynomialBasis(unittest.TestCase):
+
+    def test_complete_polynomial_exponents(self):
+        print("Running test polynomial_basis module")
+        expected = np.array([[2, 0], [1, 1], [0, 2], [1, 0], [0, 1], [0, 0]], dtype=float)
+        np.testing.assert_array_equal(complete_polynomial_exponents(2, 2), expected)
+        self.assertIs(complete_polynomial_exponents(2, 2), complete_polynomial_exponents(2, 2))  # memoized
+        self.assertFalse(complete_polynomial_exponents(2, 2).flags.writeable)
+
+    def test_multinomial_expansion(self):
+        coefficients, exponents = multinomial_expansion(3, 2)   # (a + b + c)^2
+        np.testing.assert_array_equal(coefficients, [1, 2, 2, 1, 2, 1])
+        np.testing.assert_array_equal(exponents, [[2, 0, 0], [1, 1, 0], [1, 0, 1], [0, 2, 0], [0, 1, 1], [0, 0, 2]])
+        self.assertEqual(myUtil.multinomial(3, 2)[1], [2.0, 1, 1, 0])
+
+        # sum of all the multinomial coefficients of (a + b + c + d)^5 is 4^5
+        coefficients, exponents = multinomial_expansion(4, 5)
+        self.assertEqual(coefficients.sum(), 4 ** 5)
+        self.assertTrue(np.all(exponents.sum(axis=1) == 5))
+
+    def test_evaluate_monomials(self):
+        points = np.array([[2.0, 3.0], [-1.0, 0.5]])
+        values = evaluate_monomials(points, complete_polynomial_exponents(2, 2))
+        np.testing.assert_allclose(values, [[4, 6, 9, 2, 3, 1], [1, -0.5, 0.25, -1, 0.5, 1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
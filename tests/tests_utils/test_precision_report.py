@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from infer_ha.learner import Learner
+from tests.test_learner import learning_parameters
+from utils.precision_report import difference, compare_models, precision_report
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestPrecisionReport(unittest.TestCase):
+
+    def test_difference(self):
+        print("Running test precision report module")
+        item = difference([np.array([[1.0, -4.0]]), 2.0], [np.array([[1.5, -4.0]]), 2.0])
+        self.assertAlmostEqual(item['absolute'], 0.5)
+        self.assertAlmostEqual(item['relative'], 0.125)
+        self.assertIsNone(difference([1.0, 2.0], [1.0]))
+
+    def test_float32_learning(self):
+        parameters, list_of_trajectories = learning_parameters(precision='float32')
+
+        learner = Learner(list_of_trajectories, parameters)
+        A, b1, b2, Y, ytuple = learner.derivatives()
+        self.assertEqual(A.dtype, np.float32)
+        self.assertEqual(Y.dtype, np.float32)
+        G = learner.clustering()[1]
+        self.assertEqual(G[0].dtype, np.float64)     # the regressions are computed in double precision
+
+        report = precision_report(list_of_trajectories, parameters)
+        self.assertEqual(report['runs']['float32']['derivatives_bytes'] * 2,
+                         report['runs']['float64']['derivatives_bytes'])
+        self.assertTrue(report['same_modes'])
+        self.assertTrue(report['same_clustering'])
+        self.assertLess(report['ode']['relative'], 1e-3)
+        self.assertEqual(report['missing_transitions'], [])
+        self.assertEqual(compare_models(learner.infer_model(), learner.infer_model())['ode']['absolute'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import pstats
+import tempfile
+import time
+import unittest
+
+from infer_ha.scheduler import TaskGraph
+from utils.profiling import Profiler, parse_profile_stages
+from utils.trace import trace_stage
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+def busy(seconds):
+    end = time.process_time() + seconds
+    total = 0
+    while time.process_time() < end:
+        total += sum(range(100))
+    return total
+
+
+def learn_stages():
+    with trace_stage('segmentation'):
+        busy(0.05)
+    with trace_stage('clustering'):
+        busy(0.1)
+
+
+def guard_task():
+    with trace_stage('guard'):
+        busy(0.01)
+
+
+def learn_concurrent_stages(jobs):
+    with trace_stage('clustering'):
+        graph = TaskGraph()
+        for task in range(8):
+            graph.add_task('busy ' + str(task), busy, 0.01)
+        graph.run(jobs)
+    graph = TaskGraph()
+    for task in range(8):
+        graph.add_task('guard ' + str(task), guard_task)
+    graph.run(jobs)
+
+
+class TestProfiling(unittest.TestCase):
+
+    def check_profile(self, profiler):
+        with tempfile.TemporaryDirectory() as output_dir:
+            pstats_file, collapsed_file = profiler.write(os.path.join(output_dir, "out.txt"))
+            self.assertTrue(pstats_file.endswith("out.txt.pstats"))
+            functions = [function[2] for function in pstats.Stats(pstats_file).stats]
+            with open(collapsed_file) as f_in:
+                lines = f_in.read().splitlines()
+        self.assertIn('busy', functions)
+        self.assertGreater(len(lines), 0)
+        for line in lines:
+            stack, value = line.rsplit(" ", 1)
+            self.assertGreater(int(value), 0)
+            self.assertGreater(len(stack.split(";")), 0)
+        return functions, lines
+
+    def test_deterministic_stage(self):
+        print("Running test profiling module")
+        self.assertEqual(parse_profile_stages("clustering, guard"), ['clustering', 'guard'])
+        profiler = Profiler('deterministic', ['clustering'])
+        profiler.start()
+        learn_stages()
+        profiler.stop()
+        functions, lines = self.check_profile(profiler)
+        self.assertNotIn('test_deterministic_stage', functions)     # only the stage is profiled
+        self.assertTrue(any("busy (test_profiling.py" in line for line in lines))
+
+    def test_threads(self):
+        # the stages and the tasks run by the threads of the pool are profiled as with a single thread
+        for stages, calls in [(['clustering'], 8), (['guard'], 8), ([], 16)]:
+            for jobs in [1, 4]:
+                profiler = Profiler('deterministic', stages)
+                profiler.start()
+                learn_concurrent_stages(jobs)
+                profiler.stop()
+                stats = profiler.stats()
+                busy_calls = [values[1] for function, values in stats.items() if function[2] == 'busy']
+                self.assertEqual(busy_calls, [calls], (stages, jobs))
+
+    def test_sampling(self):
+        profiler = Profiler('sampling', interval=0.002)
+        profiler.start()
+        learn_stages()
+        profiler.stop()
+        functions, lines = self.check_profile(profiler)
+        self.assertIn('learn_stages', functions)
+        self.assertTrue(any("learn_stages (test_profiling.py" in line and "busy (" in line for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.shared_arrays import SharedArrays, SharedArray, attach, attach_state, remove_stale_segments, \
+    SEGMENT_PREFIX, SHARED_MEMORY_FOLDER, shared_memory
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+def sum_state(state):
+    state = attach_state(state)
+    return float(state['A'].sum()), state['A'].flags.writeable, state['name']
+
+
+class TestSharedArrays(unittest.TestCase):
+
+    def test_share_state(self):
+        print("Running test shared arrays module")
+        A = np.arange(20000, dtype=np.double).reshape((10000, 2))
+        small = np.ones(3)
+        with SharedArrays() as shared:
+            state = shared.share_state({'A': A, 'small': small, 'name': 'oscillator'})
+            self.assertIsInstance(state['A'], SharedArray)
+            self.assertIs(state['small'], small)    # smaller than the minimum size, pickled
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(sum_state, [state, state]))
+            self.assertEqual(results, [(float(A.sum()), False, 'oscillator')] * 2)
+            name = state['A'].name
+        with self.assertRaises(FileNotFoundError):  # removed at the end of the with-statement
+            attach(state['A'])
+        self.assertNotIn(name, os.listdir(SHARED_MEMORY_FOLDER))
+
+    @unittest.skipUnless(os.path.isdir(SHARED_MEMORY_FOLDER), "blocks of shared memory are not listed")
+    def test_remove_stale_segments(self):
+        pid = 2 ** 22 + 1   # above the maximum pid of Linux, so not running
+        name = SEGMENT_PREFIX + str(pid) + "_0"
+        segment = shared_memory.SharedMemory(name=name, create=True, size=8)
+        segment.close()
+        self.assertIn(name, remove_stale_segments())
+        self.assertNotIn(name, os.listdir(SHARED_MEMORY_FOLDER))
+
+
+if __name__ == '__main__':
+    unittest.main()
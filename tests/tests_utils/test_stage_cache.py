@@ -0,0 +1,81 @@
+import inspect
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from infer_ha.infer_transitions.compute_transitions import compute_transitions
+from infer_ha.infer_transitions.guards import getGuard_inequality
+from utils.commandline_parser import read_commandline_arguments
+from utils.stage_cache import data_key, stage_key, cached_stage, optional_parameter, OPTIONAL_PARAMETERS
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestStageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_stage_key(self):
+        print("Running test stage_cache module")
+        t_list = [np.arange(10) * 0.01]
+        y_list = [np.ones((10, 2))]
+        key = data_key(t_list, y_list, [[0, 9]])
+        self.assertEqual(key, data_key([t_list[0].copy()], [y_list[0].copy()], [[0, 9]]))
+        self.assertNotEqual(key, data_key(t_list, [y_list[0] * 2], [[0, 9]]))
+        self.assertNotEqual(key, data_key(t_list, y_list, [[0, 4], [5, 9]]))
+
+        parameters = {'is_invariant': 0, 'guard_degree': 1, 'variableType_datastruct': [], 'guard_backend': 'auto',
+                      'guard_max_points': 1000}
+        transitions_key = stage_key(key, 'transitions', parameters)
+        self.assertEqual(stage_key(key, 'invariants', parameters),
+                         stage_key(key, 'invariants', dict(parameters, guard_degree=2)))   # not used by the stage
+        self.assertNotEqual(transitions_key, stage_key(key, 'transitions', dict(parameters, guard_degree=2)))
+        self.assertNotEqual(transitions_key, stage_key(key[::-1], 'transitions', parameters))
+
+    def test_optional_parameters(self):
+        parameters = read_commandline_arguments(['-i', 'data/test_data/simu_oscillator_2.txt',
+                                                 '--size-input-variable', '0', '--size-output-variable', '2'])
+        for name, value in OPTIONAL_PARAMETERS.items():
+            self.assertEqual(parameters[name], value)
+            self.assertEqual(optional_parameter({}, name), value)
+        compute_transitions_defaults = inspect.signature(compute_transitions).parameters
+        self.assertEqual(compute_transitions_defaults['guard_backend'].default, OPTIONAL_PARAMETERS['guard_backend'])
+        self.assertEqual(compute_transitions_defaults['guard_max_points'].default,
+                         OPTIONAL_PARAMETERS['guard_max_points'])
+        guard_defaults = inspect.signature(getGuard_inequality).parameters
+        self.assertEqual(guard_defaults['guard_backend'].default, OPTIONAL_PARAMETERS['guard_backend'])
+        self.assertEqual(guard_defaults['max_points'].default, OPTIONAL_PARAMETERS['guard_max_points'])
+
+        parameters = {'guard_degree': 1, 'variableType_datastruct': []}   # built before the optional parameters
+        self.assertEqual(stage_key('', 'transitions', parameters),
+                         stage_key('', 'transitions', dict(parameters, **OPTIONAL_PARAMETERS)))
+
+    def test_cached_stage(self):
+        calls = []
+
+        def compute(x, y):
+            calls.append((x, y))
+            return [x, np.arange(y)]
+
+        output = cached_stage(self.cache_dir, 'transitions', 'key1', compute, 1, 3)
+        cached_output = cached_stage(self.cache_dir, 'transitions', 'key1', compute, 1, 3)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(cached_output[0], output[0])
+        np.testing.assert_array_equal(cached_output[1], output[1])
+        self.assertEqual(os.listdir(self.cache_dir), ['transitions_key1.pkl'])
+
+        cached_stage(self.cache_dir, 'transitions', 'key2', compute, 1, 4)
+        cached_stage('', 'transitions', 'key1', compute, 1, 3)    # disabled
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from infer_ha.model_printer.print_header import print_trace
+from run import learn_with_profile
+from utils.commandline_parser import read_commandline_arguments
+from utils.trace import start_trace, stop_trace, current_trace, trace_stage, count, write_trace
+
+# To execute this test from the project folder "learnHA" type the command
+# amit@amit-Alienware-m15-R4:~/MyPythonProjects/learningHA/learnHA$ python -m unittest discover -v
+
+
+class TestTrace(unittest.TestCase):
+
+    def test_no_trace(self):
+        print("Running test trace module")
+        self.assertIsNone(current_trace())
+        with trace_stage('segmentation') as stage:
+            count('regressions')
+        self.assertIsNone(stage)
+        self.assertIsNone(stop_trace())
+
+    def test_nested_stages(self):
+        start_trace(trace_memory=True)
+        with trace_stage('transitions'):
+            for source in range(2):
+                with trace_stage('guard', source=source, destination=1 - source):
+                    count('svm_trainings')
+                    buffer = [0] * 100000   # allocated memory shows in the peak of the stage
+                    del buffer
+            count('transitions', 2)
+        count('dtw_calls')   # outside any stage, only in the totals
+        trace = stop_trace()
+
+        self.assertEqual([stage['stage'] for stage in trace['stages']], ['transitions', 'guard', 'guard'])
+        self.assertEqual([stage['depth'] for stage in trace['stages']], [0, 1, 1])
+        self.assertEqual(trace['stages'][2]['source'], 1)
+        self.assertEqual(trace['stages'][0]['counters'], {'svm_trainings': 2, 'transitions': 2})
+        self.assertEqual(trace['stages'][1]['counters'], {'svm_trainings': 1})
+        self.assertEqual(trace['counters'], {'svm_trainings': 2, 'transitions': 2, 'dtw_calls': 1})
+        for stage in trace['stages']:
+            self.assertGreaterEqual(stage['wall_time'], 0)
+            self.assertGreater(stage['peak_memory_kb'], 100000 * 8 / 1024)
+        self.assertGreaterEqual(trace['stages'][0]['peak_memory_kb'], trace['stages'][1]['peak_memory_kb'])
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            trace_file = os.path.join(output_dir, "trace.json")
+            write_trace(trace, trace_file)
+            with open(trace_file) as f_in:
+                self.assertEqual(json.load(f_in)['counters'], trace['counters'])
+
+        f_out = io.StringIO()
+        print_trace(f_out, trace)
+        lines = f_out.getvalue().splitlines()
+        self.assertTrue(all(line.startswith("# ") for line in lines))
+        self.assertEqual(len(lines), 3)     # total, the top-level stage and the counters
+
+    def test_trace_file(self):
+        # the trace is written by the sweep, which prints no model, and when the learning fails
+        with tempfile.TemporaryDirectory() as output_dir:
+            trace_file = os.path.join(output_dir, "trace.json")
+            arguments = ['--input-filename', "data/test_data/simu_oscillator_2.txt", '--output-filename',
+                         os.path.join(output_dir, "sweep.csv"), '--size-input-variable', '0', '--size-output-variable',
+                         '2', '--sweep-grid', "threshold_correlation={0.89}", '--trace-file', trace_file]
+            learn_with_profile(read_commandline_arguments(arguments))
+            self.assertIsNone(current_trace())
+            with open(trace_file) as f_in:
+                self.assertIn('parse', [stage['stage'] for stage in json.load(f_in)['stages']])
+
+            os.remove(trace_file)
+            arguments[1] = "data/test_data/missing.txt"
+            with self.assertRaises(IOError):
+                learn_with_profile(read_commandline_arguments(arguments))
+            self.assertIsNone(current_trace())
+            self.assertTrue(os.path.isfile(trace_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
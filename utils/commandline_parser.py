@@ -1,12 +1,15 @@
 import argparse
 
+from utils.stage_cache import OPTIONAL_PARAMETERS
 
-def read_commandline_arguments():
+
+def read_commandline_arguments(argv=None):
     """
     This function calls Python's built-in class ArgumentParser to read command line arguments that are necessary for our
     HA learning algorithm.
     To find the complete list of arguments and their functions. Type the --help option in the command terminal.
 
+    :param argv: the list of arguments to parse (see run_batch.py). By default, the command line arguments sys.argv.
     :return:
         A dictionary data type of arguments, args supplied by the user in the command terminal.
         For example, to access the value of the argument --ode-degree use
@@ -25,6 +28,17 @@ def read_commandline_arguments():
                         type=int, default=1, required=False)
     parser.add_argument('-b', '--guard-degree', help='Degree of polynomial inequalities for Guards. Set to 1 by default', type=int,
                         default=1, required=False)
+    parser.add_argument('--guard-backend', help='SVM used for learning Guards. Options are: kernel (default): SVM with polynomial kernel,  '
+                        'linear: linear SVM (only guard-degree 1),  explicit: linear SVM on the expanded monomials,  auto: linear '
+                        'for guard-degree 1 otherwise explicit or kernel depending on the number of monomials. The linear and '
+                        'explicit SVMs are faster but use a fixed C and can learn different guards',
+                        type=str, choices=['auto', 'kernel', 'linear', 'explicit'],
+                        default=OPTIONAL_PARAMETERS['guard_backend'], required=False)
+    parser.add_argument('--guard-max-points', help='Maximum number of connecting points of each class (source and destination) '
+                        'used for training the SVM of a guard. Larger data is reduced to the points near the guard and a '
+                        'random subset of the rest. 0 disables the reduction. Set to %d by default'
+                        % OPTIONAL_PARAMETERS['guard_max_points'],
+                        type=int, default=OPTIONAL_PARAMETERS['guard_max_points'], required=False)
     parser.add_argument('--segmentation-error-tol', help='Maximal relative-difference (FwdBwd) error tolerated during segmentation. Set to 0.01 by default', type=float,
                         default=0.01, required=False)
     parser.add_argument('--segmentation-fine-error-tol', help='Maximal relative-difference (Bwd) fine-error tolerated during segmentation. Set to 0.01 by default', type=float,
@@ -48,8 +62,74 @@ def read_commandline_arguments():
                         type=str, default='', required=False)
     parser.add_argument('--ode-speedup', help='Maximum number of segments to include for ODE computation. Set to 10 by default',
                         type=int, default=10, required=False)
-    parser.add_argument('--is-invariant', help='Options are: 0/1/2. Values 0 (default) and 1 computes invariant and 2 disable computation',
-                        type=int, choices=[0, 1, 2], default=0, required=False)
+    parser.add_argument('--is-invariant', help='Options are: 0/1/2/3/4. Values 0 (default) and 1 computes invariant, 2 disable computation, '
+                                               '3 computes octagon and 4 convex hull invariant (octagon for the modes with more than 6 varying variables)',
+                        type=int, choices=[0, 1, 2, 3, 4], default=0, required=False)
+    parser.add_argument('--cache-dir', help='Directory where the output of each stage of the learning algorithm is cached, so that '
+                        'a rerun with different parameters resumes from the first affected stage. Disabled by default',
+                        type=str, default='', required=False)
+    parser.add_argument('--sweep-grid', help='Values of the parameters to sweep, Eg. "segmentation_error_tol={0.01,0.1} & '
+                        'threshold_correlation={0.8,0.9}". Parameters are: segmentation_error_tol, segmentation_fine_error_tol, '
+                        'threshold_correlation and threshold_distance. A summary table (CSV) of all the configurations is '
+                        'printed in the output file instead of the HA model. Disabled by default',
+                        type=str, default='', required=False)
+    parser.add_argument('--jobs', help='Maximum number of processes running in parallel (sweep), or of threads learning '
+                        'the invariants, the ODEs of the modes and the guards of the transitions concurrently. Set to 1 '
+                        'by default',
+                        type=int, default=1, required=False)
+    parser.add_argument('--shards', help='Number of shards of consecutive trajectories whose modes are learned '
+                        'independently (by --jobs processes in parallel) and then merged, to learn trajectory sets that do '
+                        'not fit in memory. Set to 0 (no sharding) by default', type=int, default=0, required=False)
+    parser.add_argument('--shard-merge-tol', help='Largest difference of the ODE coefficients of two modes of different '
+                        'shards merged into one mode, relative to the largest coefficient. Their representative segments '
+                        'must also be similar by DTW (see --threshold-correlation and --threshold-distance). Set to 0.1 by '
+                        'default', type=float, default=0.1, required=False)
+    parser.add_argument('--coordinator', help='Address host:port where the DTW comparisons and the guards are served to the '
+                        'workers started with learn_worker.py, Eg.: "127.0.0.1:8766" for the workers of this host. '
+                        'Listen on another interface (e.g., 0.0.0.0) only on a trusted network, as the workers can run '
+                        'code in the learning process. Disabled by default', type=str, default='', required=False)
+    parser.add_argument('--coordinator-authkey', help='Secret key shared by the coordinator and its workers. Set to empty '
+                        'by default: a random key is generated and printed for the workers', type=str, default='',
+                        required=False)
+    parser.add_argument('--straggler-timeout', help='Seconds after which a task still running on a worker is also sent to an '
+                        'idle worker. Set to 60 by default', type=float, default=60, required=False)
+    parser.add_argument('--trace-file', help='JSON file where the wall and CPU time, the memory and the counters (e.g., DTW '
+                        'calls and SVM trainings) of each stage of the learning algorithm are printed. Disabled by default',
+                        type=str, default='', required=False)
+    parser.add_argument('--trace-memory', help='1 to record the peak memory of each stage in the trace, which slows down the '
+                        'learning, and 0 (default) to disable', type=int, choices=[0, 1], default=0, required=False)
+    parser.add_argument('--trace-header', help='1 to print the summary of the trace as comment lines (starting with #) after the '
+                        'header of the HA model, and 0 (default) to disable', type=int, choices=[0, 1], default=0,
+                        required=False)
+    parser.add_argument('--log-level', help='Options are: DEBUG/INFO/WARNING/ERROR. DEBUG also prints the time of each stage. '
+                        'INFO is set default', type=str, choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO',
+                        required=False)
+    parser.add_argument('--profile', help='Options are: none/deterministic/sampling. Profiles the learning and prints the '
+                        'statistics of the functions (.pstats) and the collapsed stacks for flame graphs (.collapsed). '
+                        'deterministic records every call (cProfile) and sampling records the call stack periodically '
+                        'with a low overhead. none is set default', type=str, choices=['none', 'deterministic', 'sampling'],
+                        default='none', required=False)
+    parser.add_argument('--profile-stages', help='Comma separated stages to profile, Eg.: "clustering, guard". The stages are '
+                        'parse/derivatives/segmentation/filtering/clustering/invariants/transitions/assignments/guard/'
+                        'assignment/print. Set to the whole run by default', type=str, default='', required=False)
+    parser.add_argument('--profile-interval', help='Sampling interval in seconds of the sampling profiler. Set to 0.005 by '
+                        'default', type=float, default=0.005, required=False)
+    parser.add_argument('--profile-output', help='Prefix of the profile files <prefix>.pstats and <prefix>.collapsed. Set to '
+                        'the output FileName by default', type=str, default='', required=False)
+    parser.add_argument('--dry-run', help='1 to only print the estimated memory and running time of the learning (number of '
+                        'monomials, size of the matrices, segments and DTW comparisons) without learning, and 0 (default) '
+                        'to learn', type=int, choices=[0, 1], default=0, required=False)
+    parser.add_argument('--memory-budget', help='Memory budget in megabytes. The learning is refused if its estimated memory '
+                        'exceeds the budget. Otherwise, the buffers of the stages are released after their last use and '
+                        'the monomials and the regressions are computed in chunks sized to the budget. Set to 0 '
+                        '(disabled) by default', type=float, default=0, required=False)
+    parser.add_argument('--precision', help='Numeric precision of the derivatives and of the signals compared by DTW. '
+                        'Options are: float64/float32. float32 halves the memory of the largest matrices, the '
+                        'regressions are still computed in float64. float64 is set default', type=str,
+                        choices=['float64', 'float32'], default=OPTIONAL_PARAMETERS['precision'], required=False)
+    parser.add_argument('--precision-report', help='Name of a JSON file where the models learned in float64 and in float32 '
+                        'are compared (modes, ODE coefficients, invariants, guards and assignments, memory and time). '
+                        'Set to empty (no report) by default', type=str, default='', required=False)
     parser.add_argument('--stepsize', help='Fixed sampling time step-size of the input trajectories. Set to 0.01 by default',
                         type=float, default=0.01, required=False)
     parser.add_argument('--filter-last-segment',
@@ -59,7 +139,7 @@ def read_commandline_arguments():
                         help='Options are: 2/3/4/5/6. Higher values computes more accurate derivatives. 5 is set default',
                         type=int, choices=[2, 3, 4, 5, 6], default=5, required=False)
 
-    args = vars(parser.parse_args())    #  create a dict structure of the arguments
+    args = vars(parser.parse_args(argv))    #  create a dict structure of the arguments
     # note the key name replaces with '_' for all '-' in the arguments
     '''
     print("input =", args['input_filename'])
@@ -68,6 +148,8 @@ def read_commandline_arguments():
     print("ode-degree =", args['ode_degree'])
     print("modes =", args['modes'])
     print("guard-degree =", args['guard_degree'])
+    print("guard-backend =", args['guard_backend'])
+    print("guard-max-points =", args['guard_max_points'])
     print("segmentation_error_tol =", args['segmentation_error_tol'])
     print("threshold_distance =", args['threshold_distance'])
     print("threshold_correlation =", args['threshold_correlation'])
@@ -79,6 +161,26 @@ def read_commandline_arguments():
     print("pool_values =", args['pool_values'])
     print("ode_speedup =", args['ode_speedup'])
     print("is_invariant =", args['is_invariant'])
+    print("cache_dir =", args['cache_dir'])
+    print("sweep_grid =", args['sweep_grid'])
+    print("jobs =", args['jobs'])
+    print("shards =", args['shards'])
+    print("shard-merge-tol =", args['shard_merge_tol'])
+    print("coordinator =", args['coordinator'])
+    print("coordinator-authkey =", args['coordinator_authkey'])
+    print("straggler-timeout =", args['straggler_timeout'])
+    print("trace-file =", args['trace_file'])
+    print("trace-memory =", args['trace_memory'])
+    print("trace-header =", args['trace_header'])
+    print("log-level =", args['log_level'])
+    print("profile =", args['profile'])
+    print("profile-stages =", args['profile_stages'])
+    print("profile-interval =", args['profile_interval'])
+    print("profile-output =", args['profile_output'])
+    print("dry-run =", args['dry_run'])
+    print("memory-budget =", args['memory_budget'])
+    print("precision =", args['precision'])
+    print("precision-report =", args['precision_report'])
     print("stepsize =", args['stepsize'])
     print("filter-last-segment =", args['filter_last_segment'])
     print("lmm-step-size =", args['lmm_step_size'])
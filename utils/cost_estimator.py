@@ -0,0 +1,246 @@
+"""
+This module estimates the memory and the running time of a learning run before it starts (see the options --dry-run and
+--memory-budget in utils/commandline_parser.py).
+
+The input file is scanned once without parsing the values, to count the points and the trajectories, and only the first
+points (the sample) are parsed. The sizes of the matrices follow from the number of points and the dimension:
+    A: (points, monomials of degree <= ode_degree), evaluated through a temporary of shape (points, monomials,
+        dimension), see evaluate_monomials() in utils/polynomial_basis.py
+    b1, b2, Y: (points, dimension)
+    the DTW table: (segments, segments), see compute_dtw_table()
+    the guard data: (guard points, monomials of degree <= guard_degree)
+With --shards, the matrices A, b1 and b2 hold the points of a shard, and are allocated by the shards learned in parallel
+(see infer_ha/sharding.py); Y holds all the points.
+The number of segments is extrapolated from the segmentation of the sample, and the running time from the time of the
+derivatives, of the segmentation, of a DTW comparison and of a guard computed on the sample. The estimates are meant to
+catch the runs that would not fit in memory or would take hours, they are not accurate to a few percent.
+"""
+
+import contextlib
+import io
+import logging
+import math
+import time
+
+import numpy as np
+
+from utils.polynomial_basis import complete_polynomial_size
+from utils.trace import max_rss_kb
+
+SAMPLE_POINTS = 2000
+FLOAT_SIZE = 8              # bytes of a numpy.double
+PARSED_VALUE_SIZE = 32      # bytes of a Python float in a list, while parsing the input file
+LIBSVM_CACHE_SIZE = 100 * 1024 * 1024   # bytes, the default kernel cache of libsvm
+MEMORY_WARNING_RATIO = 0.8  # a warning is printed when the estimate exceeds this ratio of the memory budget
+CHUNK_RATIO = 0.05          # a chunk of a computation done in chunks takes at most this ratio of the memory budget
+
+
+class MemoryBudgetExceeded(RuntimeError):
+    """
+    Raised when the estimated memory of the learning exceeds the memory budget.
+    """
+
+
+def chunk_rows(memory_budget, row_size):
+    """
+    :param memory_budget: the memory budget in megabytes, 0 when disabled.
+    :param row_size: the memory in bytes needed for one row (point) of the computation.
+    :return: the number of rows of a chunk, or 0 (no chunking) when the memory budget is disabled.
+    """
+    if memory_budget <= 0:
+        return 0
+    return max(int(memory_budget * 1024 * 1024 * CHUNK_RATIO) // row_size, 1)
+
+
+def read_input_statistics(input_filename, sample_points=SAMPLE_POINTS):
+    """
+    :param input_filename: the input file of trajectories, see parse_trajectories() in utils/parse_parameters.py.
+    :param sample_points: number of points parsed from the start of the file.
+    :return: a dictionary with the number of 'points' and of 'trajectories', the 'dimension' of the system (excluding
+        the time), the 'stepsize' of the first trajectory and the 'sample', a numpy.ndarray of shape (sample points,
+        dimension).
+    """
+    points = 0
+    trajectories = 0
+    sample = []
+    sample_time = []
+    with open(input_filename, 'r') as file:
+        for line in file:
+            if points < sample_points:
+                values = [float(word) for word in line.split()]
+                if not values:
+                    continue
+                sample_time.append(values[0])
+                sample.append(values[1:])
+                if values[0] == 0.0:
+                    trajectories += 1
+            else:
+                first_word = line.split(None, 1)
+                if not first_word:
+                    continue
+                if float(first_word[0]) == 0.0:   # a new trajectory starts at time 0, see parse_trajectories()
+                    trajectories += 1
+            points += 1
+    stepsize = sample_time[1] - sample_time[0] if len(sample_time) > 1 else 0.0
+    return {'points': points, 'trajectories': trajectories, 'dimension': len(sample[0]), 'stepsize': stepsize,
+            'sample': np.array(sample)}
+
+
+def megabytes(size):
+    return size / (1024 * 1024)
+
+
+def measure(function, *args):
+    """
+    :return: the pair (output of function(*args), wall-clock time in seconds). The printed and logged messages of the
+        function, e.g., the accuracy of the guard, are discarded.
+    """
+    logging.disable(logging.INFO)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            output = function(*args)
+            return output, time.perf_counter() - start
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def estimate_cost(parameters, sample_points=SAMPLE_POINTS):
+    """
+    Estimates the memory and the running time of learning from the input file with the given learning parameters.
+
+    :param parameters: the dictionary of arguments returned by read_commandline_arguments().
+    :param sample_points: number of points of the sample used to extrapolate the segments and the running time.
+    :return: a dictionary with the statistics of the input, the sizes (number of monomials, segments, DTW comparisons,
+        guards), 'memory': a list of (item, bytes), 'peak_memory' in bytes including the memory already used by the
+        process, and 'time': a list of (stage, seconds).
+    """
+    from infer_ha.clustering.cluster_by_dtw import dtw_similarity
+    from infer_ha.infer_transitions.guards import getGuard_inequality, select_guard_backend
+    from infer_ha.segmentation.compute_derivatives import diff_method_backandfor
+    from infer_ha.segmentation.segmentation import two_fold_segmentation
+
+    statistics = read_input_statistics(parameters['input_filename'], sample_points)
+    points = statistics['points']
+    L_y = statistics['dimension']
+    stepM = parameters['lmm_step_size']
+    stepsize = statistics['stepsize'] if parameters['stepsize'] == 0.01 else parameters['stepsize']  # see load_input()
+    rows = max(points - 2 * stepM, 0)   # the first and last M points have no derivatives
+    shards = max(1, min(parameters['shards'], statistics['trajectories']))  # see split_shards()
+    parallel = min(max(parameters['jobs'], 1), shards)     # the shards learned at the same time
+    shard_points = int(math.ceil(points / shards))
+    shard_rows = max(shard_points - 2 * stepM, 0)
+    ode_monomials = complete_polynomial_size(L_y, parameters['ode_degree'])
+    guard_monomials = complete_polynomial_size(L_y, parameters['guard_degree'])
+    num_mode = parameters['modes']
+    guard_backend = select_guard_backend(parameters['guard_backend'], parameters['guard_degree'], L_y)
+
+    # ********** segmentation of the sample **********
+    sample = statistics['sample']
+    scale = rows / max(len(sample) - 2 * stepM, 1)  # the ratio of the input to the sample
+    (A, b1, b2, Y, ytuple), derivatives_time = measure(diff_method_backandfor, [sample], parameters['ode_degree'],
+                                                       stepsize, stepM)
+    (segmented_traj, clfs, drop), segmentation_time = measure(
+        two_fold_segmentation, A, b1, b2, ytuple, Y, parameters['size_input_variable'], parameters['methods'], stepM,
+        parameters['segmentation_error_tol'], parameters['segmentation_fine_error_tol'])
+    sample_segments = max(len(segmented_traj), 1)
+    segments = max(int(math.ceil(sample_segments * scale)), statistics['trajectories'])
+    longest_segment = max([len(segment[2]) for segment in segmented_traj] + [1])
+    dtw_comparisons_max = segments * (segments - 1) // 2
+    dtw_comparisons = min(dtw_comparisons_max, segments * num_mode)    # greedy clustering, see cluster_by_dtw()
+    guards = num_mode * (num_mode - 1)
+    guard_points = 2 * segments
+    if parameters['guard_max_points'] > 0:
+        guard_points = min(guard_points, 2 * parameters['guard_max_points'])
+
+    # ********** time of a DTW comparison and of a guard on the sample **********
+    length = max(len(Y) // (2 * sample_segments), 2)   # the mean length of the segments of the sample
+    dtw_time = measure(dtw_similarity, Y[:length], Y[length:2 * length])[1]
+    half = min(guard_points // 2, len(Y) // 2)
+    guard_time = 0.0
+    if half >= 2:
+        guard_time = measure(getGuard_inequality, list(range(half)), list(range(half, 2 * half)), L_y,
+                             parameters['guard_degree'], Y, parameters['guard_backend'])[1]
+
+    # ********** memory **********
+    value_size = np.dtype(parameters['precision']).itemsize     # of the derivatives, see the option --precision
+    # kept until the end of the learning
+    persistent = [('input arrays (x2 for the concatenation)', 2 * points * (L_y + 1) * FLOAT_SIZE)]
+    if shards == 1:
+        persistent += [('A (%d x %d)' % (rows, ode_monomials), rows * ode_monomials * value_size),
+                       ('b1, b2, Y (3 x %d x %d)' % (rows, L_y), 3 * rows * L_y * value_size)]
+    else:
+        persistent += [('A (%d x %d) per shard, %d in parallel' % (shard_rows, ode_monomials, parallel),
+                        parallel * shard_rows * ode_monomials * value_size),
+                       ('b1, b2 (2 x %d x %d) per shard, %d in parallel' % (shard_rows, L_y, parallel),
+                        parallel * 2 * shard_rows * L_y * value_size),
+                       ('Y (%d x %d)' % (rows, L_y), rows * L_y * value_size)]
+    # freed at the end of the stage allocating them
+    monomial_rows = chunk_rows(parameters['memory_budget'], ode_monomials * (L_y + 1) * FLOAT_SIZE) or shard_points
+    monomial_rows = min(monomial_rows, shard_points)  # the monomials are evaluated in chunks with a memory budget
+    temporary = [('monomials of A, temporary (%d x %d x %d)' % (monomial_rows, ode_monomials, L_y),
+                  parallel * monomial_rows * ode_monomials * L_y * FLOAT_SIZE),
+                 ('segment regressions (%d x %d)' % (longest_segment, ode_monomials),
+                  2 * longest_segment * ode_monomials * FLOAT_SIZE),
+                 ('DTW table (%d x %d)' % (segments, segments), 2 * segments * segments * FLOAT_SIZE),
+                 ('guard data (%d x %d)' % (guard_points, guard_monomials),
+                  guard_points * guard_monomials * (L_y + 1) * FLOAT_SIZE)]
+    if guard_backend == "kernel":
+        temporary.append(('libsvm kernel cache', min(LIBSVM_CACHE_SIZE, guard_points * guard_points * FLOAT_SIZE)))
+    parsing = ('input parsing (Python lists)', points * (L_y + 1) * PARSED_VALUE_SIZE)  # freed before the derivatives
+    memory = [parsing] + persistent + temporary
+    sizes = dict(memory)
+    persistent_size = sum(size for item, size in persistent)
+    peak_size = max([parsing[1] + persistent[0][1], persistent_size + max(size for item, size in temporary)])
+    process_memory = (max_rss_kb() or 0) * 1024
+    peak_memory = process_memory + peak_size
+
+    times = [('derivatives', derivatives_time * scale / parallel),
+             ('segmentation', segmentation_time * scale / parallel),
+             ('clustering (%d DTW comparisons, at most %d)' % (dtw_comparisons, dtw_comparisons_max),
+              dtw_time * dtw_comparisons / parallel),
+             ('transitions (at most %d guards)' % guards, guard_time * guards)]
+
+    return {'points': points, 'trajectories': statistics['trajectories'], 'dimension': L_y, 'stepsize': stepsize,
+            'ode_monomials': ode_monomials, 'guard_monomials': guard_monomials, 'guard_backend': guard_backend,
+            'segments': segments, 'dtw_comparisons': dtw_comparisons, 'guards': guards, 'memory': memory,
+            'process_memory': process_memory, 'peak_memory': peak_memory, 'time': times,
+            'total_time': sum(seconds for stage, seconds in times), 'largest_item': max(sizes, key=sizes.get)}
+
+
+def print_cost_estimate(estimate):
+    """
+    Prints the estimate returned by estimate_cost().
+    """
+    print("Input: %d points, %d trajectories, dimension %d, step-size %g" % (estimate['points'],
+          estimate['trajectories'], estimate['dimension'], estimate['stepsize']))
+    print("Monomials: %d of the ODE, %d of the guard (%s backend). Estimated segments: %d" % (
+        estimate['ode_monomials'], estimate['guard_monomials'], estimate['guard_backend'], estimate['segments']))
+    print("{0:<56}{1:>14}".format("memory", "MB"))
+    for item, size in estimate['memory']:
+        print("{0:<56}{1:>14.1f}".format(item, megabytes(size)))
+    print("{0:<56}{1:>14.1f}".format("projected peak (with %.1f MB already used)" %
+                                     megabytes(estimate['process_memory']), megabytes(estimate['peak_memory'])))
+    print("{0:<56}{1:>14}".format("time", "seconds"))
+    for stage, seconds in estimate['time']:
+        print("{0:<56}{1:>14.1f}".format(stage, seconds))
+    print("{0:<56}{1:>14.1f}".format("projected total", estimate['total_time']))
+
+
+def check_memory_budget(estimate, memory_budget):
+    """
+    :param estimate: the estimate returned by estimate_cost().
+    :param memory_budget: the memory budget in megabytes. The value 0 disables the check.
+    :return: a warning message if the projected peak memory is close to the budget, otherwise None.
+    :raise MemoryBudgetExceeded: if the projected peak memory exceeds the budget.
+    """
+    if memory_budget <= 0:
+        return None
+    peak = megabytes(estimate['peak_memory'])
+    if peak > memory_budget:
+        raise MemoryBudgetExceeded("The learning needs about %.1f MB, more than the memory budget of %g MB (the largest "
+                                   "item is %s). Reduce ode-degree or guard-degree, or raise --memory-budget"
+                                   % (peak, memory_budget, estimate['largest_item']))
+    if peak > MEMORY_WARNING_RATIO * memory_budget:
+        return "The learning needs about %.1f MB, close to the memory budget of %g MB" % (peak, memory_budget)
+    return None
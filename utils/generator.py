@@ -1,23 +1,13 @@
 import numpy as np 
 import time
 
+from utils.polynomial_basis import homogeneous_exponents, complete_polynomial_exponents
+
 def generator_items(m, n):
     """@m : the number of variables
        @n : the order
     """
-    if m == 1:
-        return np.ones((1,1))*n
-    if n == 0:
-        return np.zeros((1,m))
-    A = np.zeros((1, m))
-    A[0][0] = n
-    for i in range(1, n+1):
-        B = generator_items(m-1,i)
-        B_row_number = B.shape[0]
-        C = np.ones((B_row_number, 1))*(n-i)
-        D = np.c_[C,B]
-        A = np.r_[A,D]
-    return A
+    return homogeneous_exponents(m, n).astype(float)
 
 def generate_complete_polynomial(m,n):
     """
@@ -28,14 +18,7 @@ def generate_complete_polynomial(m,n):
     array([2, 0], [1, 1], [0, 2], [1, 0], [0, 1], [0, 0]).
 
     """
-    A = None
-    for i in range(0, n+1):
-        g = generator_items(m,n-i)
-        if i == 0:
-            A = g
-        else:
-            A = np.r_[A,g]
-    return A
+    return np.array(complete_polynomial_exponents(m, n))   # a copy of the memoized table
 
 if __name__ == "__main__":
     start = time.time()
@@ -1,5 +1,7 @@
 from typing import List
 
+from utils.polynomial_basis import homogeneous_exponents, multinomial_expansion
+
 
 def permut(n: int, k: int) -> List[List[int]]:
     """
@@ -9,32 +11,8 @@ def permut(n: int, k: int) -> List[List[int]]:
     :param k: the number of terms/variables in the multinomial
     :return: All the coefficients of the multinomial expansion of the form (a+b+c+ ... + k)^n
     """
-    res = []
-    myres = []
-
-    def backtrack(start, comb):
-        sumEle = 0
-        for x in range(0, len(comb)):
-            sumEle += comb[x]
-
-        if len(comb) == k and sumEle == n:
-            # myres.append(comb.copy())   # appends at the end
-            myres.insert(0, comb.copy())  # appends at the start
-            # print(myres)
-        if len(comb) == k:
-            res.append(comb.copy())
-            return
-        # else:
-        #     pass
-
-        for i in range(start, n + 1):  # n+1 because for-in-range in python does not include 'end' in range(0,end)
-            comb.append(i)
-            backtrack(start, comb)  # everytime the combination starts from 0
-            comb.pop()
-
-    backtrack(0, [])    # starts from 0
-    # return res    # returns all the list without the constrain such that r1+r2+...+rk == n
-    return myres  # returns all the list that satisfy the constrain such that r1+r2+...+rk == n
+    # The tuples are enumerated directly by the registry in the order of the original backtracking implementation
+    return homogeneous_exponents(k, n).tolist()  # all the list that satisfy the constrain such that r1+r2+...+rk == n
 
 
 def factorial(i):
@@ -69,14 +47,8 @@ def multinomial(vars, powers):
     :return: All the list of combinations/expansion of Multinomial along with the computed Coefficient of each term
      [coeff: double, followed by expansion_list]
     """
-    comb_list = permut(powers, vars)
-    # print(comb_list)
-    combine_list = []
-    for data in comb_list:
-        val = compute_coeff(data)
-        combine_list.append([val] + data)
-        # print("Coefficient = ", val)
-        # print(combine_list)
+    coefficients, exponents = multinomial_expansion(vars, powers)
+    combine_list = [[val] + data for val, data in zip(coefficients.tolist(), exponents.tolist())]
 
     return combine_list
 
@@ -0,0 +1,94 @@
+"""
+This module is the single registry of the polynomial bases used throughout the learning algorithm:
+    (1) the exponents of the monomials of the mapping function \Phi for the ODE (see generator.py), and
+    (2) the terms and the multinomial coefficients of the expansion of the SVM polynomial kernel (gamma.U.V + 1)^degree
+        used for the guards (see misc_math_functions.py).
+
+The exponent tables are enumerated directly (without generating and filtering all the tuples) and are memoized, so that
+every module asking for the same basis shares the same table. The returned arrays are read-only, make a copy before
+modifying them.
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def _compositions(total, parts):
+    """
+    Enumerates all the tuples of 'parts' non-negative integers whose sum is 'total', in the descending lexicographic
+    order. Eg. for total=2, parts=2: ((2, 0), (1, 1), (0, 2)).
+    """
+    if parts == 1:
+        return ((total,),)
+    return tuple((first,) + rest for first in range(total, -1, -1) for rest in _compositions(total - first, parts - 1))
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=None)
+def homogeneous_exponents(vars, degree):
+    """
+    :param vars: number of variables
+    :param degree: total degree of each monomial
+    :return: numpy.ndarray of int of shape (terms, vars). Each row holds the powers of the variables of a monomial
+        whose total degree is exactly degree. The rows are in the descending lexicographic order.
+    """
+    return _read_only(np.array(_compositions(degree, vars), dtype=int).reshape(-1, vars))
+
+
+@lru_cache(maxsize=None)
+def complete_polynomial_exponents(vars, max_degree):
+    """
+    :param vars: number of variables
+    :param max_degree: maximum total degree of the monomials
+    :return: numpy.ndarray of float of shape (terms, vars). Each row holds the powers of the variables of a monomial
+        having total degree <= max_degree. Monomials of higher degree come first.
+        E.g. output for vars = 2, max_degree = 2:
+        array([2, 0], [1, 1], [0, 2], [1, 0], [0, 1], [0, 0]).
+    """
+    table = np.vstack([homogeneous_exponents(vars, degree) for degree in range(max_degree, -1, -1)])
+    return _read_only(table.astype(float))
+
+
+@lru_cache(maxsize=None)
+def multinomial_expansion(vars, powers):
+    """
+    :param vars: number of terms or variables
+    :param powers: the power of the multinomial
+    :return: the pair (coefficients, exponents) of the expansion of (a + b + ... )^powers, where coefficients is a
+        numpy.ndarray of float of shape (terms, ) holding the coefficient n!/(r1! * r2! * ... * rk!) of each term and
+        exponents is a numpy.ndarray of int of shape (terms, vars) holding the powers r1, ..., rk of each term.
+    """
+    exponents = homogeneous_exponents(vars, powers)
+    numerator = math.factorial(powers)
+    coefficients = [numerator / math.prod(math.factorial(r) for r in term) for term in exponents.tolist()]
+    return _read_only(np.array(coefficients, dtype=float)), exponents
+
+
+def complete_polynomial_size(vars, max_degree):
+    """
+    :param vars: number of variables
+    :param max_degree: maximum total degree of the monomials
+    :return: the number of monomials having total degree <= max_degree, i.e., the number of rows returned by
+        complete_polynomial_exponents(vars, max_degree) or by multinomial_expansion(vars + 1, max_degree), without
+        enumerating them.
+    """
+    return math.comb(vars + max_degree, max_degree)
+
+
+def evaluate_monomials(points, exponents):
+    """
+    Evaluates all the monomials at all the points in a single batched operation.
+
+    :param points: numpy.ndarray of shape (rows, vars)
+    :param exponents: numpy.ndarray of shape (terms, vars) as returned by the functions of this module.
+    :return: numpy.ndarray of shape (rows, terms) where the item [i, j] is the monomial j evaluated at points[i].
+    """
+    points = np.asarray(points)
+    return np.prod(points[:, np.newaxis, :] ** exponents[np.newaxis, :, :], axis=2)
@@ -0,0 +1,170 @@
+"""
+This module validates the learning in single precision (see the options --precision and --precision-report in
+utils/commandline_parser.py). The same input is learned twice, with the derivatives stored in double precision
+(float64, the reference) and in single precision (float32), and the two models are compared:
+    the number of modes and whether the segments are clustered into the same modes,
+    the largest difference of the coefficients of the ODEs, of the bounds of the invariants and of the coefficients of
+    the guards and of the assignments of the transitions present in both models (a transition is identified by its
+    source and destination modes),
+    the memory of the matrices of the derivatives and the learning time of each precision.
+A difference is reported both absolute and relative to the largest absolute value of the reference. The report is a
+dictionary, written as a JSON file by write_precision_report():
+    {"runs": {"float64": {"modes": 4, "transitions": 6, "derivatives_bytes": 1440000, "seconds": 2.1}, "float32": ...},
+     "same_modes": true, "same_clustering": true, "ode": {"absolute": 1e-6, "relative": 2e-7}, "invariants": ...,
+     "guards": ..., "assignments": ..., "missing_transitions": [], "extra_transitions": []}
+A difference is null when the structures of the two models differ, e.g., the numbers of modes.
+"""
+
+import json
+import time
+
+import numpy as np
+
+from infer_ha.learner import Learner
+
+PRECISIONS = ['float64', 'float32']     # the reference precision first
+
+
+def numeric_values(item):
+    """
+    :param item: a number, a numpy.ndarray or a (nested) list of them, e.g., the invariant of a mode.
+    :return: the values of item as a flat numpy.ndarray of doubles.
+    """
+    if isinstance(item, (list, tuple)):
+        if not item:
+            return np.zeros(0)
+        return np.concatenate([numeric_values(child) for child in item])
+    return np.asarray(item, dtype=np.double).ravel()
+
+
+def difference(reference, other):
+    """
+    :return: the dictionary {'absolute': largest absolute difference, 'relative': the absolute difference divided by the
+        largest absolute value of reference}, or None if reference and other have a different number of values.
+    """
+    reference = numeric_values(reference)
+    other = numeric_values(other)
+    if reference.shape != other.shape:
+        return None
+    if reference.size == 0:
+        return {'absolute': 0.0, 'relative': 0.0}
+    absolute = float(np.max(np.abs(reference - other)))
+    scale = float(np.max(np.abs(reference)))
+    return {'absolute': absolute, 'relative': absolute / scale if scale > 0 else absolute}
+
+
+def combined_difference(differences):
+    """
+    :return: the largest of the differences, or None if any of them is None.
+    """
+    if any(item is None for item in differences):
+        return None
+    return {'absolute': max([item['absolute'] for item in differences] + [0.0]),
+            'relative': max([item['relative'] for item in differences] + [0.0])}
+
+
+def segment_modes(P_modes):
+    """
+    :return: a dictionary {positions of the points of a segment: mode-id}.
+    """
+    return {tuple(segment[2]): mode_id for mode_id, mode in enumerate(P_modes) for segment in mode}
+
+
+def compare_models(reference, model):
+    """
+    :param reference: the model (P_modes, G, mode_inv, transitions, position) learned in double precision, see
+        infer_model() in infer_ha/infer_HA.py.
+    :param model: the model learned in single precision.
+    :return: the comparison of the two models, see the description of this module (without the key 'runs').
+    """
+    P_ref, G_ref, inv_ref, transitions_ref = reference[:4]
+    P_modes, G, mode_inv, transitions = model[:4]
+    same_modes = len(P_ref) == len(P_modes)
+    comparison = {'same_modes': same_modes,
+                  'same_clustering': same_modes and segment_modes(P_ref) == segment_modes(P_modes),
+                  'ode': difference(G_ref, G) if same_modes else None,
+                  'invariants': difference([inv[1] for inv in inv_ref], [inv[1] for inv in mode_inv]) if same_modes
+                  else None}
+
+    transitions_by_modes = {(transition[0], transition[1]): transition for transition in transitions}
+    guards = []
+    assignments = []
+    missing = []
+    for transition in transitions_ref:
+        other = transitions_by_modes.pop((transition[0], transition[1]), None)
+        if other is None:
+            missing.append([transition[0], transition[1]])
+            continue
+        guards.append(difference(transition[2], other[2]))
+        assignments.append(combined_difference([difference(transition[3], other[3]),
+                                                difference(transition[4], other[4])]))
+    comparison['guards'] = combined_difference(guards)
+    comparison['assignments'] = combined_difference(assignments)
+    comparison['missing_transitions'] = missing
+    comparison['extra_transitions'] = [list(modes) for modes in sorted(transitions_by_modes)]
+    return comparison
+
+
+def learn_in_precision(list_of_trajectories, learning_parameters, precision):
+    """
+    :return: the pair (model learned with the derivatives in the given precision, the run statistics: 'modes',
+        'transitions', 'derivatives_bytes' and 'seconds').
+    """
+    start = time.perf_counter()
+    learner = Learner(list_of_trajectories, dict(learning_parameters, precision=precision))
+    derivatives_bytes = sum(matrix.nbytes for matrix in learner.derivatives()[:4])  # A, b1, b2 and Y
+    model = learner.infer_model()
+    run = {'modes': len(model[0]), 'transitions': len(model[3]), 'derivatives_bytes': derivatives_bytes,
+           'seconds': time.perf_counter() - start}
+    return model, run
+
+
+def precision_report(list_of_trajectories, learning_parameters):
+    """
+    Learns the input trajectories in double and in single precision and compares the two models.
+
+    :param list_of_trajectories: the input trajectories, see infer_model() in infer_ha/infer_HA.py.
+    :param learning_parameters: the dictionary of the learning parameters. The parameter 'precision' is ignored.
+    :return: the report, see the description of this module.
+    """
+    models = {}
+    runs = {}
+    for precision in PRECISIONS:
+        models[precision], runs[precision] = learn_in_precision(list_of_trajectories, learning_parameters, precision)
+    report = {'runs': runs}
+    report.update(compare_models(models['float64'], models['float32']))
+    return report
+
+
+def format_difference(item):
+    if item is None:
+        return "not comparable"
+    return "%.3g (relative %.3g)" % (item['absolute'], item['relative'])
+
+
+def print_precision_report(report):
+    """
+    Prints the report returned by precision_report().
+    """
+    print("{0:<12}{1:>8}{2:>14}{3:>20}{4:>12}".format("precision", "modes", "transitions", "derivatives MB",
+                                                      "seconds"))
+    for precision in PRECISIONS:
+        run = report['runs'][precision]
+        print("{0:<12}{1:>8}{2:>14}{3:>20.2f}{4:>12.3f}".format(precision, run['modes'], run['transitions'],
+                                                                run['derivatives_bytes'] / (1024 * 1024),
+                                                                run['seconds']))
+    print("same modes:", report['same_modes'], " same clustering:", report['same_clustering'])
+    for item in ['ode', 'invariants', 'guards', 'assignments']:
+        print("largest difference of the %s: %s" % (item, format_difference(report[item])))
+    if report['missing_transitions'] or report['extra_transitions']:
+        print("transitions only in float64:", report['missing_transitions'], " only in float32:",
+              report['extra_transitions'])
+
+
+def write_precision_report(report, outputfilename):
+    """
+    :param report: the dictionary returned by precision_report().
+    :param outputfilename: name of the JSON file.
+    """
+    with open(outputfilename, "w") as f_out:
+        json.dump(report, f_out, indent=2)
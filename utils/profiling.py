@@ -0,0 +1,266 @@
+"""
+This module profiles the learning algorithm without changing its code (see the options --profile, --profile-stages,
+--profile-interval and --profile-output in utils/commandline_parser.py).
+
+Two profilers are supported:
+    (1) deterministic: Python's cProfile records every function call. Accurate call counts, but slows the run down.
+    (2) sampling: a thread records the call stacks of the profiled threads at a fixed interval. Low overhead; the time
+        of a stack is estimated by the time elapsed since the previous sample (the sampling thread can be delayed while
+        a profiled thread holds the GIL, so the number of samples alone underestimates the time).
+The profile covers the whole run or only the selected stages of the learning algorithm (the stages of utils/trace.py,
+e.g., 'clustering' or 'guard'). With --jobs > 1, the stages and the tasks run by the threads of the pool (see
+infer_ha/scheduler.py) are profiled too: cProfile only records the thread enabling it, so each thread has its own
+profile, and the profiles of the threads are merged. The sampled time of the threads running at the same time adds up.
+The profile is written in two files:
+    <output>.pstats: the statistics of the functions, readable with Python's pstats module or tools such as snakeviz.
+    <output>.collapsed: the collapsed stacks, one line "root;caller;function value" per call stack, readable by the
+        flame-graph tools (flamegraph.pl, speedscope, ...). The value is the time in microseconds. For the deterministic
+        profiler, the stacks are rebuilt from the caller-callee statistics by splitting the time of each function among
+        its callers in proportion to the time of each call.
+"""
+
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+
+from utils.trace import add_stage_listener, remove_stage_listener
+
+PROFILERS = ['deterministic', 'sampling']
+MINIMUM_STACK_TIME = 1e-6   # stacks of the deterministic profile accounting for less time (in seconds) are not written
+
+
+class Profiler:
+    """
+    Profiles the run between start() and stop(), or only the selected stages.
+    """
+
+    def __init__(self, profiler, stages=(), interval=0.005):
+        """
+        :param profiler: 'deterministic' or 'sampling'.
+        :param stages: names of the stages to profile. All the run is profiled if empty.
+        :param interval: the sampling interval in seconds.
+        """
+        self.profiler = profiler
+        self.stages = set(stages)
+        self.interval = interval
+        self.open_stages = {}   # thread id: number of selected stages and tasks in them running in the thread
+        self.profiles = {}  # thread id: cProfile.Profile of the thread (deterministic profiler)
+        self.profiled_tasks = threading.local()     # stack of the tasks of the thread, True for the profiled ones
+        self.lock = threading.Lock()
+        self.samples = {}   # stack (tuple of pstats function keys from the root): [number of samples, seconds]
+        self.sampler = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        if self.profiler == 'sampling':
+            self.sampler = threading.Thread(target=self.sample, daemon=True)
+            self.sampler.start()
+        add_stage_listener(self)
+        if not self.stages:
+            self.enter()
+
+    def stop(self):
+        remove_stage_listener(self)
+        if not self.stages:
+            self.leave()
+        if self.sampler is not None:
+            self.stopped.set()
+            self.sampler.join()
+
+    def enter(self):
+        """
+        Starts profiling the current thread, if not already profiled (the profiled parts of a thread can be nested).
+        """
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.open_stages[thread_id] = self.open_stages.get(thread_id, 0) + 1
+            if self.open_stages[thread_id] > 1 or self.profiler != 'deterministic':
+                return
+            profile = self.profiles.setdefault(thread_id, cProfile.Profile())
+        profile.enable()
+
+    def leave(self):
+        """
+        Stops profiling the current thread at the end of its outermost profiled part.
+        """
+        thread_id = threading.get_ident()
+        with self.lock:
+            self.open_stages[thread_id] -= 1
+            if self.open_stages[thread_id] > 0:
+                return
+            del self.open_stages[thread_id]
+            profile = self.profiles.get(thread_id)
+        if profile is not None:
+            profile.disable()
+
+    def stage_started(self, name):
+        if name in self.stages:
+            self.enter()
+
+    def stage_finished(self, name):
+        if name in self.stages:
+            self.leave()
+
+    def task_started(self, graph_thread):
+        """
+        Profiles the task run by the current thread if the thread running its graph is profiled, see notified_task() in
+        utils/trace.py.
+        """
+        with self.lock:
+            profiled = graph_thread in self.open_stages
+        if not hasattr(self.profiled_tasks, 'stack'):
+            self.profiled_tasks.stack = []
+        self.profiled_tasks.stack.append(profiled)
+        if profiled:
+            self.enter()
+
+    def task_finished(self):
+        if self.profiled_tasks.stack.pop():
+            self.leave()
+
+    def sample(self):
+        """
+        Records the stacks of the profiled threads every interval seconds.
+        """
+        previous = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, previous = now - previous, now
+            with self.lock:
+                thread_ids = list(self.open_stages)
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+                stack = tuple(reversed(stack))
+                sample = self.samples.setdefault(stack, [0, 0.0])
+                sample[0] += 1
+                sample[1] += elapsed
+
+    def stats(self):
+        """
+        :return: the statistics in the format of the pstats module: a dictionary {function: (primitive calls, calls,
+            own time, cumulative time, callers)} where callers is a dictionary {caller: (primitive calls, calls,
+            own time, cumulative time)} and a function is the tuple (file name, line number, function name). For the
+            sampling profiler, the calls are the number of samples. The profiles of the threads are merged.
+        """
+        if self.profiler == 'deterministic':
+            return pstats.Stats(*self.profiles.values()).stats
+        return sampled_stats(self.samples)
+
+    def collapsed_stacks(self):
+        """
+        :return: a dictionary {stack: time in seconds} where stack is a tuple of functions from the root.
+        """
+        if self.profiler == 'deterministic':
+            return stats_to_stacks(self.stats())
+        return {stack: seconds for stack, (_, seconds) in self.samples.items()}
+
+    def write(self, output_prefix):
+        """
+        Writes the profile in the files output_prefix.pstats and output_prefix.collapsed.
+
+        :return: the names of the two files.
+        """
+        pstats_file = output_prefix + ".pstats"
+        with open(pstats_file, "wb") as f_out:
+            marshal.dump(self.stats(), f_out)
+        collapsed_file = output_prefix + ".collapsed"
+        write_collapsed_stacks(self.collapsed_stacks(), collapsed_file)
+        return pstats_file, collapsed_file
+
+
+def sampled_stats(samples):
+    """
+    Converts the sampled stacks to the format of the pstats module, see Profiler.stats().
+
+    :param samples: a dictionary {stack: [number of samples, seconds]}.
+    """
+    stats = {}
+    for stack, (total, duration) in samples.items():
+        seen = set()
+        for depth, function in enumerate(stack):
+            primitive, calls, own_time, cumulative_time, callers = stats.setdefault(function, (0, 0, 0.0, 0.0, {}))
+            is_leaf = depth == len(stack) - 1
+            if function not in seen:    # a recursive function is counted once per stack
+                calls += total
+                cumulative_time += duration
+            if is_leaf:
+                own_time += duration
+            stats[function] = (calls, calls, own_time, cumulative_time, callers)
+            if depth > 0 and function not in seen:
+                caller = stack[depth - 1]
+                edge = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (edge[0] + total, edge[1] + total, edge[2] + (duration if is_leaf else 0.0),
+                                   edge[3] + duration)
+            seen.add(function)
+    return stats
+
+
+def stats_to_stacks(stats):
+    """
+    Rebuilds the call stacks of a deterministic profile. The time of a function is split among its callers in
+    proportion to the cumulative time of the calls from each caller.
+
+    :param stats: the statistics in the format of the pstats module, see Profiler.stats().
+    :return: a dictionary {stack: own time in seconds of the last function of the stack}.
+    """
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((function, edge[3]))
+    roots = [function for function, values in stats.items() if not values[4]]
+
+    stacks = {}
+    pending = [((root,), 1.0) for root in roots]   # (stack, fraction of the time of the last function in this stack)
+    while pending:
+        stack, fraction = pending.pop()
+        function = stack[-1]
+        own_time = stats[function][2] * fraction
+        if own_time >= MINIMUM_STACK_TIME:
+            stacks[stack] = stacks.get(stack, 0.0) + own_time
+        for callee, edge_time in callees.get(function, []):
+            callee_time = stats[callee][3]
+            if callee in stack or callee_time <= 0:     # recursion: the time is already in the caller's stack
+                continue
+            callee_fraction = fraction * edge_time / callee_time
+            if callee_fraction * callee_time >= MINIMUM_STACK_TIME:
+                pending.append((stack + (callee,), callee_fraction))
+    return stacks
+
+
+def function_label(function):
+    filename, line, name = function
+    if filename == '~':     # built-in functions, e.g., <built-in method numpy.dot>
+        return name.replace(";", ":")
+    return (name + " (" + os.path.basename(filename) + ":" + str(line) + ")").replace(";", ":")
+
+
+def write_collapsed_stacks(stacks, outputfilename):
+    """
+    :param stacks: a dictionary {stack: time in seconds}, see Profiler.collapsed_stacks().
+    :param outputfilename: name of the file, one line "function;function;function microseconds" per stack.
+    """
+    with open(outputfilename, "w") as f_out:
+        for stack, seconds in sorted(stacks.items(), key=lambda item: -item[1]):
+            microseconds = int(round(seconds * 1e6))
+            if microseconds > 0:
+                f_out.write(";".join(function_label(function) for function in stack) + " " + str(microseconds) + "\n")
+
+
+def parse_profile_stages(profile_stages):
+    """
+    :param profile_stages: comma separated names of stages, Eg.: "clustering, guard".
+    :return: the list of the names.
+    """
+    return [stage.strip() for stage in profile_stages.split(",") if stage.strip()]
@@ -0,0 +1,158 @@
+"""
+This module shares the large read-only arrays of the learning (e.g., the derivatives A, b1 and Y, or the DTW table) with
+the worker processes without copying them. Without it, the arrays are pickled and sent to every worker of a pool.
+
+The owner process publishes an array once in a block of shared memory (multiprocessing.shared_memory) and sends the
+workers a small descriptor (SharedArray) instead of the array. A worker attaches to the block and gets a read-only
+numpy.ndarray using the shared memory as its buffer (zero-copy). Eg.:
+    with SharedArrays() as shared:
+        state = shared.share_state({'A': A, 'Y': Y, 'segments': segmented_traj})
+        with ProcessPoolExecutor(max_workers=4, initializer=init_worker, initargs=(state,)) as executor:
+            ...
+    # in the worker: state = attach_state(state)
+
+The blocks are removed (unlinked) by the owner when the with-statement ends, when the SharedArrays is garbage collected
+or when the process exits. If the owner crashes, the resource tracker of the multiprocessing module removes them. The
+blocks are named "learnha_<pid of the owner>_<number>", so that the blocks left by a process killed together with its
+resource tracker are removed by the next SharedArrays created (see remove_stale_segments()).
+
+When the module multiprocessing.shared_memory is not available (Python 3.7 or older), the arrays are not published and
+are pickled as before.
+"""
+
+import collections
+import itertools
+import os
+import weakref
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory     # Python 3.8
+except ImportError:
+    shared_memory = None
+
+SEGMENT_PREFIX = "learnha_"
+SHARED_MEMORY_FOLDER = "/dev/shm"   # where the blocks are listed on Linux, see remove_stale_segments()
+MINIMUM_SHARED_BYTES = 64 * 1024    # smaller arrays are pickled, their copy costs less than a block of shared memory
+
+SharedArray = collections.namedtuple('SharedArray', ['name', 'shape', 'dtype'])   # the descriptor of a published array
+
+_segment_numbers = itertools.count()
+_attached_segments = {}     # name: SharedMemory, the blocks attached by this process are kept open until its exit
+
+
+class SharedArrays:
+    """
+    Owns the blocks of shared memory of the published arrays.
+    """
+
+    def __init__(self):
+        self.segments = []
+        remove_stale_segments()
+        self.finalizer = weakref.finalize(self, release_segments, self.segments)    # also called at the exit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def publish(self, array):
+        """
+        Copies the array in a new block of shared memory.
+
+        :param array: a numpy.ndarray.
+        :return: the descriptor SharedArray of the block, to be attached by the workers with attach().
+        """
+        array = np.ascontiguousarray(array)
+        name = SEGMENT_PREFIX + str(os.getpid()) + "_" + str(next(_segment_numbers))
+        segment = shared_memory.SharedMemory(name=name, create=True, size=max(array.nbytes, 1))
+        self.segments.append(segment)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        return SharedArray(segment.name, array.shape, array.dtype.str)
+
+    def share_state(self, state, minimum_bytes=MINIMUM_SHARED_BYTES):
+        """
+        :param state: a dictionary sent to the workers, e.g., the initializer argument of a pool of processes.
+        :param minimum_bytes: the arrays of state smaller than this size are left in the dictionary.
+        :return: a copy of state whose numpy.ndarray values are replaced by their descriptors, see attach_state().
+        """
+        if shared_memory is None:
+            return state
+        return {key: self.publish(value) if isinstance(value, np.ndarray) and value.nbytes >= minimum_bytes else value
+                for key, value in state.items()}
+
+    def close(self):
+        """
+        Removes the blocks. The workers must not use the attached arrays afterwards.
+        """
+        self.finalizer()
+
+
+def release_segments(segments):
+    while segments:
+        segment = segments.pop()
+        segment.close()
+        segment.unlink()
+
+
+def attach(descriptor):
+    """
+    :param descriptor: a SharedArray returned by SharedArrays.publish().
+    :return: the read-only numpy.ndarray stored in the block of shared memory, without copy.
+    """
+    segment = _attached_segments.get(descriptor.name)
+    if segment is None:
+        # the workers of a pool share the resource tracker of the owner, so the block is removed by the owner only
+        segment = shared_memory.SharedMemory(name=descriptor.name)
+        _attached_segments[descriptor.name] = segment
+    array = np.ndarray(descriptor.shape, dtype=np.dtype(descriptor.dtype), buffer=segment.buf)
+    array.flags.writeable = False
+    return array
+
+
+def attach_state(state):
+    """
+    :param state: a dictionary returned by SharedArrays.share_state().
+    :return: a copy of state whose descriptors are replaced by the attached arrays.
+    """
+    return {key: attach(value) if isinstance(value, SharedArray) else value for key, value in state.items()}
+
+
+def segment_owner_alive(name):
+    """
+    :param name: the name of a block, "learnha_<pid>_<number>".
+    :return: True if the owner process of the block is running (or if its pid is not readable).
+    """
+    try:
+        pid = int(name[len(SEGMENT_PREFIX):].split("_")[0])
+        os.kill(pid, 0)
+    except ValueError:
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:     # a process of another user
+        return True
+    return True
+
+
+def remove_stale_segments():
+    """
+    Removes the blocks whose owner process is not running anymore, left by a crash.
+
+    :return: the names of the removed blocks.
+    """
+    if shared_memory is None or not os.path.isdir(SHARED_MEMORY_FOLDER):
+        return []
+    removed = []
+    for name in os.listdir(SHARED_MEMORY_FOLDER):
+        if name.startswith(SEGMENT_PREFIX) and not segment_owner_alive(name):
+            try:
+                segment = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:   # removed in the meantime
+                continue
+            segment.close()
+            segment.unlink()
+            removed.append(name)
+    return removed
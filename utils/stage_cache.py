@@ -0,0 +1,123 @@
+"""
+This module implements a disk-backed cache for the stages of the learning algorithm (see infer_model() in
+infer_ha/infer_HA.py), so that a rerun with different parameters resumes from the first stage affected by the change.
+
+The output of a stage is pickled into the cache directory in a file named by the stage and a key. The key of a stage is
+a hash of the key of the stage it depends on (the first stage depends on the input data) and of the values of only the
+parameters used by the stage, listed in STAGE_PARAMETERS. Thus, changing the guard degree only recomputes the
+transitions, whereas changing the DTW thresholds recomputes the clustering and the stages depending on it.
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+
+import numpy as np
+
+from utils.trace import count
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1   # increase when the output of a stage changes, to invalidate the existing cache files
+
+# The learning parameters (see utils/commandline_parser.py) affecting the output of each stage.
+STAGE_PARAMETERS = {
+    'derivatives': ['ode_degree', 'stepsize', 'lmm_step_size', 'precision'],
+    'segmentation': ['size_input_variable', 'methods', 'segmentation_error_tol', 'segmentation_fine_error_tol'],
+    'filtering': ['methods', 'filter_last_segment'],
+    'clustering': ['ode_degree', 'modes', 'segmentation_error_tol', 'size_input_variable', 'methods', 'ode_speedup',
+                   'threshold_correlation', 'threshold_distance', 'dbscan_eps_dist', 'dbscan_min_samples'],
+    'invariants': ['is_invariant'],
+    'transitions': ['guard_degree', 'variableType_datastruct', 'guard_backend', 'guard_max_points'],
+}
+
+# The default values of the parameters added after the first version of the learner, which the dictionaries of the
+# learning parameters built by the callers of infer_model() may lack. This is the only place defining them: the options
+# in utils/commandline_parser.py and the keyword arguments of compute_transitions() and getGuard_inequality() use them.
+OPTIONAL_PARAMETERS = {'precision': 'float64', 'guard_backend': 'kernel', 'guard_max_points': 1000}
+
+# The stage whose output is the input of each stage. The first stage depends only on the input data.
+STAGE_DEPENDENCIES = {
+    'derivatives': None,
+    'segmentation': 'derivatives',
+    'filtering': 'segmentation',
+    'clustering': 'filtering',
+    'invariants': 'clustering',
+    'transitions': 'clustering',
+}
+
+
+def data_key(t_list, y_list, position):
+    """
+    :param t_list: a single-item list whose item is a numpy.ndarray containing time-values as a concatenated list.
+    :param y_list: a single-item list whose item is a numpy.ndarray containing vector of values (of input and output).
+    :param position: is a list containing the start and end positions of each input trajectory.
+    :return: the hash (hexadecimal string) of the input data.
+
+    """
+    digest = hashlib.sha256(("learnHA-cache-" + str(CACHE_VERSION)).encode())
+    for values in [t_list[0], y_list[0]]:
+        values = np.ascontiguousarray(values)
+        digest.update(str((values.dtype.str, values.shape)).encode())
+        digest.update(values.tobytes())
+    digest.update(repr(position).encode())
+
+    return digest.hexdigest()
+
+
+def optional_parameter(learning_parameters, name):
+    """
+    :param learning_parameters: is a dictionary data structure containing all the parameters of the learning algorithm.
+    :param name: name of the parameter, one of the keys of OPTIONAL_PARAMETERS.
+    :return: the value of the parameter, or its default value when the dictionary lacks it.
+
+    """
+    return learning_parameters.get(name, OPTIONAL_PARAMETERS[name])
+
+
+def stage_key(previous_key, stage, learning_parameters):
+    """
+    :param previous_key: the key of the stage whose output is the input of this stage, or the key of the input data.
+    :param stage: name of the stage, one of the keys of STAGE_PARAMETERS.
+    :param learning_parameters: is a dictionary data structure containing all the parameters of the learning algorithm.
+    :return: the key (hexadecimal string) of the output of the stage.
+
+    """
+    stage_parameters = [(name, learning_parameters[name] if name not in OPTIONAL_PARAMETERS else
+                         optional_parameter(learning_parameters, name)) for name in STAGE_PARAMETERS[stage]]
+
+    return hashlib.sha256(repr((previous_key, stage, stage_parameters)).encode()).hexdigest()
+
+
+def cached_stage(cache_dir, stage, key, compute, *args):
+    """
+    Returns the output of compute(*args) and stores it in the cache directory. If the output for the same stage and key
+    is already stored, it is loaded without calling compute.
+
+    :param cache_dir: the cache directory. An empty string disables the cache, compute(*args) is always called.
+    :param stage: name of the stage.
+    :param key: the key of the stage as returned by stage_key().
+    :param compute: the function computing the stage.
+    :param args: the arguments of the function compute.
+    :return: the output of compute(*args).
+
+    """
+    if not cache_dir:
+        return compute(*args)
+
+    cache_file = os.path.join(cache_dir, stage + "_" + key + ".pkl")
+    if os.path.isfile(cache_file):
+        with open(cache_file, "rb") as f_in:
+            logger.info("Loaded %s from the cache file %s", stage, cache_file)
+            count('cache_hits')
+            return pickle.load(f_in)
+
+    output = compute(*args)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary_file = cache_file + "." + str(os.getpid()) + ".tmp"
+    with open(temporary_file, "wb") as f_out:
+        pickle.dump(output, f_out, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_file, cache_file)  # an interrupted run does not leave an incomplete cache file
+
+    return output
@@ -0,0 +1,292 @@
+"""
+This module records a structured trace of the stages of the learning algorithm.
+
+A stage is traced by the context manager trace_stage(), which records its wall-clock and CPU time, the maximum resident
+memory of the process at its end and optionally (see start_trace()) the peak of the memory allocated by Python during the
+stage. Stages can be nested, e.g., each guard is a stage inside the stage 'transitions'. The functions of the learning
+algorithm increment counters (e.g., the number of DTW comparisons or of SVM trainings) using count(); a counter is added
+to all the stages open at the time. When no trace is started, trace_stage() and count() do nothing, so the trace has no
+cost unless it is requested (see the options --trace-file and --trace-header in utils/commandline_parser.py). Other
+tools, e.g., the profiler in utils/profiling.py, are notified of the start and the end of the stages by registering a
+listener with add_stage_listener().
+
+The stages can run in several threads, e.g., the tasks of infer_ha/scheduler.py. Each thread has its own open stages; a
+task run in a worker thread starts with the stages open in the thread running the task graph (see inherited_stages()),
+so that its stages and counters are nested in them. The timing of each task is recorded by record_task().
+
+The trace is a dictionary, written as a JSON file by write_trace():
+    {"stages": [{"stage": "segmentation", "depth": 0, "wall_time": 0.05, "cpu_time": 0.05, "max_rss_kb": 101324,
+                 "peak_memory_kb": null, "counters": {"regressions": 12, "segments": 12}}, ...],
+     "counters": {...totals...}, "wall_time": ..., "cpu_time": ..., "max_rss_kb": ...,
+     "tasks": [{"task": "guard 0-1", "start": 0.31, "wall_time": 0.02, "thread": "learnha-worker_0"}, ...]}
+The stages are listed in the order they start, and the tasks in the order they finish (the start is in seconds from the
+start of the trace).
+"""
+
+import contextlib
+import json
+import logging
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource     # not available on Windows
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+_trace = None   # the active trace, see start_trace()
+_stage_listeners = []   # objects having the methods stage_started(name) and stage_finished(name)
+
+
+class Trace:
+    """
+    The records of the stages and the counters of a traced run.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.tasks = []
+        self.counters = {}
+        self.lock = threading.Lock()     # the counters can be updated by several threads
+        self.local = threading.local()   # the open stages of each thread
+        self.start_wall = time.time()
+        self.start_cpu = time.process_time()
+
+    @property
+    def open_stages(self):
+        """
+        The stages open in the current thread, from the outermost.
+        """
+        if not hasattr(self.local, 'open_stages'):
+            self.local.open_stages = []
+        return self.local.open_stages
+
+    def summary(self):
+        """
+        :return: the dictionary of the trace (see the description of this module) holding the completed stages.
+        """
+        return {'stages': [stage for stage in self.stages if 'wall_time' in stage],
+                'counters': dict(self.counters),
+                'wall_time': time.time() - self.start_wall,
+                'cpu_time': time.process_time() - self.start_cpu,
+                'max_rss_kb': max_rss_kb(),
+                'tasks': list(self.tasks)}
+
+
+def start_trace(trace_memory=False):
+    """
+    Starts recording the stages and the counters.
+
+    :param trace_memory: True to record the peak memory of each stage using the module tracemalloc, which slows the
+        learning down. Python 3.9 or later is needed for the peak of each stage, otherwise the peak from the start of
+        the trace is recorded.
+    """
+    global _trace
+    _trace = Trace(trace_memory)
+    if trace_memory:
+        tracemalloc.start()
+
+
+def stop_trace():
+    """
+    Stops recording.
+
+    :return: the dictionary of the trace, see the description of this module.
+    """
+    global _trace
+    trace, _trace = _trace, None
+    if trace is None:
+        return None
+    if trace.trace_memory:
+        tracemalloc.stop()
+    return trace.summary()
+
+
+def current_trace():
+    """
+    :return: the dictionary of the active trace holding the stages completed so far, or None if no trace is started.
+    """
+    return None if _trace is None else _trace.summary()
+
+
+def open_stages():
+    """
+    :return: the stages open in the current thread, to be passed to inherited_stages(). None if no trace is started.
+    """
+    trace = _trace
+    return None if trace is None else list(trace.open_stages)
+
+
+@contextlib.contextmanager
+def inherited_stages(stages):
+    """
+    Nests the stages started in the current thread, in the body of the with-statement, in the given stages open in
+    another thread.
+
+    :param stages: the list returned by open_stages() in the other thread.
+    """
+    trace = _trace
+    if trace is None or stages is None:
+        yield
+        return
+    own_stages = trace.open_stages
+    trace.local.open_stages = list(stages)
+    try:
+        yield
+    finally:
+        trace.local.open_stages = own_stages
+
+
+@contextlib.contextmanager
+def notified_task(graph_thread):
+    """
+    Notifies the stage listeners that the current thread runs a task of a task graph in the body of the with-statement
+    (see infer_ha/scheduler.py). The task is part of the stages open in the thread running the graph.
+
+    :param graph_thread: the threading.get_ident() of the thread running the graph.
+    """
+    listeners = list(_stage_listeners)
+    for listener in listeners:
+        listener.task_started(graph_thread)
+    try:
+        yield
+    finally:
+        for listener in reversed(listeners):
+            listener.task_finished()
+
+
+def record_task(name, start, wall_time):
+    """
+    Records the timing of a task of a task graph (see infer_ha/scheduler.py). Does nothing if no trace is started.
+
+    :param name: name of the task.
+    :param start: the time.time() at the start of the task.
+    :param wall_time: the duration of the task in seconds.
+    """
+    trace = _trace
+    if trace is None:
+        return
+    trace.tasks.append({'task': name, 'start': start - trace.start_wall, 'wall_time': wall_time,
+                        'thread': threading.current_thread().name})
+
+
+def add_stage_listener(listener):
+    """
+    :param listener: an object whose methods stage_started(name) and stage_finished(name) are called at the start and
+        at the end of each stage, and task_started(graph_thread) and task_finished() at the start and at the end of
+        each task of a task graph (see notified_task()), also when no trace is started. They are called by the thread running the
+        stage or the task.
+    """
+    _stage_listeners.append(listener)
+
+
+def remove_stage_listener(listener):
+    _stage_listeners.remove(listener)
+
+
+def max_rss_kb():
+    """
+    :return: the maximum resident set size of the process in kilobytes, or None if unknown.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def traced_peak_memory(trace):
+    """
+    Updates the peak memory of the open stages with the peak traced by tracemalloc and resets the peak.
+    """
+    peak = tracemalloc.get_traced_memory()[1]
+    for stage in trace.open_stages:
+        stage['_peak'] = max(stage['_peak'], peak)
+    if hasattr(tracemalloc, 'reset_peak'):   # Python 3.9
+        tracemalloc.reset_peak()
+
+
+@contextlib.contextmanager
+def trace_stage(name, **attributes):
+    """
+    Records the stage executed in the body of the with-statement. Eg.:
+        with trace_stage('guard', source=0, destination=1):
+            guard_coeff = getGuard_inequality(...)
+
+    :param name: name of the stage.
+    :param attributes: values stored in the record of the stage, e.g., the source and the destination of a guard.
+    :return: the record (dictionary) of the stage, or None if no trace is started.
+    """
+    trace = _trace
+    listeners = list(_stage_listeners)
+    if trace is None and not listeners:
+        yield None
+        return
+
+    for listener in listeners:
+        listener.stage_started(name)
+    try:
+        if trace is None:
+            yield None
+        else:
+            with recorded_stage(trace, name, attributes) as stage:
+                yield stage
+    finally:
+        for listener in reversed(listeners):
+            listener.stage_finished(name)
+
+
+@contextlib.contextmanager
+def recorded_stage(trace, name, attributes):
+    """
+    Records the wall and CPU time, the memory and the counters of the stage in the trace, see trace_stage().
+    """
+    stage = {'stage': name, 'depth': len(trace.open_stages)}
+    stage.update(attributes)
+    stage['counters'] = {}
+    trace.stages.append(stage)
+    if trace.trace_memory:
+        traced_peak_memory(trace)
+        stage['_peak'] = tracemalloc.get_traced_memory()[0]
+    trace.open_stages.append(stage)
+    start_wall = time.time()
+    start_cpu = time.process_time()
+    try:
+        yield stage
+    finally:
+        stage['wall_time'] = time.time() - start_wall
+        stage['cpu_time'] = time.process_time() - start_cpu
+        stage['max_rss_kb'] = max_rss_kb()
+        stage['peak_memory_kb'] = None
+        if trace.trace_memory:
+            traced_peak_memory(trace)
+            stage['peak_memory_kb'] = stage.pop('_peak') / 1024
+        trace.open_stages.pop()
+        logger.debug("%s finished in %.3f seconds", name, stage['wall_time'])
+
+
+def count(counter, value=1):
+    """
+    Adds value to the counter of the trace and of the open stages. Does nothing if no trace is started.
+
+    :param counter: name of the counter, e.g., 'dtw_calls'.
+    :param value: the increment.
+    """
+    trace = _trace
+    if trace is None:
+        return
+    with trace.lock:
+        trace.counters[counter] = trace.counters.get(counter, 0) + value
+        for stage in trace.open_stages:
+            stage['counters'][counter] = stage['counters'].get(counter, 0) + value
+
+
+def write_trace(trace, outputfilename):
+    """
+    :param trace: the dictionary returned by stop_trace().
+    :param outputfilename: name of the JSON file.
+    """
+    with open(outputfilename, "w") as f_out:
+        json.dump(trace, f_out, indent=2)